@@ -9,6 +9,8 @@ import matplotlib.pyplot as plt
 from gpkit.small_scripts import mag
 from collections import defaultdict
 from simple_ac_imports import Aircraft, CruiseClimbSegment, ClimbSegment, FlightState
+from phased_mission import PhasedMission
+from cycle_table import EngineCycleTable
 
 """
 Models requird to minimze the aircraft total fuel weight. Rate of climb equation taken from John
@@ -26,58 +28,18 @@ Inputs
 - Cruise altitude [ft]
 """
 
-class StateLinking(Model):
-    """
-    link all the state model variables
-    """
-    def setup(self, climbstate, cruisestate, enginestate, Nclimb, Ncruise):
-        statevarkeys = ['p_{sl}', 'T_{sl}', 'L_{atm}', 'M_{atm}', 'P_{atm}', 'R_{atm}',
-                        '\\rho', 'T_{atm}', '\\mu', 'T_s', 'C_1', 'h', 'hft', 'V', 'a', 'R', '\\gamma', 'M']
-        constraints = []
-        for i in range(len(statevarkeys)):
-            varkey = statevarkeys[i]
-            for i in range(Nclimb):
-                constraints.extend([
-                    climbstate[varkey][i] == enginestate[varkey][i]
-                    ])
-            for i in range(Ncruise):
-                constraints.extend([
-                    cruisestate[varkey][i] == enginestate[varkey][i+Nclimb]
-                    ])           
-        
-        return constraints
-    
-class Mission(Model):
+class Mission(PhasedMission):
     """
     mission class, links together all subclasses
     """
     def setup(self, Nclimb, Ncruise, substitutions = None, **kwargs):
-        eng = 0
-        
-        # vectorize
-        with Vectorize(Nclimb + Ncruise):
-            enginestate = FlightState()
-    
-        #build the submodel
-        ac = Aircraft(Nclimb, Ncruise, enginestate, eng)
-
-        #Vectorize
-        with Vectorize(Nclimb):
-            climb = ClimbSegment(ac)
-
-        with Vectorize(Ncruise):
-            cruise = CruiseClimbSegment(ac)
-
-        statelinking = StateLinking(climb.state, cruise.state, enginestate, Nclimb, Ncruise)
+        #the climb and cruise climb phases, their weights, fuel burns and engine
+        mission = PhasedMission.setup(self, [('climb', Nclimb), ('cruise-climb', Ncruise)])
+        climb, cruise = self.phase['climb'], self.phase['cruise']
 
         #declare new variables
-        W_ftotal = Variable('W_{f_{total}}', 'N', 'Total Fuel Weight')
-        W_fclimb = Variable('W_{f_{climb}}', 'N', 'Fuel Weight Burned in Climb')
-        W_fcruise = Variable('W_{f_{cruise}}', 'N', 'Fuel Weight Burned in Cruise')
-        W_total = Variable('W_{total}', 'N', 'Total Aircraft Weight')
         CruiseAlt = Variable('CruiseAlt', 'ft', 'Cruise Altitude [feet]')
         ReqRng = Variable('ReqRng', 'nautical_miles', 'Required Cruise Range')
-        W_dry = Variable('W_{dry}', 'N', 'Aircraft Dry Weight')
 
         dhftholdcl = Variable('dhftholdcl', 'ft', 'Climb Hold Variable')
         dhftholdcr = Variable('dhftholdcr', 'ft', 'Cruise Hold Variable')
@@ -95,27 +57,6 @@ class Mission(Model):
 
         with SignomialsEnabled():
             constraints.extend([
-                #weight constraints
-                TCS([ac['W_{e}'] + ac['W_{payload}'] + ac['numeng'] * ac['W_{engine}'] + ac['W_{wing}'] <= W_dry]),
-                TCS([W_dry + W_ftotal <= W_total]),
-
-                climb['W_{start}'][0] == W_total,
-                climb['W_{end}'][-1] == cruise['W_{start}'][0],
-
-                # similar constraint 1
-                TCS([climb['W_{start}'] >= climb['W_{end}'] + climb['W_{burn}']]),
-                # similar constraint 2
-                TCS([cruise['W_{start}'] >= cruise['W_{end}'] + cruise['W_{burn}']]),
-
-                climb['W_{start}'][1:] == climb['W_{end}'][:-1],
-                cruise['W_{start}'][1:] == cruise['W_{end}'][:-1],
-
-                TCS([W_dry <= cruise['W_{end}'][-1]]),
-
-                TCS([W_ftotal >=  W_fclimb + W_fcruise]),
-                TCS([W_fclimb >= sum(climb['W_{burn}'])]),
-                TCS([W_fcruise >= sum(cruise['W_{burn}'])]),
-
                 #altitude constraints
                 hftCruise[0] == CruiseAlt,
 ##                TCS([hftCruise[1:Ncruise] >= hftCruise[:Ncruise-1] + dhftcr]),
@@ -133,57 +74,14 @@ class Mission(Model):
                 
                 sum(cruise['RngCruise']) + sum(climb['RngClimb']) >= ReqRng,
 
-                #compute fuel burn from TSFC
-                cruise['W_{burn}'] == ac['numeng']*ac.engine['TSFC'][Nclimb:] * cruise['thr'] * ac.engine['F'][Nclimb:],              
-                climb['W_{burn}'] == ac['numeng']*ac.engine['TSFC'][:Nclimb] * climb['thr'] * ac.engine['F'][:Nclimb],
-
                 #min climb rate constraint
 ##                climb['RC'][0] >= RCmin,
-                ])
-
-        M2 = .8
-        M25 = .6
-        M4a = .1025
-        Mexit = 1
-        M0 = .8
-
-        engineclimb = [
-            ac.engine.engineP['M_2'][:Nclimb] == climb['M'],
-            ac.engine.engineP['M_{2.5}'] == M25,
-            ac.engine.engineP['hold_{2}'] == 1+.5*(1.398-1)*M2**2,
-            ac.engine.engineP['hold_{2.5}'] == 1+.5*(1.354-1)*M25**2,
-            ac.engine.engineP['c1'] == 1+.5*(.401)*M0**2,
-
-            #constraint on drag and thrust
-            ac['numeng']*ac.engine['F_{spec}'][:Nclimb] >= climb['D'] + climb['W_{avg}'] * climb['\\theta'],
-
-            #climb rate constraints
-            TCS([climb['excessP'] + climb.state['V'] * climb['D'] <=  climb.state['V'] * ac['numeng'] * ac.engine['F_{spec}'][:Nclimb]]),
-            ]
-
-        M2 = .8
-        M25 = .6
-        M4a = .1025
-        Mexit = 1
-        M0 = .8
-
-        enginecruise = [
-            ac.engine.engineP['M_2'][Nclimb:] == cruise['M'],
 
-##            cruise['M'] == .8,
-            cruise['M'] >= .76,
-
-            ac.engine.engineP['M_{2.5}'][2] == M25,
-            ac.engine.engineP['M_{2.5}'][3] == M25,
-
-           #constraint on drag and thrust
-            ac['numeng']*ac.engine['F_{spec}'][Nclimb:] >= cruise['D'] + cruise['W_{avg}'] * cruise['\\theta'],
-
-            #climb rate constraints
-            TCS([cruise['excessP'] + cruise.state['V'] * cruise['D'] <=  cruise.state['V'] * ac['numeng'] * ac.engine['F_{spec}'][Nclimb:]]),
-            ]
+##                cruise['M'] == .8,
+                cruise['M'] >= .76,
+                ])
 
-        return constraints + ac + climb + cruise + enginecruise + engineclimb + enginestate + statelinking
+        return mission, constraints
 
 if __name__ == '__main__':
     plotRC = False
@@ -395,23 +293,15 @@ if __name__ == '__main__':
         plt.title('Cruise Altitude vs Range')
         plt.savefig('engine_Rsweeps/cruise_altitude_range.pdf')
         plt.show()
-        
-        irc = []
-        f = []
-        f6 = []
-        f8 = []
-        totsfc = []
-        cruisetsfc = []
-        
-        i=0
-        while i < len(solRsweep('RC')):
-            irc.append(mag(solRsweep('RC')[i][0]))
-            f.append(mag(solRsweep('F')[i][0]))
-            f6.append(mag(solRsweep('F_6')[i][0]))
-            f8.append(mag(solRsweep('F_8')[i][0]))
-            totsfc.append(mag(solRsweep('TSFC')[i][0]))
-            cruisetsfc.append(mag(solRsweep('TSFC')[i][2]))
-            i+=1
+
+        table = EngineCycleTable.from_solution(solRsweep, mission.ac.engine)
+        segments = table.segments
+        irc = mag(solRsweep('RC'))[:, 0]
+        f = segments['F'][:, 0]
+        f6 = segments['F_6'][:, 0]
+        f8 = segments['F_8'][:, 0]
+        totsfc = segments['TSFC'][:, 0]
+        cruisetsfc = segments['TSFC'][:, 2]
 
         plt.plot(solRsweep('ReqRng'), totsfc, '-r', linewidth=2.0)
         plt.plot(solRsweep('ReqRng'), cruisetsfc, '-g', linewidth=2.0)
@@ -580,17 +470,12 @@ if __name__ == '__main__':
         m = Model(mission['W_{f_{total}}'], mission, substitutions)
         solAltsweep = m.localsolve(solver='mosek', verbosity = 4, skipsweepfailures=True)
 
-        irc = []
-        f = []
-        f6 = []
-        f8 = []
-        i=0
-        while i < len(solAltsweep('RC')):
-            irc.append(mag(solAltsweep('RC')[i][0]))
-            f.append(mag(solAltsweep('F')[i][0]))
-            f6.append(mag(solAltsweep('F_6')[i][0]))
-            f8.append(mag(solAltsweep('F_8')[i][0]))
-            i+=1
+        table = EngineCycleTable.from_solution(solAltsweep, mission.ac.engine)
+        segments = table.segments
+        irc = mag(solAltsweep('RC'))[:, 0]
+        f = segments['F'][:, 0]
+        f6 = segments['F_6'][:, 0]
+        f8 = segments['F_8'][:, 0]
 
         plt.plot(solAltsweep('CruiseAlt'), irc, '-r')
         plt.xlabel('Mission Range [nm]')
@@ -732,21 +617,13 @@ if __name__ == '__main__':
         m = Model(mission['W_{f_{total}}'], mission, substitutions)
         solRCsweep = m.localsolve(solver='mosek', verbosity = 1, skipsweepfailures=True)
 
-        i = 0
-
-        f = []
-        f6 = []
-        f8 = []
-        crtsfc = []
-        itsfc = []
-
-        while i < len(solRCsweep('RC')):
-            f.append(mag(solRCsweep('F')[i][0]))
-            f6.append(mag(solRCsweep('F_6')[i][0]))
-            f8.append(mag(solRCsweep('F_8')[i][0]))
-            crtsfc.append(mag(solRCsweep('TSFC')[i][2]))
-            itsfc.append(mag(solRCsweep('TSFC')[i][0]))
-            i+=1
+        table = EngineCycleTable.from_solution(solRCsweep, mission.ac.engine)
+        segments = table.segments
+        f = segments['F'][:, 0]
+        f6 = segments['F_6'][:, 0]
+        f8 = segments['F_8'][:, 0]
+        crtsfc = segments['TSFC'][:, 2]
+        itsfc = segments['TSFC'][:, 0]
 
         plt.plot(solRCsweep('RC_{min}'), solRCsweep('CruiseAlt'), '-r', linewidth=2.0)
         plt.ylabel('Cruise Altitude [ft]')
@@ -9,6 +9,8 @@ import matplotlib.pyplot as plt
 from gpkit.small_scripts import mag
 from collections import defaultdict
 from simple_ac_imports import Aircraft, CruiseClimbSegment, ClimbSegment, FlightState
+from phased_mission import PhasedMission
+from cycle_table import EngineCycleTable
 
 """
 Models requird to minimze the aircraft total fuel weight. Rate of climb equation taken from John
@@ -26,66 +28,19 @@ Inputs
 - Cruise altitude [ft]
 """
 
-class StateLinking(Model):
-    """
-    link all the state model variables
-    """
-    def setup(self, climbstate1, climbstate2, cruisestate, enginestate, Nclimb1, Nclimb2, Ncruise):
-        statevarkeys = ['p_{sl}', 'T_{sl}', 'L_{atm}', 'M_{atm}', 'P_{atm}', 'R_{atm}',
-                        '\\rho', 'T_{atm}', '\\mu', 'T_s', 'C_1', 'h', 'hft', 'V', 'a', 'R', '\\gamma', 'M']
-        constraints = []
-        for i in range(len(statevarkeys)):
-            varkey = statevarkeys[i]
-            for i in range(Nclimb1):
-                constraints.extend([
-                    climbstate1[varkey][i] == enginestate[varkey][i]
-                    ])
-            for i in range(Nclimb2):
-                constraints.extend([
-                    climbstate2[varkey][i] == enginestate[varkey][i + Nclimb1]
-                    ])
-            for i in range(Ncruise):
-                constraints.extend([
-                    cruisestate[varkey][i] == enginestate[varkey][i + Nclimb1 + Nclimb2]
-                    ])           
-        
-        return constraints
-
-class Mission(Model):
+class Mission(PhasedMission):
     """
     mission class, links together all subclasses
     """
     def setup(self, Nclimb1, Nclimb2, Ncruise, substitutions = None, **kwargs):
-        eng = 0
-        # vectorize
-        with Vectorize(Nclimb1  +Nclimb2 + Ncruise):
-            enginestate = FlightState()
-            
-        #build the submodel
-        ac = Aircraft(Nclimb1 + Nclimb2, Ncruise, enginestate, eng)
-
-        #Vectorize
-        with Vectorize(Nclimb1):
-            climb1 = ClimbSegment(ac)
-
-        #Vectorize
-        with Vectorize(Nclimb2):
-            climb2 = ClimbSegment(ac)
-
-        with Vectorize(Ncruise):
-            cruise = CruiseClimbSegment(ac)
-
-        statelinking = StateLinking(climb1.state, climb2.state, cruise.state, enginestate, Nclimb1, Nclimb2, Ncruise)
+        #the two climb and the cruise climb phases, their weights, fuel burns
+        #and engine
+        mission = PhasedMission.setup(self, [('climb', Nclimb1), ('climb', Nclimb2), ('cruise-climb', Ncruise)])
+        climb1, climb2, cruise = self.phase['climb1'], self.phase['climb2'], self.phase['cruise']
 
         #declare new variables
-        W_ftotal = Variable('W_{f_{total}}', 'N', 'Total Fuel Weight')
-        W_fclimb1 = Variable('W_{f_{climb1}}', 'N', 'Fuel Weight Burned in Climb 1')
-        W_fclimb2 = Variable('W_{f_{climb2}}', 'N', 'Fuel Weight Burned in Climb 2')
-        W_fcruise = Variable('W_{f_{cruise}}', 'N', 'Fuel Weight Burned in Cruise')
-        W_total = Variable('W_{total}', 'N', 'Total Aircraft Weight')
         CruiseAlt = Variable('CruiseAlt', 'ft', 'Cruise Altitude [feet]')
         ReqRng = Variable('ReqRng', 'nautical_miles', 'Required Cruise Range')
-        W_dry = Variable('W_{dry}', 'N', 'Aircraft Dry Weight')
 
         RCmin = Variable('RC_{min}', 'ft/min', 'Minimum allowed climb rate')
 
@@ -107,29 +62,6 @@ class Mission(Model):
 
         with SignomialsEnabled():
             constraints.extend([
-                #weight constraints
-                TCS([ac['W_{e}'] + ac['W_{payload}'] + ac['numeng'] * ac['W_{engine}'] + ac['W_{wing}'] <= W_dry]),
-                TCS([W_dry + W_ftotal <= W_total]),
-
-                climb1['W_{start}'][0] == W_total,
-                climb1['W_{end}'][-1] == climb2['W_{start}'][0],
-                climb2['W_{end}'][-1] == cruise['W_{start}'][0],
-
-                TCS([climb1['W_{start}'] >= climb1['W_{end}'] + climb1['W_{burn}']]),
-                TCS([climb2['W_{start}'] >= climb2['W_{end}'] + climb2['W_{burn}']]),
-                TCS([cruise['W_{start}'] >= cruise['W_{end}'] + cruise['W_{burn}']]),
-
-                climb1['W_{start}'][1:] == climb1['W_{end}'][:-1],
-                climb2['W_{start}'][1:] == climb2['W_{end}'][:-1],
-                cruise['W_{start}'][1:] == cruise['W_{end}'][:-1],
-
-                TCS([W_dry <= cruise['W_{end}'][-1]]),
-
-                TCS([W_ftotal >=  W_fclimb1 + W_fclimb2 + W_fcruise]),
-                TCS([W_fclimb1 >= sum(climb1['W_{burn}'])]),
-                TCS([W_fclimb2 >= sum(climb2['W_{burn}'])]),
-                TCS([W_fcruise >= sum(cruise['W_{burn}'])]),
-
                 #altitude constraints
                 hftCruise[0] == CruiseAlt,
 ##                TCS([hftCruise[1:Ncruise] >= hftCruise[:Ncruise-1] + dhftcr]),
@@ -153,72 +85,15 @@ class Mission(Model):
                 
                 sum(cruise['RngCruise']) + sum(climb2['RngClimb']) + sum(climb1['RngClimb']) >= ReqRng,
 
-                #compute fuel burn from TSFC
-                cruise['W_{burn}'] == ac['numeng']*ac.engine['TSFC'][Nclimb1 + Nclimb2:] * cruise['thr'] * ac.engine['F'][Nclimb1 + Nclimb2:],              
-                climb1['W_{burn}'] == ac['numeng']*ac.engine['TSFC'][:Nclimb1] * climb1['thr'] * ac.engine['F'][:Nclimb1],
-                climb2['W_{burn}'] == ac['numeng']*ac.engine['TSFC'][Nclimb1:Nclimb1 + Nclimb2] * climb2['thr'] * ac.engine['F'][Nclimb1:Nclimb1 + Nclimb2],
-
                 #min climb rate constraint
 ##                climb1['RC'][0] >= RCmin,
 
                 climb1['V'] <= 250*units('knots'),
-                ])
 
-        M2 = .8
-        M25 = .6
-        M4a = .1025
-        Mexit = 1
-        M0 = .8
-
-        engineclimb1 = [
-            ac.engine.engineP['M_2'][:Nclimb1] == climb1['M'],
-            ac.engine.engineP['M_{2.5}'] == M25,
-            ac.engine.engineP['hold_{2}'] == 1+.5*(1.398-1)*M2**2,
-            ac.engine.engineP['hold_{2.5}'] == 1+.5*(1.354-1)*M25**2,
-            ac.engine.engineP['c1'] == 1+.5*(.401)*M0**2,
-
-            #constraint on drag and thrust
-            ac['numeng']*ac.engine['F_{spec}'][:Nclimb1] >= climb1['D'] + climb1['W_{avg}'] * climb1['\\theta'],
-
-            #climb rate constraints
-            TCS([climb1['excessP'] + climb1.state['V'] * climb1['D'] <=  climb1.state['V'] * ac['numeng'] * ac.engine['F_{spec}'][:Nclimb1]]),
-            ]
-
-        M2 = .8
-        M25 = .6
-        M4a = .1025
-        Mexit = 1
-        M0 = .8
-
-        engineclimb2 = [
-            ac.engine.engineP['M_2'][Nclimb1:Nclimb1 + Nclimb2] == climb2['M'],
-
-            #constraint on drag and thrust
-            ac['numeng']*ac.engine['F_{spec}'][Nclimb1:Nclimb1 + Nclimb2] >= climb2['D'] + climb2['W_{avg}'] * climb2['\\theta'],
-
-            #climb rate constraints
-            TCS([climb2['excessP'] + climb2.state['V'] * climb2['D'] <=  climb2.state['V'] * ac['numeng'] * ac.engine['F_{spec}'][Nclimb1:Nclimb1 + Nclimb2]]),
-            ]
-
-        M2 = .8
-        M25 = .6
-        M4a = .1025
-        Mexit = 1
-        M0 = .8
-
-        enginecruise = [
-            ac.engine.engineP['M_2'][Nclimb1 + Nclimb2:] == cruise['M'],
-
-##            cruise['M'] >= .7,
-
-           #constraint on drag and thrust
-            ac['numeng'] * ac.engine['F_{spec}'][Nclimb1 + Nclimb2:] >= cruise['D'] + cruise['W_{avg}'] * cruise['\\theta'],
-
-            #climb rate constraints
-            TCS([cruise['excessP'] + cruise.state['V'] * cruise['D'] <=  cruise.state['V'] * ac['numeng'] * ac.engine['F_{spec}'][Nclimb1 + Nclimb2:]]),
-            ]
+##                cruise['M'] >= .7,
+                ])
 
-        return constraints + ac + climb1 + climb2 + cruise + enginecruise + engineclimb1 + engineclimb2 + enginestate + statelinking
+        return mission, constraints
     
 if __name__ == '__main__':
     plotRC = False
@@ -429,23 +304,15 @@ if __name__ == '__main__':
         plt.title('Cruise Altitude vs Range')
         plt.savefig('engine_Rsweeps/cruise_altitude_range.pdf')
         plt.show()
-        
-        irc = []
-        f = []
-        f6 = []
-        f8 = []
-        totsfc = []
-        cruisetsfc = []
-        
-        i=0
-        while i < len(solRsweep('RC')):
-            irc.append(mag(solRsweep('RC')[i][0]))
-            f.append(mag(solRsweep('F')[i][0]))
-            f6.append(mag(solRsweep('F_6')[i][0]))
-            f8.append(mag(solRsweep('F_8')[i][0]))
-            totsfc.append(mag(solRsweep('TSFC')[i][0]))
-            cruisetsfc.append(mag(solRsweep('TSFC')[i][2]))
-            i+=1
+
+        table = EngineCycleTable.from_solution(solRsweep, mission.ac.engine)
+        segments = table.segments
+        irc = mag(solRsweep('RC'))[:, 0]
+        f = segments['F'][:, 0]
+        f6 = segments['F_6'][:, 0]
+        f8 = segments['F_8'][:, 0]
+        totsfc = segments['TSFC'][:, 0]
+        cruisetsfc = segments['TSFC'][:, 2]
 
         plt.plot(solRsweep('ReqRng'), totsfc, '-r', linewidth=2.0)
         plt.plot(solRsweep('ReqRng'), cruisetsfc, '-g', linewidth=2.0)
@@ -614,17 +481,12 @@ if __name__ == '__main__':
         m = Model(mission['W_{f_{total}}'], mission, substitutions)
         solAltsweep = m.localsolve(solver='mosek', verbosity = 4, skipsweepfailures=True)
 
-        irc = []
-        f = []
-        f6 = []
-        f8 = []
-        i=0
-        while i < len(solAltsweep('RC')):
-            irc.append(mag(solAltsweep('RC')[i][0]))
-            f.append(mag(solAltsweep('F')[i][0]))
-            f6.append(mag(solAltsweep('F_6')[i][0]))
-            f8.append(mag(solAltsweep('F_8')[i][0]))
-            i+=1
+        table = EngineCycleTable.from_solution(solAltsweep, mission.ac.engine)
+        segments = table.segments
+        irc = mag(solAltsweep('RC'))[:, 0]
+        f = segments['F'][:, 0]
+        f6 = segments['F_6'][:, 0]
+        f8 = segments['F_8'][:, 0]
 
         plt.plot(solAltsweep('CruiseAlt'), irc, '-r')
         plt.xlabel('Mission Range [nm]')
@@ -766,21 +628,13 @@ if __name__ == '__main__':
         m = Model(mission['W_{f_{total}}'], mission, substitutions)
         solRCsweep = m.localsolve(solver='mosek', verbosity = 1, skipsweepfailures=True)
 
-        i = 0
-
-        f = []
-        f6 = []
-        f8 = []
-        crtsfc = []
-        itsfc = []
-
-        while i < len(solRCsweep('RC')):
-            f.append(mag(solRCsweep('F')[i][0]))
-            f6.append(mag(solRCsweep('F_6')[i][0]))
-            f8.append(mag(solRCsweep('F_8')[i][0]))
-            crtsfc.append(mag(solRCsweep('TSFC')[i][2]))
-            itsfc.append(mag(solRCsweep('TSFC')[i][0]))
-            i+=1
+        table = EngineCycleTable.from_solution(solRCsweep, mission.ac.engine)
+        segments = table.segments
+        f = segments['F'][:, 0]
+        f6 = segments['F_6'][:, 0]
+        f8 = segments['F_8'][:, 0]
+        crtsfc = segments['TSFC'][:, 2]
+        itsfc = segments['TSFC'][:, 0]
 
         plt.plot(solRCsweep('RC_{min}'), solRCsweep('CruiseAlt'), '-r', linewidth=2.0)
         plt.ylabel('Cruise Altitude [ft]')
@@ -0,0 +1,193 @@
+"""Calibration of the component efficiencies of an engine against reference TSFC data"""
+import numpy as np
+from time import time
+from multiprocessing import Pool
+from gpkit.small_scripts import mag
+from engine_presets import PRESET_TABLE, make_calibration
+from cycle_estimate import estimate
+import engine_validation
+
+#the efficiencies of make_calibration and the substituted constants that are fit
+PARAMETERS = ['faneta', 'LPCeta', 'HPCeta', 'LPTeta', 'HPTeta', 'M_{takeoff}', '\\alpha_c']
+EFFICIENCIES = PARAMETERS[:5]
+
+#(lower, upper) values the fit keeps the parameters within
+BOUNDS = {'faneta': (.8, .99), 'LPCeta': (.8, .99), 'HPCeta': (.8, .99), 'LPTeta': (.8, .99),
+          'HPTeta': (.8, .99), 'M_{takeoff}': (.8, 1.), '\\alpha_c': (.05, .35)}
+
+#reference TSFC [1/hr] of each validation segment and engine weight [N], the
+#values the __main__ block of engine_validation compares against
+REFERENCE = {
+    0: {'TSFC': [.6793, .6941], 'W_{engine}': 5216*4.44822},
+    1: {'TSFC': [.48434, .65290, .64009], 'W_{engine}': 7870.7*4.44822},
+    2: {'TSFC': [.5418, .5846], 'W_{engine}': 17400*4.44822},
+    }
+
+def _solve(args):
+    """
+    solves the validation model of an engine at one set of parameter values,
+    module level so the worker processes can unpickle it
+    ________
+    INPUTS
+    args = (eng, {name: value} of PARAMETERS)
+
+    OUTPUTS
+    {'TSFC': array, 'W_{engine}': value}, or None when the model fails to solve
+    """
+    eng, values = args
+    row = PRESET_TABLE[eng]
+    gammas = dict(row['gammas'])
+    gammas.update(dict((name, values.get(name, row['efficiencies'][name])) for name in EFFICIENCIES))
+    engine, m = engine_validation.validation_model(eng, make_calibration(**gammas))
+    m.substitutions.update(dict((name, value) for name, value in values.items() if name not in EFFICIENCIES))
+    #every solve starts from the cycle estimate of its own calibration, starting
+    #from a neighbouring solution is slower and leaves the result depending on
+    #the order of the solves by more than the finite difference steps move it
+    try:
+        sol = m.localsolve(verbosity = 0, x0 = estimate(engine, m, 3 if eng == 1 else 2).x0(m))
+    except (RuntimeWarning, ValueError):
+        return None
+    return {'TSFC': mag(sol(engine.engineP.thrustP['TSFC'])), 'W_{engine}': mag(sol(engine['W_{engine}']))}
+
+class Calibration(object):
+    """
+    Least squares fit of an engine's efficiencies and constants to reference
+    data, a Levenberg-Marquardt iteration whose finite difference Jacobian is
+    solved in worker processes, the inner solves are cached on their parameters
+    ________
+    INPUTS
+    eng = engine preset to calibrate
+    reference = {'TSFC': [1/hr] per validation segment, 'W_{engine}': [N]},
+    REFERENCE[eng] by default, entries set to None are not fit
+    parameters = names of the PARAMETERS to fit, the rest keep their preset values
+    prior = weight of the relative distance to the preset values, which keeps
+    the fit determined when there are more parameters than reference values
+    processes = number of worker processes, all cores by default
+    """
+    def __init__(self, eng, reference = None, parameters = PARAMETERS, prior = 1e-2, processes = None):
+        self.eng = eng
+        self.reference = reference or REFERENCE[eng]
+        self.parameters = list(parameters)
+        self.prior = prior
+        self.processes = processes
+        subs = engine_validation.validation_substitutions(eng)
+        start = dict(PRESET_TABLE[eng]['efficiencies'])
+        start.update({'M_{takeoff}': subs['M_{takeoff}'], '\\alpha_c': subs['\\alpha_c']})
+        self.start = np.array([start[name] for name in self.parameters])
+        #{rounded parameter values: outputs}
+        self.cache = {}
+        self.solves = 0
+
+    def _key(self, p):
+        return tuple(np.round(p, 10))
+
+    def evaluate(self, points, pool = None):
+        """
+        returns the outputs of every parameter vector of points, the ones that
+        are not cached are solved together, in pool when it is given
+        """
+        new = []
+        for p in points:
+            if self._key(p) not in self.cache and self._key(p) not in [self._key(q) for q in new]:
+                new.append(p)
+        tasks = [(self.eng, dict(zip(self.parameters, p))) for p in new]
+        results = pool.map(_solve, tasks) if pool and len(tasks) > 1 else map(_solve, tasks)
+        self.solves += len(tasks)
+        for p, result in zip(new, results):
+            self.cache[self._key(p)] = result
+        return [self.cache[self._key(p)] for p in points]
+
+    def residuals(self, result):
+        """
+        returns the relative differences of the outputs of a solve to the
+        reference values, or None for a failed solve
+        """
+        if result is None:
+            return None
+        r = []
+        for name in ['TSFC', 'W_{engine}']:
+            ref = self.reference.get(name)
+            if ref is not None:
+                r.extend(np.atleast_1d(result[name])/np.asarray(ref) - 1)
+        return np.array(r)
+
+    def fit(self, maxiter = 10, tol = 1e-4, step = 1e-2, mu = 1e-3):
+        """
+        runs the Levenberg-Marquardt iteration from the preset values, returns
+        {name: fitted value} of the parameters, their residuals are in
+        self.result
+        ________
+        INPUTS
+        tol = parameter change that ends the iteration
+        step = finite difference step of the Jacobian
+        mu = initial damping
+        """
+        lower = np.array([BOUNDS[name][0] for name in self.parameters])
+        upper = np.array([BOUNDS[name][1] for name in self.parameters])
+        scale = np.diag(1/self.start**2)
+        cost = lambda p, r: np.sum(r**2) + self.prior**2*np.sum(((p - self.start)/self.start)**2)
+
+        pool = Pool(self.processes) if self.processes != 1 else None
+        try:
+            p = self.start.copy()
+            r = self.residuals(self.evaluate([p], pool)[0])
+            if r is None:
+                raise ValueError("engine %s does not solve at its preset values" % self.eng)
+            for i in range(maxiter):
+                #one column of the Jacobian per worker
+                columns = [p + step*np.eye(len(p))[j] for j in range(len(p))]
+                shifted = [self.residuals(res) for res in self.evaluate(columns, pool)]
+                if any(rj is None for rj in shifted):
+                    break
+                J = np.array([(rj - r)/step for rj in shifted]).T
+                g = J.T.dot(r) + self.prior**2*scale.dot(p - self.start)
+                A = J.T.dot(J) + self.prior**2*scale
+                while True:
+                    dp = -np.linalg.solve(A + mu*np.diag(np.diag(A)), g)
+                    trial = np.clip(p + dp, lower, upper)
+                    rt = self.residuals(self.evaluate([trial], pool)[0])
+                    if rt is not None and cost(trial, rt) < cost(p, r):
+                        mu /= 3.
+                        break
+                    mu *= 4.
+                    if mu > 1e6:
+                        break
+                if rt is None or cost(trial, rt) >= cost(p, r):
+                    break
+                done = np.max(np.abs(trial - p)) < tol
+                p, r = trial, rt
+                if done:
+                    break
+        finally:
+            if pool:
+                pool.close()
+                pool.join()
+        self.result = r
+        return dict(zip(self.parameters, p))
+
+def test():
+    """
+    recovers a shifted fan efficiency of the CFM56 from the TSFC and weight
+    it gives, in two worker processes
+    """
+    values = {'faneta': .91}
+    outputs = _solve((0, values))
+    cal = Calibration(0, outputs, ['faneta'], processes = 2)
+    fit = cal.fit(maxiter = 4)
+    assert abs(fit['faneta'] - .91) < 2e-3, fit
+    assert np.max(np.abs(cal.result)) < 1e-3
+
+    #the preset values are cached, evaluating them again solves nothing
+    solves = cal.solves
+    cal.evaluate([cal.start])
+    assert cal.solves == solves
+
+if __name__ == "__main__":
+    for eng in [0, 2]:
+        tic = time()
+        cal = Calibration(eng)
+        fit = cal.fit()
+        print("%s calibrated in %.3g s with %i solves" % (PRESET_TABLE[eng]['name'], time() - tic, cal.solves))
+        for name in cal.parameters:
+            print("%s = %.4f" % (name, fit[name]))
+        print("percent errors %s" % np.round(100*cal.result, 3))
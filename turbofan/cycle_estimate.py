@@ -0,0 +1,418 @@
+"""Closed-form NumPy cycle estimate used to initialize and bound the engine model"""
+import numpy as np
+from gpkit.nomials import MonomialEquality
+from engine_presets import mass_flow_coefficient, TREF, PREF
+#plain import, engine_validation imports this module to start its own test solves
+import engine_validation
+
+#units each estimated quantity is computed in
+UNITS = {'P': 'kPa', 'T': 'K', 'h': 'J/kg', 'u': 'm/s', 'a': 'm/s', 'm': 'kg/s', 'A': 'm^2',
+         'F': 'N', 'rho': 'kg/m^3', 'I': 's', 'TSFC': '1/hr', 'd': 'm', 'V': 'm/s'}
+
+#prefix of UNITS used by each estimated variable, variables not listed are unitless
+VARUNITS = {
+    'W_{engine}': 'F', 'F_8': 'F', 'F_6': 'F', 'F': 'F', 'I_{sp}': 'I', 'TSFC': 'TSFC',
+    'd_{f}': 'd', 'd_{LPC}': 'd', 'V': 'V', 'a': 'a', 'a_5': 'a', 'a_7': 'a',
+    '\\rho_2': 'rho', '\\rho_2.5': 'rho', '\\rho_7': 'rho', '\\rho_5': 'rho',
+    '\\bar{m}_{fan_{D}}': 'm', 'hold_{2}': None, 'hold_{2.5}': None, 'hold_{4a}': None, 'hold': None,
+    }
+
+def fixed_values(model):
+    """
+    returns {varkey: value} for the variables model fixes to a constant through
+    a monomial equality (e.g. the flight conditions of a mission), values are
+    in the units of the variable
+    """
+    fixed = {}
+    for constraint in model.flat(constraintsets=False):
+        if not isinstance(constraint, MonomialEquality):
+            continue
+        for var, const in [(constraint.left, constraint.right), (constraint.right, constraint.left)]:
+            if len(var.exp) == 1 and not const.exp and list(var.exp.values())[0] == 1:
+                value = const.c/var.c
+                if hasattr(value, 'to'):
+                    value = value.to('dimensionless').magnitude
+                fixed[list(var.exp.keys())[0]] = float(value)
+    return fixed
+
+def conditions(model, N):
+    """
+    collects the substituted and fixed values of model by variable name, vector
+    variables become length N arrays with nan where a segment is left free
+    """
+    values = {}
+    items = list(fixed_values(model).items())
+    for key, value in model.substitutions.items():
+        if hasattr(key, 'name') and not hasattr(value, '__call__'):
+            items.append((key, value))
+    for key, value in items:
+        if hasattr(value, 'to'):
+            value = value.to(key.units).magnitude if key.units else value.magnitude
+        if key.idx:
+            values.setdefault(key.name, np.nan*np.ones(N))[key.idx[0]] = value
+        elif np.size(value) == N and np.ndim(value) > 0:
+            values[key.name] = np.array(value, dtype=float)
+        else:
+            values.setdefault(key.name, float(value))
+    return values
+
+def _fill(values, name, default, N):
+    """
+    returns the length N array of name, using default where it is not set
+    """
+    value = np.asarray(values.get(name, np.nan), dtype=float)*np.ones(N)
+    default = np.asarray(default, dtype=float)*np.ones(N)
+    return np.where(np.isnan(value), default, value)
+
+def cycle_constants(values):
+    """
+    returns the constants of the cycle relations from values, falling back on
+    the CFM56 validation values
+    """
+    return {
+        'R': values.get('R', 287.), 'g': values.get('g', 9.81),
+        'Cpair': values.get('Cp_{air}', 1003.), 'Cp1': values.get('Cp_{1}', 1008.),
+        'Cp2': values.get('Cp_{2}', 1099.), 'Cpc': values.get('Cp_c', 1216.),
+        'Cpt1': values.get('Cp_t1', 1280.), 'Cpt2': values.get('Cp_t2', 1184.),
+        'Cptex': values.get('Cp_tex', 1029.), 'Cpfex': values.get('Cp_fex', 1005.),
+        'Cpfuel': values.get('Cp_{fuel}', 2010.), 'hf': values.get('h_f', 43.003)*1e6,
+        'Ttf': values.get('T_{t_f}', 435.), 'etaB': values.get('eta_{B}', .9827),
+        'Mto': values.get('M_{takeoff}', .9556), 'ac': values.get('\\alpha_c', .19036),
+        'ruc': values.get('r_{uc}', .01), 'hold4a': values.get('hold_{4a}', 1 + .5*(1.313-1)*.1025**2),
+        'M4a': values.get('M_{4a}', .1025),
+        'pid': values.get('\\pi_{d}', .98), 'pifn': values.get('\\pi_{fn}', .98),
+        'pib': values.get('\\pi_{b}', .94), 'pitn': values.get('\\pi_{tn}', .98),
+        'etaHP': values.get('\\eta_{HPshaft}', .97), 'etaLP': values.get('\\eta_{LPshaft}', .97),
+        'Tref': values.get('T_{ref}', TREF), 'Pref': values.get('P_{ref}', PREF),
+        'Gf': values.get('G_f', 1.),
+        }
+
+def flight_conditions(values, N):
+    """
+    returns the length N arrays of the flight condition and face Mach number
+    variables, deriving the ones values leaves free from the others
+    """
+    v = lambda name, default: _fill(values, name, default, N)
+    Tatm = v('T_{atm}', 218.)
+    M0 = v('M', ((v('c1', 1.1283) - 1)/.2005)**.5)
+    hold2 = v('hold_{2}', 1 + .5*(1.398-1)*v('M_2', .6)**2)
+    hold25 = v('hold_{2.5}', 1 + .5*(1.354-1)*v('M_{2.5}', .6)**2)
+    a = (1.4*values.get('R', 287.)*Tatm)**.5
+    return {'T_{atm}': Tatm, 'P_{atm}': v('P_{atm}', 23.84), 'M': M0, 'a': a, 'V': M0*a,
+            'c1': v('c1', 1 + .5*.401*M0**2),
+            'hold_{2}': hold2, 'M_2': v('M_2', ((hold2 - 1)/(.5*(1.398-1)))**.5),
+            'hold_{2.5}': hold25, 'M_{2.5}': v('M_{2.5}', ((hold25 - 1)/(.5*(1.354-1)))**.5)}
+
+def march(cal, c, fc, pif, pilc, pihc, alpha, Tt41, mcore):
+    """
+    marches through the TASOPT cycle relations encoded in Engine from the free
+    stream to the nozzles, returning every station quantity by variable name
+    ________
+    INPUTS
+    cal = EngineCalibration
+    c = constants, see cycle_constants
+    fc = flight conditions, see flight_conditions
+    pif, pilc, pihc, alpha, Tt41, mcore = arrays of the fan, LPC and HPC pressure
+    ratios, by pass ratio, turbine inlet temperature [K] and core mass flow [kg/s]
+    """
+    R = c['R']
+    Tatm, Patm, V = fc['T_{atm}'], fc['P_{atm}'], fc['V']
+
+    #------------------------diffuser and compressors---------------------
+    Tt2 = Tatm*fc['c1']
+    Pt0 = Patm*fc['c1']**3.5
+    Pt2 = c['pid']*Pt0
+    Pt21 = pif*Pt2
+    Tt21 = Tt2*pif**cal.fexp1
+    Pt7 = c['pifn']*Pt21
+    Pt25 = pilc*pif*Pt2
+    Tt25 = Tt2*(pif*pilc)**cal.lpcexp1
+    Pt3 = pihc*Pt25
+    Tt3 = Tt25*pihc**cal.hpcexp1
+    ht2, ht21, ht25, ht3 = c['Cpair']*Tt2, c['Cpair']*Tt21, c['Cp1']*Tt25, c['Cp2']*Tt3
+
+    #-----------------------combustor and cooling mixing--------------------
+    ac = c['ac']
+    ht41 = c['Cpc']*Tt41
+    f = .02
+    #the fuel fraction and burner exit temperature depend weakly on each other
+    for i in range(5):
+        Tt4 = (ht41*(1 + f) - ac*ht3)/((1 - ac + f)*c['Cpc'])
+        f = (1 - ac)*(c['Cpc']*Tt4 - ht3)/(c['etaB']*c['hf'] - c['Cpfuel']*(Tt4 - c['Ttf']))
+    fp1 = 1 + f
+    Pt4 = c['pib']*Pt3
+    P4a = Pt4*c['hold4a']**cal.ccexp2
+    u4a = c['M4a']*(1.313*R*Tt4)**.5/c['hold4a']
+    uc = c['ruc']*u4a
+    u41 = (u4a*ac*uc/fp1)**.5
+    T41 = Tt41 - .5*u41**2/c['Cpc']
+    Pt41 = P4a*(Tt41/T41)**cal.ccexp1
+
+    #-----------------------turbines from the shaft power balances----------------
+    ht45 = ht41 - (ht3 - ht25)/(c['Mto']*c['etaHP']*fp1)
+    Tt45 = ht45/c['Cpt1']
+    pihpt = (Tt45/Tt41)**cal.hptexp1
+    Pt45 = pihpt*Pt41
+    ht49 = ht45 - ((ht25 - ht2) + (1 + alpha)*(ht21 - ht2))/(c['Mto']*c['etaLP']*fp1)
+    Tt49 = np.maximum(ht49/c['Cpt2'], 1.)
+    pilpt = (Tt49/Tt45)**cal.lptexp1
+    Pt49 = pilpt*Pt45
+    Pt5 = c['pitn']*Pt49
+
+    #------------------------exhausts and thrust-----------------------
+    T8 = Tt21*np.minimum(Patm/Pt7, 1.)**cal.fanexexp
+    u8 = np.maximum(2*c['Cpfex']*(Tt21 - T8), 1.)**.5
+    T6 = Tt49*np.minimum(Patm/Pt5, 1.)**cal.turbexexp
+    u6 = np.maximum(2*c['Cptex']*(Tt49 - T6), 1.)**.5
+    mfan = alpha*mcore
+    F6 = c['Mto']*mcore*fp1*(u6 - V)
+    F8 = mfan*(u8 - V)
+    F = F6 + F8
+    Fsp = F/((1 + alpha)*mcore*fc['a'])
+    Isp = F/(mcore*f*c['g'])
+
+    #------------------------nozzles, choked when the pressure ratio allows it--------------
+    P7 = np.maximum(Patm, Pt7*1.2**-3.5)
+    T7 = Tt21*(P7/Pt7)**(1/3.5)
+    M7 = np.maximum((Tt21/T7 - 1)/.2, 1e-4)**.5
+    a7 = (1.4*R*T7)**.5
+    P5 = np.maximum(Patm, Pt5*1.2**-3.583979)
+    T5 = Tt49*(P5/Pt5)**(1/3.583979)
+    M5 = np.maximum((Tt49/T5 - 1)/.2, 1e-4)**.5
+    a5 = (1.387*R*T5)**.5
+
+    #--------------------corrected flows and map speeds----------------
+    mf = mfan*(Tt2/c['Tref'])**.5/(Pt2/c['Pref'])
+    mlc = mcore*(Tt2/c['Tref'])**.5/(Pt2/c['Pref'])
+    mhc = mcore*(Tt25/c['Tref'])**.5/(Pt25/c['Pref'])
+
+    return {'P_{t_0}': Pt0, 'T_{t_0}': Tt2, 'h_{t_0}': ht2,
+            'P_{t_{1.8}}': Pt2, 'T_{t_{1.8}}': Tt2, 'h_{t_{1.8}}': ht2,
+            'P_{t_2}': Pt2, 'T_{t_2}': Tt2, 'h_{t_2}': ht2,
+            'P_{t_2.1}': Pt21, 'T_{t_2.1}': Tt21, 'h_{t_2.1}': ht21,
+            'P_{t_7}': Pt7, 'T_{t_7}': Tt21, 'h_{t_7}': ht21,
+            'P_{t_{2.5}}': Pt25, 'T_{t_{2.5}}': Tt25, 'h_{t_{2.5}}': ht25,
+            'P_{t_3}': Pt3, 'T_{t_3}': Tt3, 'h_{t_3}': ht3,
+            '\\pi_f': pif, '\\pi_{lc}': pilc, '\\pi_{hc}': pihc,
+            'P_{t_4}': Pt4, 'T_{t_4}': Tt4, 'h_{t_4}': c['Cpc']*Tt4,
+            'P_{t_{4.1}}': Pt41, 'T_{t_{4.1}}': Tt41, 'h_{t_{4.1}}': ht41,
+            'u_{4.1}': u41, 'T_{4.1}': T41, 'u_{4a}': u4a, 'M_{4a}': c['M4a'], 'P_{4a}': P4a,
+            'u_c': uc, 'f': f, 'fp1': fp1,
+            'h_{t_{4.5}}': ht45, 'P_{t_{4.5}}': Pt45, 'T_{t_{4.5}}': Tt45,
+            'P_{t_{4.9}}': Pt49, 'T_{t_{4.9}}': Tt49, 'h_{t_{4.9}}': ht49,
+            '\\pi_{HPT}': pihpt, '\\pi_{LPT}': pilpt,
+            'P_{t_5}': Pt5, 'T_{t_5}': Tt49, 'h_{t_5}': ht49,
+            'P_8': Patm, 'P_{t_8}': Pt7, 'h_{t_8}': c['Cpfex']*Tt21, 'h_8': c['Cpfex']*T8,
+            'T_{t_8}': Tt21, 'T_{8}': T8,
+            'P_6': Patm, 'P_{t_6}': Pt5, 'T_{t_6}': Tt49, 'T_{6}': T6,
+            'h_{t_6}': c['Cptex']*Tt49, 'h_6': c['Cptex']*T6,
+            'u_6': u6, 'u_8': u8, 'F_6': F6, 'F_8': F8, 'F': F, 'F_{sp}': Fsp,
+            'I_{sp}': Isp, 'TSFC': 3600./Isp,
+            'm_{core}': mcore, 'm_{fan}': mfan, 'm_{total}': (1 + alpha)*mcore,
+            '\\alpha': alpha, 'alphap1': 1 + alpha, 'hold': 1 + alpha,
+            'P_{7}': P7, 'T_{7}': T7, 'M_7': M7, 'a_7': a7, 'u_7': M7*a7, '\\rho_7': P7*1e3/(R*T7),
+            'P_{5}': P5, 'T_{5}': T5, 'M_5': M5, 'a_5': a5, 'u_5': M5*a5, '\\rho_5': P5*1e3/(R*T5),
+            'm_{f}': mf, 'm_{lc}': mlc, 'm_{hc}': mhc}
+
+def face_flows(c, fc, st):
+    """
+    returns the (fan, core) mass flows [kg/s] passing a unit area fan face and
+    HPC face at the face Mach numbers of fc, with st the marched stations
+    """
+    R = c['R']
+    T2 = st['T_{t_2}']/fc['hold_{2}']
+    P2 = st['P_{t_2}']*fc['hold_{2}']**-3.512
+    u2 = fc['M_2']*(c['Cp1']*R*T2/781)**.5
+    T25 = st['T_{t_{2.5}}']/fc['hold_{2.5}']
+    P25 = st['P_{t_{2.5}}']*fc['hold_{2.5}']**-3.824857
+    u25 = fc['M_{2.5}']*(c['Cp2']*R*T25/781)**.5
+    return P2*1e3/(R*T2)*u2, P25*1e3/(R*T25)*u25
+
+def initial_guess(model, values):
+    """
+    returns the initial guess of every free variable of model named in
+    values = {name: scalar or array over the segments}, in the units of each variable
+    """
+    x0 = {}
+    factors = {}
+    for key in model.varkeys:
+        if key in model.substitutions or key.name not in values:
+            continue
+        value = values[key.name]
+        if np.ndim(value) > 0:
+            if not key.idx:
+                continue
+            value = value[key.idx[0]]
+        if not np.isfinite(value) or value <= 0:
+            continue
+        if key.units and key.name not in factors:
+            prefix = VARUNITS.get(key.name, key.name.split('_')[0].strip('\\'))
+            unit = UNITS.get(prefix)
+            factors[key.name] = 1./key.units.to(unit).magnitude if unit else 1.
+        x0[key] = float(value*factors.get(key.name, 1.))
+    return x0
+
+class CycleEstimate(object):
+    """
+    Estimate of every station of the engine cycle at each flight segment, found
+    by marching through the TASOPT relations with the pressure ratios set to
+    their design values. The design segment is sized for its thrust, the others
+    take their mass flows from the resulting fan and HPC face areas and find the
+    turbine inlet temperature that meets their thrust.
+    ________
+    INPUTS
+    calibration = EngineCalibration of the engine
+    values = {name: value} of the substituted and fixed variables, see conditions
+    N = number of flight segments
+    Tt41 = turbine inlet temperature guess [K] used where none is specified
+    """
+    def __init__(self, calibration, values, N, Tt41 = 1400.):
+        self.calibration = calibration
+        self.N = N
+        cal = calibration
+        v = lambda name, default: _fill(values, name, default, N)
+        c = cycle_constants(values)
+        fc = flight_conditions(values, N)
+
+        #design pressure ratios and by pass ratio
+        pifD = values.get('\\pi_{f_D}', 1.685)
+        pilcD = values.get('\\pi_{lc_D}', 1.935)
+        pihcD = values.get('\\pi_{hc_D}', 9.369)
+        alphamax = values.get('\\alpha_{max}', np.inf)
+        alpha = v('\\alpha', values.get('\\alpha_{OD}', min(alphamax, 5.)))
+        pif, pilc, pihc = v('\\pi_f', pifD), v('\\pi_{lc}', pilcD), v('\\pi_{hc}', pihcD)
+        Tt41spec = v('T_{t_{4spec}}', v('T_{t_{4.1}}', np.nan))
+        Tt41 = np.where(np.isnan(Tt41spec), Tt41, Tt41spec)
+        Fspec = v('F_{spec}', np.nan)
+
+        #size every segment for its own thrust, the largest corrected core flow sets the design
+        st = march(cal, c, fc, pif, pilc, pihc, alpha, Tt41, np.ones(N))
+        mcore = np.where(np.isnan(Fspec), values.get('m_{coreD}', 50.), Fspec/st['F'])
+        st = march(cal, c, fc, pif, pilc, pihc, alpha, Tt41, mcore)
+        self.design = design = int(np.argmax(st['m_{lc}']))
+        fanflux, coreflux = face_flows(c, fc, st)
+        A2 = (st['m_{fan}']/fanflux)[design]
+        A25 = (mcore/coreflux)[design]
+
+        #the face areas fix the other segments' mass flows, bisect on Tt41 for their thrust
+        mcore = A25*coreflux
+        alpha = np.minimum(A2*fanflux/mcore, alphamax)
+        if not np.all(np.isnan(Fspec)):
+            low, high = 800.*np.ones(N), 2400.*np.ones(N)
+            for i in range(30):
+                mid = .5*(low + high)
+                F = march(cal, c, fc, pif, pilc, pihc, alpha, mid, mcore)['F']
+                low, high = np.where(F < Fspec, mid, low), np.where(F < Fspec, high, mid)
+            Tt41 = np.where(np.isnan(Fspec) | ~np.isnan(Tt41spec), Tt41, .5*(low + high))
+        st = march(cal, c, fc, pif, pilc, pihc, alpha, Tt41, mcore)
+
+        #--------------------maps and design point----------------
+        est = dict(fc)
+        est.update(st)
+        mf, mlc, mhc = st['m_{f}'], st['m_{lc}'], st['m_{hc}']
+        fp1, Mto = st['fp1'], c['Mto']
+        Pt2, Tt2, Pt25, Tt25 = st['P_{t_2}'], st['T_{t_2}'], st['P_{t_{2.5}}'], st['T_{t_{2.5}}']
+        Pt41, Tt41, Pt45, Tt45 = st['P_{t_{4.1}}'], st['T_{t_{4.1}}'], st['P_{t_{4.5}}'], st['T_{t_{4.5}}']
+        mhtD = fp1*mhc*Mto*(Pt25/Pt41)*(Tt41/Tt25)**.5
+        mltD = fp1*mlc*Mto*(Pt2/Pt45)*(Tt45/Tt2)**.5
+        est.update({'m_{tild_f}': mf/mf[design], 'm_{tild_lc}': mlc/mlc[design],
+                    'm_{tild_hc}': mhc/mhc[design],
+                    'N_f': ((pif*1.7/pifD)**.1/1.05)**(1/.0871),
+                    'N_1': ((pilc*26/pilcD)**.1/1.38)**(1/.566),
+                    'N_2': ((pihc*26/pihcD)**.1/1.35)**(1/.566),
+                    'F_{spec}': Fspec, 'T_{t_{4.1_{max}}}': np.max(Tt41)})
+
+        #------------------------fan and HPC faces----------------------
+        R = c['R']
+        T2 = Tt2/fc['hold_{2}']
+        P2 = Pt2*fc['hold_{2}']**-3.512
+        T25 = Tt25/fc['hold_{2.5}']
+        P25 = Pt25*fc['hold_{2.5}']**-3.824857
+        est.update({'T_2': T2, 'P_2': P2, 'u_2': fc['M_2']*(c['Cp1']*R*T2/781)**.5,
+                    '\\rho_2': P2*1e3/(R*T2), 'h_{2}': c['Cp1']*T2,
+                    'T_{2.5}': T25, 'P_{2.5}': P25, 'u_{2.5}': fc['M_{2.5}']*(c['Cp2']*R*T25/781)**.5,
+                    '\\rho_2.5': P25*1e3/(R*T25), 'h_{2.5}': c['Cp2']*T25})
+
+        #---------------------------sizing, scalars-------------------------
+        A5 = (Mto*mcore*fp1/(st['\\rho_5']*st['u_5']))[design]
+        A7 = (st['m_{fan}']/(st['\\rho_7']*st['u_7']))[design]
+        W = np.max(.220462*mcore*(1684.5 + 17.7*pif*pilc*pihc/30 + 1662.2*(alpha/5)**1.2))
+        est.update({'m_{htD}': mhtD[design], 'm_{ltD}': mltD[design],
+                    'm_{lc_D}': mlc[design], 'm_{hc_D}': mhc[design], '\\bar{m}_{fan_{D}}': mf[design],
+                    'm_{coreD}': mcore[design], '\\alpha_{OD}': alpha[design],
+                    'A_2': A2, 'A_{2.5}': A25, 'A_5': A5, 'A_7': A7, 'W_{engine}': W,
+                    'd_{f}': (4*A2/(np.pi*values.get('HTR_{f_SUB}', .91)))**.5,
+                    'd_{LPC}': (4*A25/(np.pi*values.get('HTR_{lpc_SUB}', .64)))**.5})
+
+        self.estimate = est
+        self.stations = {'4.1': (Tt41[design], Pt41[design]), '4.5': (Tt45[design], Pt45[design]),
+                         '2': (Tt2[design], Pt2[design]), '2.5': (Tt25[design], Pt25[design])}
+
+    def x0(self, model):
+        """
+        returns the initial guess of every free variable of model that has an
+        estimate, in the units of each variable
+        """
+        return initial_guess(model, self.estimate)
+
+    def bounds(self, margin = .3):
+        """
+        suggested (lower, upper) bounds [kg/s] on the design corrected mass flows
+        """
+        return dict((name, ((1 - margin)*self.estimate[name], (1 + margin)*self.estimate[name]))
+                    for name in ['m_{htD}', 'm_{ltD}', 'm_{lc_D}', 'm_{hc_D}'])
+
+    def ondesign_substitutions(self):
+        """
+        substitutions setting the on design mass flow estimate ratios of the engine
+        to the estimated design stations in place of the preset station values
+        """
+        return {
+            'C_{m_{htD}}': mass_flow_coefficient(self.stations['4.1']),
+            'C_{m_{ltD}}': mass_flow_coefficient(self.stations['4.5']),
+            'C_{m_{lc_D}}': mass_flow_coefficient(self.stations['2']),
+            'C_{m_{hc_D}}': mass_flow_coefficient(self.stations['2.5']),
+            }
+
+def estimate(engine, model, N, Tt41 = 1400.):
+    """
+    returns the cycle estimate of engine from the substitutions and flight
+    conditions of model, which has N flight segments
+    """
+    return CycleEstimate(engine.calibration, conditions(model, N), N, Tt41)
+
+def iteration_counts(engs = range(4)):
+    """
+    solves the validation engines without and with the estimated x0 and
+    returns {eng: (GP solves without, GP solves with)}
+    """
+    counts = {}
+    for eng in engs:
+        N = 3 if eng == 1 else 2
+        engine, m = engine_validation.validation_model(eng)
+        m.localsolve(verbosity = 0)
+        before = len(m.program.gps)
+        engine, m = engine_validation.validation_model(eng)
+        m.localsolve(verbosity = 0, x0 = estimate(engine, m, N).x0(m))
+        counts[eng] = (before, len(m.program.gps))
+        print("engine %i: %i GP solves without estimate, %i with" % (eng, counts[eng][0], counts[eng][1]))
+    return counts
+
+def test():
+    """
+    estimates each validation engine and checks the initial guess covers the
+    free station variables with finite, positive values
+    """
+    for eng in range(4):
+        N = 3 if eng == 1 else 2
+        engine, m = engine_validation.validation_model(eng)
+        cycle = estimate(engine, m, N)
+        x0 = cycle.x0(m)
+        for name in ['P_{t_3}', 'T_{t_{4.5}}', 'm_{core}', 'A_5', 'W_{engine}', 'TSFC']:
+            keys = [key for key in x0 if key.name == name]
+            assert keys and all(np.isfinite(x0[key]) and x0[key] > 0 for key in keys)
+        for name, (low, high) in cycle.bounds().items():
+            assert 0 < low < cycle.estimate[name] < high
+
+if __name__ == "__main__":
+    iteration_counts()
@@ -0,0 +1,205 @@
+"""Engine cycle tables, the station states and mass flows of solved engines as NumPy record arrays"""
+import json
+import numpy as np
+from time import time
+from gpkit.keydict import KeyDict
+from gpkit.small_scripts import mag
+from gpkit.solution_array import SolutionArray
+from engine_validation import QUANTITIES, STATIONS
+from cycle_estimate import estimate
+import engine_validation
+
+#stations of the table in the order of STATIONS, the split ones once
+NAMES = []
+for _station, _, _, _ in STATIONS:
+    if _station not in NAMES:
+        NAMES.append(_station)
+
+#fields of a station record, the quantities of QUANTITIES and the mass flow
+STATION_FIELDS = ['Pt', 'Tt', 'ht', 'P', 'T', 'h', 'u', 'M', 'rho', 'a', 'm']
+STATION_UNITS = dict([(q, QUANTITIES[q][0]) for q in STATION_FIELDS[:-1]] + [('m', 'kg/s')])
+
+#flow through each station, 'total' = m_{total}, 'fan' = m_{fan}, 'core' =
+#m_{core}, 'burner' = M_{takeoff}*m_{core}*(1 - alpha_c + f), the core flow
+#less the offtakes and the cooling flow plus the fuel, 'turbine' =
+#M_{takeoff}*m_{core}*fp1 once the cooling flow is mixed back in
+FLOWS = {
+    '0': 'total', '1.8': 'total', '2': 'total',
+    '2.1': 'fan', '7': 'fan', '8': 'fan',
+    '2.5': 'core', '3': 'core',
+    '4': 'burner', '4a': 'burner',
+    '4.1': 'turbine', '4.5': 'turbine', '4.9': 'turbine', '5': 'turbine', '6': 'turbine',
+    }
+
+#fields of a segment record, the performance variables of the engine
+SEGMENT_FIELDS = ['F', 'F_6', 'F_8', 'TSFC', 'm_{total}', 'm_{core}', 'm_{fan}', 'f', '\\alpha']
+
+class EngineCycleTable(object):
+    """
+    Station states and mass flows of an engine over the points of a sweep and
+    the flight segments of each, in the units of QUANTITIES, the quantities a
+    station has no variable for are nan
+    ________
+    INPUTS
+    stations = record array [point, segment, station] of STATION_FIELDS
+    segments = record array [point, segment] of SEGMENT_FIELDS
+    names = stations of the last axis of stations, NAMES by default
+
+    OUTPUTS
+    self.station(name) = record array [point, segment] of one station
+    """
+    def __init__(self, stations, segments, names = None):
+        self.stations = stations
+        self.segments = segments
+        self.names = list(names or NAMES)
+
+    def station(self, name):
+        """
+        returns the records [point, segment] of station name
+        """
+        return self.stations[:, :, self.names.index(name)]
+
+    @classmethod
+    def from_solution(cls, sol, engine):
+        """
+        reads the table of engine from sol, a single solve or a sweep, the
+        segments are the engine's performance vectorization flattened, every
+        variable is read once as an array by its handle, so the cost does not
+        grow with the points of the sweep beyond copying their values
+        """
+        values = sol['variables']
+        npoints = np.size(mag(sol['cost']))
+        nsegments = int(np.prod(engine.engineP.v['F'].shape or (1,)))
+
+        def read(variable):
+            """
+            the values of variable as an array [point, segment], constants
+            and fixed variables broadcast over the axes they do not vary on
+            """
+            value = np.asarray(mag(values[variable]), dtype = float)
+            if value.size == npoints*nsegments:
+                return value.reshape(npoints, nsegments)
+            return value.reshape(-1, 1)
+
+        stations = np.full((npoints, nsegments, len(NAMES)), np.nan,
+                           dtype = [(field, float) for field in STATION_FIELDS])
+        for i, name in enumerate(NAMES):
+            for quantity, variable in engine.engineP.stations[name].__dict__.items():
+                if quantity in STATION_UNITS:
+                    stations[quantity][:, :, i] = read(variable)
+
+        segments = np.empty((npoints, nsegments), dtype = [(field, float) for field in SEGMENT_FIELDS])
+        for field in SEGMENT_FIELDS:
+            segments[field] = read(engine.engineP.v[field])
+
+        mcore = segments['m_{core}']*read(engine.constants.v['M_{takeoff}'])
+        flows = {
+            'total': segments['m_{total}'],
+            'fan': segments['m_{fan}'],
+            'core': segments['m_{core}'],
+            'burner': mcore*(1 - read(engine.combustor.v['\\alpha_c']) + segments['f']),
+            'turbine': mcore*read(engine.engineP.v['fp1']),
+            }
+        for i, name in enumerate(NAMES):
+            stations['m'][:, :, i] = flows[FLOWS[name]]
+        return cls(stations, segments)
+
+    def save(self, path):
+        """
+        writes the table to path.npy, the station records, path.segments.npy,
+        the segment records, and path.json, its header
+        """
+        np.save(path + '.npy', self.stations)
+        np.save(path + '.segments.npy', self.segments)
+        with open(path + '.json', 'w') as f:
+            json.dump({'names': self.names, 'units': STATION_UNITS,
+                       'shape': list(self.stations.shape)}, f, indent = 1)
+
+    @classmethod
+    def load(cls, path):
+        """
+        reads a table written by save, the records are memory mapped
+        """
+        with open(path + '.json') as f:
+            header = json.load(f)
+        stations = np.load(path + '.npy', mmap_mode = 'r')
+        if list(stations.shape) != header['shape']:
+            raise ValueError("cycle table %s.npy does not match its header" % path)
+        return cls(stations, np.load(path + '.segments.npy', mmap_mode = 'r'), header['names'])
+
+def _repeated(sol, npoints):
+    """
+    returns a sweep like SolutionArray of npoints copies of the single
+    solution sol, with its units
+    """
+    sweep = SolutionArray()
+    sweep['cost'] = np.repeat(mag(sol['cost']), npoints)
+    sweep['variables'] = KeyDict((vk, np.array([mag(value)]*npoints)*getattr(value, 'units', 1))
+                                 for vk, value in sol['variables'].items())
+    return sweep
+
+def test():
+    """
+    tables the CFM56 validation model and checks the table against the
+    solution, a sweep of copies of it and the copy written to disk
+    """
+    import os
+    import tempfile
+    engine, m = engine_validation.validation_model(0)
+    sol = m.localsolve(verbosity = 0, x0 = estimate(engine, m, 2).x0(m))
+    table = EngineCycleTable.from_solution(sol, engine)
+    assert table.stations.shape == (1, 2, len(NAMES))
+    assert np.allclose(table.station('4.1')['Tt'][0], mag(sol(engine['T_{t_{4.1}}'])))
+    assert np.allclose(table.station('8')['u'][0], mag(sol(engine['u_8'])))
+    assert np.allclose(table.segments['TSFC'][0], mag(sol(engine['TSFC'])))
+    assert np.isnan(table.station('0')['u']).all()
+    #the fan and core flows fit in the total, fuel is added in the burner
+    flow = table.stations['m'][0]
+    assert np.all(flow[:, NAMES.index('7')] + flow[:, NAMES.index('3')] <= flow[:, NAMES.index('2')]*(1 + 1e-6))
+    assert np.all(flow[:, NAMES.index('4.1')] > flow[:, NAMES.index('4')])
+
+    sweep = EngineCycleTable.from_solution(_repeated(sol, 3), engine)
+    assert sweep.stations.shape == (3, 2, len(NAMES))
+    assert np.allclose(sweep.station('4.5')['Pt'][2], table.station('4.5')['Pt'][0])
+
+    path = os.path.join(tempfile.mkdtemp(), 'cfm56')
+    table.save(path)
+    loaded = EngineCycleTable.load(path)
+    assert loaded.names == table.names
+    assert np.allclose(loaded.stations['Tt'], table.stations['Tt'], equal_nan = True)
+    assert np.array_equal(loaded.segments['F'], table.segments['F'])
+
+def benchmark(npoints = 1000):
+    """
+    times reading the thrusts, TSFCs and largest mass flows the range sweep
+    plots of a sweep of npoints copies of the CFM56 validation solution, by
+    indexing the solution point by point as the sweep scripts did and by the
+    table, which reads every station besides
+    """
+    engine, m = engine_validation.validation_model(0)
+    sweep = _repeated(m.localsolve(verbosity = 0, x0 = estimate(engine, m, 2).x0(m)), npoints)
+
+    tic = time()
+    f, f6, f8, tsfc, cruisetsfc, maxm = [], [], [], [], [], []
+    i = 0
+    while i < len(sweep('F')):
+        f.append(mag(sweep('F')[i][0]))
+        f6.append(mag(sweep('F_6')[i][0]))
+        f8.append(mag(sweep('F_8')[i][0]))
+        tsfc.append(mag(sweep('TSFC')[i][0]))
+        cruisetsfc.append(mag(sweep('TSFC')[i][1]))
+        maxm.append(max(mag(sweep('m_{total}')[i])))
+        i += 1
+    loop = time() - tic
+
+    tic = time()
+    table = EngineCycleTable.from_solution(sweep, engine)
+    segments = table.segments
+    f, f6, f8 = segments['F'][:, 0], segments['F_6'][:, 0], segments['F_8'][:, 0]
+    tsfc, cruisetsfc = segments['TSFC'][:, 0], segments['TSFC'][:, 1]
+    maxm = segments['m_{total}'].max(axis = 1)
+    print("%i points: indexing %.3g s, table of %i stations %.3g s"
+          % (npoints, loop, len(NAMES), time() - tic))
+
+if __name__ == "__main__":
+    benchmark()
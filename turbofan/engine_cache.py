@@ -0,0 +1,149 @@
+"""Cache of built and compiled engine models for substitution-only re-solves"""
+from time import time
+from gpkit.nomials import parse_subs
+from gpkit.solution_array import SolutionArray
+from engine_validation import validation_model
+from engine_presets import get_preset, preset_substitutions
+
+def signature(res7, cooling, N, eng, Nfleet=0, BLI=False):
+    """
+    structural signature of an Engine, two engines with the same signature
+    share the same constraint structure and differ only in substitutions
+    """
+    return (res7, cooling, N, Nfleet, eng, BLI)
+
+class CompiledEngine(object):
+    """
+    A built engine model along with its compiled signomial program
+    ________
+    INPUTS
+    engine = the Engine model
+    model = the Model wrapping the engine, its mission and its objective
+    """
+    def __init__(self, engine, model):
+        self.engine = engine
+        self.model = model
+        #compile the signomial program once, it holds the flattened constraints
+        self.program = model.sp(verbosity=0)
+        #last converged point, used to warm start the next solve
+        self.x0 = None
+
+    def substitute(self, substitutions):
+        """
+        swaps the values of substituted constants in the compiled program
+        """
+        self.model.substitutions.update(substitutions)
+        constants, sweep, linkedsweep = parse_subs(self.model.varkeys, substitutions)
+        if sweep or linkedsweep:
+            raise ValueError("sweeps are not supported by a compiled engine,"
+                             " solve each point with its own substitutions")
+        self.program.substitutions.update(constants)
+        #the first GP of the next solve is regenerated with the new constants
+        self.program.lastgp = None
+
+    def solve(self, substitutions=None, verbosity=0, warmstart=True, **kwargs):
+        """
+        re-solves the compiled program for new substitutions
+        """
+        if substitutions:
+            self.substitute(substitutions)
+        x0 = self.x0 if warmstart else None
+        result = self.program.localsolve(verbosity=verbosity, x0=x0, **kwargs)
+        self.x0 = result["freevariables"]
+
+        #package the result the same way Model.localsolve does
+        solution = SolutionArray()
+        solution.append(result)
+        solution.program = self.program
+        solution.to_united_array(unitless_keys=["sensitivities"], united=True)
+        if self.model.cost.units:
+            solution["cost"] = solution["cost"] * self.model.cost.units
+        self.model.program = self.program
+        self.model.solution = solution
+        return solution
+
+class EngineCache(object):
+    """
+    Holds compiled engine models keyed on their structural signature plus an
+    optional tag naming the model that wraps the engine
+    """
+    def __init__(self):
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, build):
+        """
+        returns the compiled engine for key, calling build() to make the
+        (engine, model) pair on a miss
+        """
+        if key in self.entries:
+            self.hits += 1
+        else:
+            self.misses += 1
+            engine, model = build()
+            self.entries[key] = CompiledEngine(engine, model)
+        return self.entries[key]
+
+    def solve(self, key, build, substitutions=None, **kwargs):
+        """
+        solves the cached model for key with new substitutions
+        """
+        return self.get(key, build).solve(substitutions, **kwargs)
+
+    def clear(self):
+        """
+        drops every cached model
+        """
+        self.entries.clear()
+
+def solve_preset(compiled, eng, substitutions=None, **kwargs):
+    """
+    re-solves a compiled engine with the on design estimates of preset eng,
+    only presets sharing the compiled engine's calibration exponents can be
+    swapped in by substitution
+    """
+    if get_preset(eng).calibration != compiled.engine.calibration:
+        raise ValueError("preset %s has different calibration exponents than"
+                         " the compiled engine, build a new model for it" % eng)
+    presetsubs = preset_substitutions(eng)
+    if substitutions:
+        presetsubs.update(substitutions)
+    return compiled.solve(presetsubs, **kwargs)
+
+#cache shared by the validation helpers
+CACHE = EngineCache()
+
+def validation_engine(eng):
+    """
+    returns the cached compiled validation model for engine eng
+    """
+    N = 3 if eng == 1 else 2
+    return CACHE.get(signature(0, True, N, eng) + ('validation',),
+                     lambda: validation_model(eng))
+
+def benchmark(eng=0, values=(1.6, 1.65, 1.685, 1.72, 1.75), var='\pi_{f_D}'):
+    """
+    compares rebuilding the validation model for each value of var against
+    re-solving the cached compiled model, returns the two total times
+    """
+    #current path, build, compile and solve from scratch every time
+    tic = time()
+    for value in values:
+        engine, m = validation_model(eng)
+        m.substitutions.update({var: value})
+        m.localsolve(verbosity=0)
+    rebuild = time() - tic
+
+    #cached path, build and compile once then swap the substitution
+    tic = time()
+    for value in values:
+        validation_engine(eng).solve({var: value})
+    cached = time() - tic
+
+    print("rebuild: %.3g s, cached: %.3g s, speedup: %.3gx over %i cases"
+          % (rebuild, cached, rebuild/cached, len(values)))
+    return rebuild, cached
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,208 @@
+"""Engine decks, tables of an engine's off design performance over a flight envelope"""
+import os
+import json
+import numpy as np
+from time import time
+from multiprocessing import Pool
+from gpkit.small_scripts import mag
+from cycle_estimate import estimate
+from offdesign import atmosphere, offdesign, engine_design
+import engine_validation
+
+#quantities stored in a deck, the mass flows are in kg/s, f is the fuel air
+#ratio and the temperatures are in K
+QUANTITIES = ['TSFC', 'F', 'm_{total}', 'm_{fan}', 'm_{core}', 'f', '\\alpha',
+              'T_{t_2}', 'T_{t_{2.5}}', 'T_{t_3}', 'T_{t_{4.1}}', 'T_{t_{4.5}}', 'T_{t_5}']
+
+#names of the deck axes, the last one holds either the thrust or Tt4.1
+AXES = ['M', 'h', 'spec']
+
+def _deck_slice(args):
+    """
+    solves the altitude by spec plane of a deck at one Mach number, module level
+    so the worker processes can unpickle it
+    """
+    design, M, h, spec, res7, quantities = args
+    hh, ss = [a.ravel() for a in np.meshgrid(h, spec, indexing = 'ij')]
+    Tatm, Patm = atmosphere(hh)
+    kwargs = {'Tt41spec': ss} if res7 else {'Fspec': ss}
+    res = offdesign(design, M*np.ones(len(hh)), Tatm, Patm, outputs = quantities + ['converged', 'in map'], **kwargs)
+    #points that did not converge hold nan, the map flags are kept as 0 or 1
+    planes = [np.where(res['converged'], res[name], np.nan) for name in quantities]
+    planes.append(res['in map'].astype(float))
+    return np.array([plane.reshape(len(h), len(spec)) for plane in planes])
+
+def build_deck(design, M, h, spec, res7 = 0, quantities = QUANTITIES, processes = None):
+    """
+    sweeps design over the grid M x h x spec, one worker process per Mach
+    number at most
+    ________
+    INPUTS
+    design = EngineDesign to tabulate
+    M, h [m] = Mach number and altitude grid lines, increasing
+    spec = thrust [N] grid lines, or turbine inlet temperature [K] with res7 = 1
+    processes = number of worker processes, all cores by default, 1 to build in
+    this process
+
+    OUTPUTS
+    (table, header), table has the shape (quantities + 1, M, h, spec), its
+    last row is 'in map', 1 where the point lies inside the maps and 0 outside
+    """
+    M, h, spec = [np.asarray(a, dtype = float) for a in [M, h, spec]]
+    tasks = [(design, Mi, h, spec, res7, list(quantities)) for Mi in M]
+    if processes == 1:
+        planes = map(_deck_slice, tasks)
+    else:
+        pool = Pool(processes)
+        try:
+            planes = pool.map(_deck_slice, tasks)
+        finally:
+            pool.close()
+            pool.join()
+    table = np.ascontiguousarray(np.stack(planes, axis = 1))
+    header = {
+        'quantities': list(quantities) + ['in map'],
+        'axes': AXES,
+        'grid': [M.tolist(), h.tolist(), spec.tolist()],
+        'spec': 'T_{t_{4.1}}' if res7 else 'F',
+        'shape': list(table.shape),
+        'dtype': str(table.dtype),
+        }
+    return table, header
+
+def write_deck(path, table, header):
+    """
+    writes a deck to path.npy, the table, and path.json, its header
+    """
+    np.save(path + '.npy', table)
+    with open(path + '.json', 'w') as f:
+        json.dump(header, f, indent = 1)
+
+class EngineDeck(object):
+    """
+    Reader of a deck written by write_deck, the table is memory mapped so that
+    opening a deck reads only its header
+    ________
+    INPUTS
+    path = deck path without the .npy and .json extensions
+    """
+    def __init__(self, path):
+        with open(path + '.json') as f:
+            self.header = json.load(f)
+        self.table = np.load(path + '.npy', mmap_mode = 'r')
+        if list(self.table.shape) != self.header['shape']:
+            raise ValueError("deck table %s.npy does not match its header" % path)
+        self.quantities = self.header['quantities']
+        self.grid = [np.asarray(g) for g in self.header['grid']]
+
+    def _locate(self, axis, x):
+        """
+        returns the grid cell index and the fractional position in it of every
+        value of x along axis, values off the grid are clamped to its edges
+        """
+        g = self.grid[axis]
+        x = np.clip(x, g[0], g[-1])
+        i = np.clip(np.searchsorted(g, x, side = 'right') - 1, 0, max(len(g) - 2, 0))
+        if len(g) == 1:
+            return i, np.zeros(np.shape(x))
+        return i, (x - g[i])/(g[i + 1] - g[i])
+
+    def __call__(self, M, h, spec, names = None, method = 'linear'):
+        """
+        interpolates the deck at every point (M, h [m], spec), method is
+        'linear' for multilinear or 'cubic' for Catmull-Rom splines along each
+        axis, returns {name: array}, nan where a neighbouring node is nan
+        """
+        M, h, spec = np.broadcast_arrays(*[np.asarray(a, dtype = float) for a in [M, h, spec]])
+        names = names or self.quantities
+        rows = [self.quantities.index(name) for name in names]
+        located = [self._locate(axis, x.ravel()) for axis, x in enumerate([M, h, spec])]
+        if method == 'linear':
+            offsets = [0, 1]
+            weights = [[1 - t, t] for _, t in located]
+        elif method == 'cubic':
+            offsets = [-1, 0, 1, 2]
+            weights = [[t*((2 - t)*t - 1)/2, (t*t*(3*t - 5) + 2)/2, t*((4 - 3*t)*t + 1)/2, t*t*(t - 1)/2]
+                       for _, t in located]
+        else:
+            raise ValueError("method must be 'linear' or 'cubic', not %s" % method)
+
+        result = np.zeros((len(rows), M.size))
+        for a, wa in zip(offsets, weights[0]):
+            ia = np.clip(located[0][0] + a, 0, len(self.grid[0]) - 1)
+            for b, wb in zip(offsets, weights[1]):
+                ib = np.clip(located[1][0] + b, 0, len(self.grid[1]) - 1)
+                for c, wc in zip(offsets, weights[2]):
+                    ic = np.clip(located[2][0] + c, 0, len(self.grid[2]) - 1)
+                    w = wa*wb*wc
+                    for k, row in enumerate(rows):
+                        #nodes of zero weight must not spread their nan
+                        result[k] += np.where(w == 0, 0, w*self.table[row, ia, ib, ic])
+        return dict((name, result[k].reshape(M.shape)) for k, name in enumerate(names))
+
+def test():
+    """
+    builds a small deck of the CFM56 validation engine in two worker processes,
+    reads it back and checks the interpolation against the off design solver
+    """
+    import tempfile, shutil
+    engine, m = engine_validation.validation_model(0)
+    sol = m.localsolve(verbosity = 0, x0 = estimate(engine, m, 2).x0(m))
+    design = engine_design(engine, sol)
+    Fref = np.min(mag(sol(engine.engineP.thrustP['F'])))
+
+    M = np.linspace(.72, .82, 3)
+    h = np.linspace(9500, 11000, 4)
+    F = Fref*np.linspace(.95, 1.05, 5)
+    table, header = build_deck(design, M, h, F, processes = 2)
+    assert table.shape == (len(QUANTITIES) + 1, 3, 4, 5)
+
+    folder = tempfile.mkdtemp()
+    try:
+        path = os.path.join(folder, 'cfm56')
+        write_deck(path, table, header)
+        deck = EngineDeck(path)
+        assert isinstance(deck.table, np.memmap)
+
+        #the nodes are reproduced exactly by both methods
+        MM, hh, FF = [a.ravel() for a in np.meshgrid(M, h, F, indexing = 'ij')]
+        for method in ['linear', 'cubic']:
+            nodes = deck(MM, hh, FF, ['TSFC'], method)['TSFC']
+            assert np.allclose(nodes, table[0].ravel(), equal_nan = True)
+
+        #off the nodes the interpolation is close to solving the point
+        Mi, hi, Fi = np.array([.75, .8]), np.array([10000., 10700.]), Fref*np.array([.98, 1.02])
+        Tatm, Patm = atmosphere(hi)
+        ref = offdesign(design, Mi, Tatm, Patm, Fspec = Fi)
+        for method in ['linear', 'cubic']:
+            tsfc = deck(Mi, hi, Fi, ['TSFC'], method)['TSFC']
+            assert np.all(np.abs(tsfc/ref['TSFC'] - 1) < 1e-2), (method, tsfc, ref['TSFC'])
+        del deck
+    finally:
+        shutil.rmtree(folder)
+
+def benchmark(npoints = 10**6, path = 'cfm56_deck'):
+    """
+    times opening an existing deck and interpolating it at npoints random points
+    """
+    tic = time()
+    deck = EngineDeck(path)
+    opened = time() - tic
+    rand = np.random.RandomState(0)
+    M = rand.uniform(deck.grid[0][0], deck.grid[0][-1], npoints)
+    h = rand.uniform(deck.grid[1][0], deck.grid[1][-1], npoints)
+    spec = rand.uniform(deck.grid[2][0], deck.grid[2][-1], npoints)
+    tic = time()
+    deck(M, h, spec, ['TSFC'])
+    print("opened in %.3g s, %i linear lookups in %.3g s" % (opened, npoints, time() - tic))
+
+if __name__ == "__main__":
+    engine, m = engine_validation.validation_model(0)
+    sol = m.localsolve(verbosity = 0, x0 = estimate(engine, m, 2).x0(m))
+    Fref = np.min(mag(sol(engine.engineP.thrustP['F'])))
+    tic = time()
+    table, header = build_deck(engine_design(engine, sol), np.linspace(.6, .85, 11),
+                               np.linspace(6000, 11000, 11), Fref*np.linspace(.6, 1.2, 13))
+    print("deck of %i points built in %.3g s" % (table[0].size, time() - tic))
+    write_deck('cfm56_deck', table, header)
+    benchmark()
@@ -8,6 +8,7 @@ from gpkit.tools import te_exp_minus1
 from gpkit.constraints.tight import Tight as TCS
 import matplotlib.pyplot as plt
 from simple_ac_imports import Aircraft, CruiseSegment, ClimbSegment, FlightState
+from phased_mission import PhasedMission
 
 """
 Models requird to minimze the aircraft total fuel weight. Rate of climb equation taken from John
@@ -25,62 +26,24 @@ Inputs
 - Cruise altitude [ft]
 """
 
-class StateLinking(Model):
-    """
-    link all the state model variables
-    """
-    def setup(self, climbstate, cruisestate, enginestate, Nclimb, Ncruise):
-        statevarkeys = ['p_{sl}', 'T_{sl}', 'L_{atm}', 'M_{atm}', 'P_{atm}', 'R_{atm}',
-                        '\\rho', 'T_{atm}', '\\mu', 'T_s', 'C_1', 'h', 'hft', 'V', 'a', 'R', '\\gamma', 'M']
-        constraints = []
-        for i in range(len(statevarkeys)):
-            varkey = statevarkeys[i]
-            for i in range(Nclimb):
-                constraints.extend([
-                    climbstate[varkey][i] == enginestate[varkey][i]
-                    ])
-            for i in range(Ncruise):
-                constraints.extend([
-                    cruisestate[varkey][i] == enginestate[varkey][i+Nclimb]
-                    ])           
-        
-        return constraints
-
-class FleetMission(Model):
+class FleetMission(PhasedMission):
     """
     mission class, links together all subclasses
     """
-    def setup(self, Nclimb, Ncruise, Nfleet, substitutions = None, **kwargs):
-        eng = 0
-        
-        #two level vectorization to make a fleet
-        with Vectorize(Nfleet):
-            # vectorize
-            with Vectorize(Nclimb + Ncruise):
-                enginestate = FlightState()
+    #the fleet's fuel burn is minimized
+    COST = 'W_{f_{fleet}}'
 
-        ac = Aircraft(Nclimb, Ncruise, enginestate, eng, Nfleet)
-
-        #two level vectorization to make a fleet
-        with Vectorize(Nfleet):
-            #Vectorize
-            with Vectorize(Nclimb):
-                climb = ClimbSegment(ac)
-
-            with Vectorize(Ncruise):
-                cruise = CruiseSegment(ac)
-
-        statelinking = StateLinking(climb.state, cruise.state, enginestate, Nclimb, Ncruise)
+    def setup(self, Nclimb, Ncruise, Nfleet, substitutions = None, surrogate = None, **kwargs):
+        #the climb and cruise phases of every aircraft of the fleet, their
+        #weights, fuel burns and engine
+        mission = PhasedMission.setup(self, [('climb', Nclimb), ('cruise', Ncruise)], Nfleet, surrogate)
+        climb, cruise = self.phase['climb'], self.phase['cruise']
+        W_ftotal = self.weights['W_{f_{total}}']
 
         with Vectorize(Nfleet):
             #declare new variables
-            W_ftotal = Variable('W_{f_{total}}', 'N', 'Total Fuel Weight')
-            W_fclimb = Variable('W_{f_{climb}}', 'N', 'Fuel Weight Burned in Climb')
-            W_fcruise = Variable('W_{f_{cruise}}', 'N', 'Fuel Weight Burned in Cruise')
-            W_total = Variable('W_{total}', 'N', 'Total Aircraft Weight')
             CruiseAlt = Variable('CruiseAlt', 'ft', 'Cruise Altitude [feet]')
             ReqRng = Variable('ReqRng', 'nautical_miles', 'Required Cruise Range')
-            W_dry = Variable('W_{dry}', 'N', 'Aircraft Dry Weight')
 
             dhfthold = Variable('dhfthold', 'ft', 'Hold Variable')
 
@@ -95,27 +58,6 @@ class FleetMission(Model):
         constraints = []
 
         constraints.extend([
-            #weight constraints
-            TCS([ac['W_{e}'] + ac['W_{payload}'] + ac['numeng'] * ac['W_{engine}'] + ac['W_{wing}'] <= W_dry]),
-            TCS([W_dry + W_ftotal <= W_total]),
-
-            climb['W_{start}'][0] == W_total,
-            climb['W_{end}'][-1] == cruise['W_{start}'][0],
-
-            # similar constraint 1
-            TCS([climb['W_{start}'] >= climb['W_{end}'] + climb['W_{burn}']]),
-            # similar constraint 2
-            TCS([cruise['W_{start}'] >= cruise['W_{end}'] + cruise['W_{burn}']]),
-
-            climb['W_{start}'][1:] == climb['W_{end}'][:-1],
-            cruise['W_{start}'][1:] == cruise['W_{end}'][:-1],
-
-            TCS([W_dry <= cruise['W_{end}'][-1]]),
-
-            TCS([W_ftotal >=  W_fclimb + W_fcruise]),
-            TCS([W_fclimb >= sum(climb['W_{burn}'])]),
-            TCS([W_fcruise >= sum(cruise['W_{burn}'])]),
-
             #altitude constraints
             hftCruise == CruiseAlt,
             TCS([hftClimb[1:Nclimb] >= hftClimb[:Nclimb-1] + dhft[:Nclimb-1]]),
@@ -131,10 +73,6 @@ class FleetMission(Model):
             #down range disatnce covered
             cruise.cruiseP['Rng'] == ReqRng/(Ncruise),
             
-            #compute fuel burn from TSFC
-            cruise['W_{burn}'] == ac['numeng']*ac.engine['TSFC'][Nclimb:] * cruise['thr'] * ac.engine['F'][Nclimb:],              
-            climb['W_{burn}'] == ac['numeng']*ac.engine['TSFC'][:Nclimb] * climb['thr'] * ac.engine['F'][:Nclimb],
-            
             CruiseAlt >= 30000*units('ft'),
 
             #min climb rate constraint
@@ -146,39 +84,6 @@ class FleetMission(Model):
             W_ffleet >= .375*W_ftotal[0] + .375*W_ftotal[1] + .125*W_ftotal[2] + .125*W_ftotal[3],
             ]
 
-        M2 = .8
-        M25 = .6
-        M4a = .1025
-        M0 = .8
-
-        engineclimb = [
-            ac.engine.engineP['M_2'][:Nclimb] == climb['M'],
-            ac.engine.engineP['M_{2.5}'][:Nclimb] == M25,
-            ac.engine.engineP['hold_{2}'] == 1+.5*(1.398-1)*M2**2,
-            ac.engine.engineP['hold_{2.5}'] == 1+.5*(1.354-1)*M25**2,
-            ac.engine.engineP['c1'] == 1+.5*(.401)*M0**2,
-
-            #constraint on drag and thrust
-            ac['numeng']*ac.engine['F_{spec}'][:Nclimb] >= climb['D'] + climb['W_{avg}'] * climb['\\theta'],
-
-            #climb rate constraints
-            TCS([climb['excessP'] + climb.state['V'] * climb['D'] <=  climb.state['V'] * ac['numeng'] * ac.engine['F_{spec}'][:Nclimb]]),
-            ]
-
-        M25 = .6
-
-        enginecruise = [
-            ac.engine.engineP['M_2'][Nclimb:] == cruise['M'],
-            ac.engine.engineP['M_{2.5}'][Nclimb:] == M25,
-            
-            #steady level flight constraint on D 
-            cruise['D'] == ac['numeng'] * ac.engine['F_{spec}'][Nclimb:],
-
-            #breguet range eqn
-            TCS([cruise['z_{bre}'] >= (ac.engine['TSFC'][Nclimb:] * cruise['thr']*
-            cruise['D']) / cruise['W_{avg}']]),
-            ]
-
         ranges = [
             ReqRng[0] == 500*units('nautical_miles'), 
             ReqRng[1] == 1000*units('nautical_miles'),
@@ -186,7 +91,7 @@ class FleetMission(Model):
             ReqRng[3] == 2000*units('nautical_miles'),
             ]
         
-        return constraints + ac + climb + cruise + enginecruise + engineclimb + enginestate + statelinking + ranges + fleetfuel
+        return mission, constraints, ranges, fleetfuel
 
 def test():
     M4a = .1025
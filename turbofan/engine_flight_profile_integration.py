@@ -8,6 +8,9 @@ from gpkit.constraints.tight import Tight as TCS
 import matplotlib.pyplot as plt
 from gpkit.small_scripts import mag
 from simple_ac_imports import Aircraft, CruiseSegment, ClimbSegment, FlightState
+from phased_mission import PhasedMission
+from isa import mission_modes
+from cycle_table import EngineCycleTable
 
 """
 Models requird to minimze the aircraft total fuel weight. Rate of climb equation taken from John
@@ -25,57 +28,21 @@ Inputs
 - Cruise altitude [ft]
 """
 
-class StateLinking(Model):
+class Mission(PhasedMission):
     """
-    link all the state model variables
+    mission class, links together all subclasses, atmosphere = 'sp', 'isa'
+    or 'fit', see isa.mission_modes
     """
-    def setup(self, climbstate, cruisestate, enginestate, Nclimb, Ncruise):
-        statevarkeys = ['p_{sl}', 'T_{sl}', 'L_{atm}', 'M_{atm}', 'P_{atm}', 'R_{atm}',
-                        '\\rho', 'T_{atm}', '\\mu', 'T_s', 'C_1', 'h', 'hft', 'V', 'a', 'R', '\\gamma', 'M']
-        constraints = []
-        for i in range(len(statevarkeys)):
-            varkey = statevarkeys[i]
-            for i in range(Nclimb):
-                constraints.extend([
-                    climbstate[varkey][i] == enginestate[varkey][i]
-                    ])
-            for i in range(Ncruise):
-                constraints.extend([
-                    cruisestate[varkey][i] == enginestate[varkey][i+Nclimb]
-                    ])           
-        
-        return constraints
-
-class Mission(Model):
-    """
-    mission class, links together all subclasses
-    """
-    def setup(self, Nclimb, Ncruise, substitutions = None, **kwargs):
-        eng = 0
-        
-        # vectorize
-        with Vectorize(Nclimb + Ncruise):
-            enginestate = FlightState()
-
-        ac = Aircraft(Nclimb, Ncruise, enginestate, eng)
-        
-        #Vectorize
-        with Vectorize(Nclimb):
-            climb = ClimbSegment(ac)
-
-        with Vectorize(Ncruise):
-            cruise = CruiseSegment(ac)
-
-        statelinking = StateLinking(climb.state, cruise.state, enginestate, Nclimb, Ncruise)
+    def setup(self, Nclimb, Ncruise, substitutions = None, surrogate = None, reduction = None, cooling = True, BLI = False, atmosphere = 'sp', **kwargs):
+        #the climb and cruise phases, their weights, fuel burns and engine
+        mission = PhasedMission.setup(self, [('climb', Nclimb), ('cruise', Ncruise)], surrogate=surrogate,
+                                      reduction=reduction, cooling=cooling, BLI=BLI,
+                                      atmosphere=mission_modes(Nclimb, Ncruise, atmosphere))
+        climb, cruise = self.phase['climb'], self.phase['cruise']
 
         #declare new variables
-        W_ftotal = Variable('W_{f_{total}}', 'N', 'Total Fuel Weight')
-        W_fclimb = Variable('W_{f_{climb}}', 'N', 'Fuel Weight Burned in Climb')
-        W_fcruise = Variable('W_{f_{cruise}}', 'N', 'Fuel Weight Burned in Cruise')
-        W_total = Variable('W_{total}', 'N', 'Total Aircraft Weight')
         CruiseAlt = Variable('CruiseAlt', 'ft', 'Cruise Altitude [feet]')
         ReqRng = Variable('ReqRng', 'nautical_miles', 'Required Cruise Range')
-        W_dry = Variable('W_{dry}', 'N', 'Aircraft Dry Weight')
 
         RCmin = Variable('RC_{min}', 'ft/min', 'Minimum allowed climb rate')
 
@@ -90,27 +57,6 @@ class Mission(Model):
         constraints = []
 
         constraints.extend([
-            #weight constraints
-            TCS([ac['W_{e}'] + ac['W_{payload}'] + ac['numeng'] * ac['W_{engine}'] + ac['W_{wing}'] <= W_dry]),
-            TCS([W_dry + W_ftotal <= W_total]),
-
-            climb['W_{start}'][0] == W_total,
-            climb['W_{end}'][-1] == cruise['W_{start}'][0],
-
-            # similar constraint 1
-            TCS([climb['W_{start}'] >= climb['W_{end}'] + climb['W_{burn}']]),
-            # similar constraint 2
-            TCS([cruise['W_{start}'] >= cruise['W_{end}'] + cruise['W_{burn}']]),
-
-            climb['W_{start}'][1:] == climb['W_{end}'][:-1],
-            cruise['W_{start}'][1:] == cruise['W_{end}'][:-1],
-
-            TCS([W_dry <= cruise['W_{end}'][-1]]),
-
-            TCS([W_ftotal >=  W_fclimb + W_fcruise]),
-            TCS([W_fclimb >= sum(climb['W_{burn}'])]),
-            TCS([W_fcruise >= sum(cruise['W_{burn}'])]),
-
             #altitude constraints
             hftCruise == CruiseAlt,
             TCS([hftClimb[1:Nclimb] >= hftClimb[:Nclimb-1] + dhft[:Nclimb-1]]),
@@ -125,10 +71,6 @@ class Mission(Model):
             #set the range for each cruise segment, doesn't take credit for climb
             #down range disatnce covered
             cruise.cruiseP['Rng'] == ReqRng/(Ncruise),
-            
-            #compute fuel burn from TSFC
-            cruise['W_{burn}'] == ac['numeng']*ac.engine['TSFC'][Nclimb:] * cruise['thr'] * ac.engine['F'][Nclimb:],              
-            climb['W_{burn}'] == ac['numeng']*ac.engine['TSFC'][:Nclimb] * climb['thr'] * ac.engine['F'][:Nclimb],
 
             CruiseAlt >= 30000*units('ft'),
             
@@ -136,48 +78,18 @@ class Mission(Model):
             climb['RC'] >= RCmin,
             ])
 
-        M2 = .8
-        M25 = .6
-        M4a = .1025
-        M0 = .8
+        return mission, constraints
 
-        engineclimb = [
-            ac.engine.engineP['M_2'][:Nclimb] == climb['M'],
-            ac.engine.engineP['M_{2.5}'][:Nclimb] == M25,
-            ac.engine.engineP['hold_{2}'] == 1+.5*(1.398-1)*M2**2,
-            ac.engine.engineP['hold_{2.5}'] == 1+.5*(1.354-1)*M25**2,
-            ac.engine.engineP['c1'] == 1+.5*(.401)*M0**2,
-
-            #constraint on drag and thrust
-            ac['numeng']*ac.engine['F_{spec}'][:Nclimb] >= climb['D'] + climb['W_{avg}'] * climb['\\theta'],
-
-            #climb rate constraints
-            TCS([climb['excessP'] + climb.state['V'] * climb['D'] <=  climb.state['V'] * ac['numeng'] * ac.engine['F_{spec}'][:Nclimb]]),
-            ]
-
-        M25 = .6
-
-        enginecruise = [
-            ac.engine.engineP['M_2'][Nclimb:] == cruise['M'],
-            ac.engine.engineP['M_{2.5}'][Nclimb:] == M25,
-            
-            #steady level flight constraint on D 
-            cruise['D'] == ac['numeng'] * ac.engine['F_{spec}'][Nclimb:],
-
-            #breguet range eqn
-            TCS([cruise['z_{bre}'] >= (ac.engine['TSFC'][Nclimb:] * cruise['thr']*
-            cruise['D']) / cruise['W_{avg}']]),
-            ]
-        
-        return constraints + ac + climb + cruise + enginecruise + engineclimb + enginestate + statelinking
-
-def test():
+def mission_substitutions():
+    """
+    substitutions of the Mission(2, 2) test
+    """
     M4a = .1025
     fan = 1.685
     lpc  = 1.935
     hpc = 9.369
         
-    substitutions = {      
+    return {
             'ReqRng': 2000,
             'numeng': 2,
             'W_{pax}': 91 * 9.81,
@@ -225,6 +137,9 @@ def test():
             'HTR_{lpc_SUB}': 1 - 0.6**2,
             }
 
+def test():
+    substitutions = mission_substitutions()
+
     #dict of initial guesses
     x0 = {
         'W_{engine}': 1e4*units('N'),
@@ -554,29 +469,18 @@ if __name__ == '__main__':
         plt.title('Fan Area vs Range')
         plt.savefig('engine_Rsweeps/fan_area_R.pdf')
         plt.show()
-        
-        irc = []
-        f = []
-        f6 = []
-        f8 = []
-        totsfc = []
-        cruisetsfc = []
-        maxm = []
-        maxF = []
-        cruiseF = []
-        
-        i=0
-        while i < len(solRsweep('RC')):
-            irc.append(mag(solRsweep('RC')[i][0]))
-            f.append(mag(solRsweep('F')[i][0]))
-            f6.append(mag(solRsweep('F_6')[i][0]))
-            f8.append(mag(solRsweep('F_8')[i][0]))
-            totsfc.append(mag(solRsweep('TSFC')[i][0]))
-            cruisetsfc.append(mag(solRsweep('TSFC')[i][2]))
-            maxm.append(max(mag(solRsweep('m_{total}')[i])))
-            maxF.append(max(mag(solRsweep('F')[i])))
-            cruiseF.append(mag(solRsweep('F')[i][2]))
-            i+=1
+
+        table = EngineCycleTable.from_solution(solRsweep, mission.ac.engine)
+        segments = table.segments
+        irc = mag(solRsweep('RC'))[:, 0]
+        f = segments['F'][:, 0]
+        f6 = segments['F_6'][:, 0]
+        f8 = segments['F_8'][:, 0]
+        totsfc = segments['TSFC'][:, 0]
+        cruisetsfc = segments['TSFC'][:, 2]
+        maxm = segments['m_{total}'].max(axis = 1)
+        maxF = segments['F'].max(axis = 1)
+        cruiseF = segments['F'][:, 2]
 
         plt.plot(solRsweep('ReqRng'), cruiseF, '-r', linewidth=2.0)
         plt.xlabel('Mission Range [nm]')
@@ -781,17 +685,12 @@ if __name__ == '__main__':
         m = Model(mission['W_{f_{total}}'], mission, substitutions)
         solAltsweep = m.localsolve(solver='mosek', verbosity = 4, skipsweepfailures=True)
 
-        irc = []
-        f = []
-        f6 = []
-        f8 = []
-        i=0
-        while i < len(solAltsweep('RC')):
-            irc.append(mag(solAltsweep('RC')[i][0]))
-            f.append(mag(solAltsweep('F')[i][0]))
-            f6.append(mag(solAltsweep('F_6')[i][0]))
-            f8.append(mag(solAltsweep('F_8')[i][0]))
-            i+=1
+        table = EngineCycleTable.from_solution(solAltsweep, mission.ac.engine)
+        segments = table.segments
+        irc = mag(solAltsweep('RC'))[:, 0]
+        f = segments['F'][:, 0]
+        f6 = segments['F_6'][:, 0]
+        f8 = segments['F_8'][:, 0]
 
         plt.plot(solAltsweep('CruiseAlt'), irc, '-r')
         plt.xlabel('Mission Range [nm]')
@@ -937,27 +836,16 @@ if __name__ == '__main__':
         m = Model(mission['W_{f_{total}}'], mission, substitutions, x0=x0)
         solRCsweep = m.localsolve(solver='mosek', verbosity = 2, skipsweepfailures=True)
 
-        i = 0
-
-        f = []
-        f6 = []
-        f8 = []
-        crtsfc = []
-        itsfc = []
-        maxm = []
-        maxF = []
-        cruiseF = []
-
-        while i < len(solRCsweep('RC')):
-            f.append(mag(solRCsweep('F')[i][0]))
-            f6.append(mag(solRCsweep('F_6')[i][0]))
-            f8.append(mag(solRCsweep('F_8')[i][0]))
-            crtsfc.append(mag(solRCsweep('TSFC')[i][2]))
-            itsfc.append(mag(solRCsweep('TSFC')[i][0]))
-            maxm.append(max(mag(solRCsweep('m_{total}')[i])))
-            maxF.append(max(mag(solRCsweep('F')[i])))
-            cruiseF.append(mag(solRCsweep('F')[i][2]))
-            i+=1
+        table = EngineCycleTable.from_solution(solRCsweep, mission.ac.engine)
+        segments = table.segments
+        f = segments['F'][:, 0]
+        f6 = segments['F_6'][:, 0]
+        f8 = segments['F_8'][:, 0]
+        crtsfc = segments['TSFC'][:, 2]
+        itsfc = segments['TSFC'][:, 0]
+        maxm = segments['m_{total}'].max(axis = 1)
+        maxF = segments['F'].max(axis = 1)
+        cruiseF = segments['F'][:, 2]
 
         plt.plot(solRCsweep('RC_{min}'), cruiseF, '-r', linewidth=2.0)
         plt.xlabel('Minimum Initial Rate of Climb [ft/min]')
@@ -9,6 +9,8 @@ import matplotlib.pyplot as plt
 from gpkit.small_scripts import mag
 from collections import defaultdict
 from simple_ac_imports import Aircraft, CruiseSegment, ClimbSegment, FlightState
+from phased_mission import PhasedMission
+from isa import mission_modes
 """
 Models requird to minimze the aircraft total fuel weight. Rate of climb equation taken from John
 Anderson's Aircraft Performance and Design (eqn 5.85).
@@ -25,48 +27,20 @@ Inputs
 - Cruise altitude [ft]
 """
 
-class StateLinking(Model):
+class Mission(PhasedMission):
     """
-    link all the state model variables
+    mission class, links together all subclasses, atmosphere = 'sp', 'isa'
+    or 'fit', see isa.mission_modes
     """
-    def setup(self, cruisestate, enginestate, Ncruise):
-        statevarkeys = ['p_{sl}', 'T_{sl}', 'L_{atm}', 'M_{atm}', 'P_{atm}', 'R_{atm}',
-                        '\\rho', 'T_{atm}', '\\mu', 'T_s', 'C_1', 'h', 'hft', 'V', 'a', 'R', '\\gamma', 'M']
-        constraints = []
-        for i in range(len(statevarkeys)):
-            varkey = statevarkeys[i]
-            for i in range(Ncruise):
-                constraints.extend([
-                    cruisestate[varkey][i] == enginestate[varkey][i]
-                    ])           
-        
-        return constraints
-
-class Mission(Model):
-    """
-    mission class, links together all subclasses
-    """
-    def setup(self, substitutions = None, **kwargs):
-        eng = 0 
+    def setup(self, substitutions = None, atmosphere = 'sp', **kwargs):
         #define the number of each flight segment
         Ncruise = 2
-        
-        # vectorize
-        with Vectorize(Ncruise):
-            enginestate = FlightState()
 
-        ac = Aircraft(0, Ncruise, enginestate, eng)
-            
-        #Vectorize
-        with Vectorize(Ncruise):
-            cruise = CruiseSegment(ac)
-
-        statelinking = StateLinking(cruise.state, enginestate, Ncruise)
+        #the cruise phase, its weights, fuel burn and engine
+        mission = PhasedMission.setup(self, [('cruise', Ncruise)], atmosphere=mission_modes(0, Ncruise, atmosphere))
+        cruise = self.phase['cruise']
 
         #declare new variables
-        W_ftotal = Variable('W_{f_{total}}', 'N', 'Total Fuel Weight')
-        W_fcruise = Variable('W_{f_{cruise}}', 'N', 'Fuel Weight Burned in Cruise')
-        W_total = Variable('W_{total}', 'N', 'Total Aircraft Weight')
         CruiseAlt = Variable('CruiseAlt', 'ft', 'Cruise Altitude [feet]')
         ReqRng = Variable('ReqRng', 'nautical_miles', 'Required Cruise Range')
 
@@ -76,20 +50,6 @@ class Mission(Model):
         constraints = []
 
         constraints.extend([
-            #weight constraints
-            TCS([ac['W_{e}'] + ac['W_{payload}'] + W_ftotal + ac['numeng'] * ac['W_{engine}'] + ac['W_{wing}'] <= W_total]),
-
-            cruise['W_{start}'][0] == W_total,
-
-            TCS([cruise['W_{start}'] >= cruise['W_{end}'] + cruise['W_{burn}']]),
-
-            cruise['W_{start}'][1:] == cruise['W_{end}'][:-1],
-
-            TCS([ac['W_{e}'] + ac['W_{payload}'] + ac['numeng'] * ac['W_{engine}'] + ac['W_{wing}'] <= cruise['W_{end}'][-1]]),
-
-            TCS([W_ftotal >= W_fcruise]),
-            TCS([W_fcruise >= sum(cruise['W_{burn}'])]),
-
             #altitude constraints
             hftCruise == CruiseAlt,
 
@@ -98,40 +58,10 @@ class Mission(Model):
             #set the range for each cruise segment, doesn't take credit for climb
             #down range disatnce covered
             cruise.cruiseP['Rng'] == ReqRng/(Ncruise),
-
-            #compute fuel burn from TSFC
-            cruise['W_{burn}'] == ac['numeng']*ac.engine['TSFC']* cruise['thr'] * ac.engine['F'],            
             ])
 
-        M2 = .8
-        M25 = .6
-        M4a = .1025
-        M0 = .8
-
-        enginecruise = [
-
-            ac.engine.engineP['M_2'][0] == cruise['M'][0],
-            ac.engine.engineP['M_2'][1] == cruise['M'][1],
-            ac.engine.engineP['M_{2.5}'][1] == M25,
-            ac.engine.engineP['M_{2.5}'][0] == M25,
-
-            ac.engine.engineP['hold_{2}'] == 1+.5*(1.398-1)*M2**2,
-            ac.engine.engineP['hold_{2.5}'] == 1+.5*(1.354-1)*M25**2,
-            ac.engine.engineP['c1'] == 1+.5*(.401)*M0**2,
-
-
-            #steady level flight constraint on D 
-            cruise['D'] == ac['numeng'] * ac.engine['F_{spec}'],
-
-            #breguet range eqn
-            TCS([cruise['z_{bre}'] >= (ac.engine['TSFC'] * cruise['thr']*
-            cruise['D']) / cruise['W_{avg}']]),
-            ]
-        
-        # Model.setup(self, W_ftotal + s*units('N'), constraints + ac + climb + cruise, subs)
-        return constraints + ac + cruise + enginecruise + enginestate + statelinking
+        return mission, constraints
     
- 
 if __name__ == '__main__':
     M4a = .1025
     fan = 1.685
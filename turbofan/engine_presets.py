@@ -0,0 +1,131 @@
+"""Table of engine presets, the numbers that distinguish one engine from another"""
+from collections import namedtuple
+
+#reference stagnation temperature [K] and pressure [kPa] of the corrected mass flows
+TREF = 288.
+PREF = 101.325
+
+#gamma values, component efficiencies and the exponents derived from them
+EngineCalibration = namedtuple('EngineCalibration', [
+    'fgamma', 'lpcgamma', 'hpcgamma', 'ccgamma', 'lptgamma', 'hptgamma', 'sta8gamma', 'sta6gamma',
+    'faneta', 'LPCeta', 'HPCeta', 'LPTeta', 'HPTeta',
+    'fexp1', 'lpcexp1', 'hpcexp1', 'ccexp1', 'ccexp2', 'lptexp1', 'hptexp1', 'fanexexp', 'turbexexp',
+    ])
+
+#calibration plus the on design estimates used to bound the design corrected mass flows
+EnginePreset = namedtuple('EnginePreset', ['name', 'calibration', 'stations', 'bounds', 'fanbounds'])
+
+def make_calibration(faneta, LPCeta, HPCeta, LPTeta, HPTeta, fgamma = 1.401, lpcgamma = 1.398,
+                     hpcgamma = 1.354, ccgamma = 1.313, lptgamma = 1.354, hptgamma = 1.318,
+                     sta8gamma = 1.4, sta6gamma = 1.387):
+    """
+    computes the engine exponents from the gamma values and component efficiencies,
+    ccgamma is the gamma value of air @ 1400 K, sta8gamma is at the fan exit and
+    sta6gamma is at the turbine exit
+    """
+    return EngineCalibration(
+        fgamma, lpcgamma, hpcgamma, ccgamma, lptgamma, hptgamma, sta8gamma, sta6gamma,
+        faneta, LPCeta, HPCeta, LPTeta, HPTeta,
+        #Fan
+        fexp1 = (fgamma - 1)/(faneta * fgamma),
+        #LPC
+        lpcexp1 = (lpcgamma - 1)/(LPCeta * lpcgamma),
+        #HPC
+        hpcexp1 = (hpcgamma - 1)/(HPCeta * hpcgamma),
+        #combustor cooling exponents
+        ccexp1 = ccgamma/(1 - ccgamma),
+        ccexp2 = -ccgamma/(1 - ccgamma),
+        #LPT
+        lptexp1 = lptgamma * LPTeta / (lptgamma - 1),
+        #HPT
+        hptexp1 = hptgamma * HPTeta / (hptgamma - 1),
+        #station 8, fan exit
+        fanexexp = (sta8gamma - 1)/ sta8gamma,
+        #station 6, turbine exit
+        turbexexp = (sta6gamma - 1) / sta6gamma,
+        )
+
+#one row per engine, the turbine gammas may instead be set to
+#lptgamma = 1.3060 and hptgamma = 1.2987
+#stations are the estimated on design stagnation (temperature [K], pressure [kPa])
+#at the HPT inlet (4.1), LPT inlet (4.5), LPC inlet (2), HPC inlet (2.5) and fan face
+#bounds and fanbounds are the (lower, upper) factors on the resulting mass flow estimates
+PRESET_TABLE = {
+    0: {
+        'name': 'CFM56',
+        'efficiencies': dict(faneta = .9005, LPCeta = .9306, HPCeta = .9030, LPTeta = .8851, HPTeta = .8731),
+        'gammas': {},
+        'stations': {'4.1': (1400.0, 1527), '4.5': (1038.8, 589.2), '2': (292.57, 84.25),
+                     '2.5': (362.47, 163.02), 'fan': (250.0, 50)},
+        'bounds': (.7, 1.3),
+        'fanbounds': (.7, 1.3),
+        },
+    1: {
+        'name': 'TASOPT 737-800',
+        'efficiencies': dict(faneta = .8948, LPCeta = .88, HPCeta = .87, LPTeta = .889, HPTeta = .899),
+        'gammas': {},
+        'stations': {'4.1': (1400.0, 1498), '4.5': (1144.8, 788.5), '2': (294.5, 84.25),
+                     '2.5': (482.7, 399.682), 'fan': (250.0, 50)},
+        'bounds': (.7, 1.3),
+        'fanbounds': (.7, 1.3),
+        },
+    2: {
+        'name': 'GE90',
+        'efficiencies': dict(faneta = .9153, LPCeta = .9037, HPCeta = .9247, LPTeta = .9228, HPTeta = .9121),
+        'gammas': {'fgamma': 1.4},
+        'stations': {'4.1': (1400.0, 1527), '4.5': (1038.8, 589.2), '2': (292.57, 84.25),
+                     '2.5': (362.47, 163.02), 'fan': (250.0, 50)},
+        'bounds': (.7, 1.3),
+        'fanbounds': (.3, 1.7),
+        },
+    3: {
+        'name': 'TASOPT D8.2',
+        'efficiencies': dict(faneta = .93, LPCeta = .92, HPCeta = .89, LPTeta = .92, HPTeta = .91),
+        'gammas': {'fgamma': 1.4},
+        'stations': {'4.1': (1400.0, 1598.32), '4.5': (1142.6, 835.585), '2': (289.77, 80.237),
+                     '2.5': (481.386, 399.58), 'fan': (250.0, 50)},
+        'bounds': (.7, 1.3),
+        'fanbounds': (.7, 1.3),
+        },
+    }
+
+#presets built from PRESET_TABLE, filled the first time each engine is requested
+_PRESETS = {}
+
+def get_preset(eng):
+    """
+    returns the EnginePreset of engine eng, building it from the table only once
+    """
+    if eng not in _PRESETS:
+        row = PRESET_TABLE[eng]
+        gammas = dict(row['gammas'])
+        gammas.update(row['efficiencies'])
+        _PRESETS[eng] = EnginePreset(row['name'], make_calibration(**gammas),
+                                     row['stations'], row['bounds'], row['fanbounds'])
+    return _PRESETS[eng]
+
+def mass_flow_coefficient(station):
+    """
+    ratio of a corrected mass flow at the estimated station conditions to the
+    corrected mass flow at the reference conditions
+    """
+    Tt, Pt = station
+    return ((Tt/TREF)**.5)/(Pt/PREF)
+
+def preset_substitutions(eng):
+    """
+    substitutions that switch the on design bound constants of an engine to the
+    values of preset eng
+    """
+    preset = get_preset(eng)
+    return {
+        'C_{m_{htD}}': mass_flow_coefficient(preset.stations['4.1']),
+        'C_{m_{ltD}}': mass_flow_coefficient(preset.stations['4.5']),
+        'C_{m_{lc_D}}': mass_flow_coefficient(preset.stations['2']),
+        'C_{m_{hc_D}}': mass_flow_coefficient(preset.stations['2.5']),
+        'C_{m_{fan_D}}': mass_flow_coefficient(preset.stations['fan']),
+        'f_{D_{min}}': preset.bounds[0],
+        'f_{D_{max}}': preset.bounds[1],
+        'f_{fan_{D_{min}}}': preset.fanbounds[0],
+        'f_{fan_{D_{max}}}': preset.fanbounds[1],
+        }
@@ -0,0 +1,429 @@
+"""GP compatible surrogate of the Engine model, posynomial fits of TSFC and engine weight"""
+import json
+import numpy as np
+from time import time
+from multiprocessing import Pool
+from gpkit import Model, Variable, Vectorize
+from gpkit.small_scripts import mag
+from cycle_estimate import estimate
+from offdesign import atmosphere, offdesign, engine_design, engine_weight, PSL
+from engine_flight_profile_integration import Mission, mission_substitutions
+from engine_flight_profile_fleet import FleetMission
+import engine_validation
+
+#flight condition variables the mission models fix on the engine
+M0 = .8
+M25 = .6
+MISSION_CONDITIONS = {'c1': 1+.5*(.401)*M0**2, 'M_{2.5}': M25, 'hold_{2}': 1+.5*(1.398-1)*.8**2,
+                      'hold_{2.5}': 1+.5*(1.354-1)*M25**2}
+
+#names of the fit inputs, the throttle is the thrust corrected to sea level
+#pressure over the corrected design thrust and the altitude is in km
+FEATURES = ['throttle', 'M', 'h', '\\pi_{f_D}', '\\pi_{lc_D}', '\\pi_{hc_D}']
+
+def max_affine_fit(x, y, K, ntry = 10, maxiter = 100, seed = 0):
+    """
+    least squares fit of y ~ max_k (b_k + a_k.x) by the partition heuristic of
+    Magnani and Boyd, keeping the best of ntry random starts
+    ________
+    INPUTS
+    x = (n, d) log inputs
+    y = (n,) log outputs
+    K = number of affine terms
+
+    OUTPUTS
+    (b, a), the (K,) intercepts and (K, d) slopes
+    """
+    n, d = x.shape
+    X = np.hstack([np.ones((n, 1)), x])
+    rand = np.random.RandomState(seed)
+    best, bestrms = None, np.inf
+    for _ in range(ntry):
+        #start from the partition around K random points
+        centers = x[rand.choice(n, K, replace = False)]
+        part = np.argmin(((x[:, None, :] - centers[None, :, :])**2).sum(axis = 2), axis = 1)
+        coef = np.zeros((K, d + 1))
+        for _ in range(maxiter):
+            for k in range(K):
+                members = part == k
+                #too few points to fit a term, start it from the overall fit
+                if members.sum() <= d:
+                    members = np.ones(n, dtype = bool)
+                coef[k] = np.linalg.lstsq(X[members], y[members], rcond = None)[0]
+            newpart = np.argmax(X.dot(coef.T), axis = 1)
+            if np.all(newpart == part):
+                break
+            part = newpart
+        rms = np.sqrt(np.mean((np.max(X.dot(coef.T), axis = 1) - y)**2))
+        if rms < bestrms:
+            best, bestrms = coef.copy(), rms
+    return best[:, 0], best[:, 1:]
+
+def softmax_affine(x, b, a, alpha):
+    """
+    evaluates (1/alpha) log sum_k exp(alpha (b_k + a_k.x)) and the softmax weights
+    """
+    z = b + x.dot(a.T)
+    zmax = np.max(z, axis = 1)
+    e = np.exp(alpha*(z - zmax[:, None]))
+    s = e.sum(axis = 1)
+    return zmax + np.log(s)/alpha, e/s[:, None], z
+
+def softmax_affine_fit(x, y, K, maxiter = 200, tol = 1e-10, seed = 0):
+    """
+    least squares fit of y ~ (1/alpha) log sum_k exp(alpha (b_k + a_k.x)) by
+    Levenberg-Marquardt, started from the max affine fit as GPfit does
+    ________
+    INPUTS
+    x = (n, d) log inputs
+    y = (n,) log outputs
+    K = number of affine terms
+
+    OUTPUTS
+    (b, a, alpha), the (K,) intercepts, (K, d) slopes and the softness
+    """
+    n, d = x.shape
+    b, a = max_affine_fit(x, y, K, seed = seed)
+    #unknowns are the intercepts, the slopes and the log of alpha
+    p = np.concatenate([b, a.ravel(), [np.log(10.)]])
+    unpack = lambda p: (p[:K], p[K:K*(d + 1)].reshape(K, d), np.exp(p[-1]))
+
+    def residual(p):
+        b, a, alpha = unpack(p)
+        f, w, z = softmax_affine(x, b, a, alpha)
+        return f - y, w, z, f
+
+    r, w, z, f = residual(p)
+    cost = r.dot(r)
+    lam = 1e-3
+    for _ in range(maxiter):
+        J = np.hstack([w, (w[:, :, None]*x[:, None, :]).reshape(n, K*d),
+                       ((w*z).sum(axis = 1) - f)[:, None]])
+        JTJ = J.T.dot(J)
+        g = J.T.dot(r)
+        while True:
+            step = np.linalg.solve(JTJ + lam*np.diag(np.diag(JTJ) + 1e-12), -g)
+            trial = p + step
+            rt, wt, zt, ft = residual(trial)
+            if rt.dot(rt) < cost:
+                lam = max(lam/10, 1e-12)
+                break
+            lam *= 10
+            if lam > 1e12:
+                break
+        if lam > 1e12:
+            break
+        improvement = cost - rt.dot(rt)
+        p, r, w, z, f, cost = trial, rt, wt, zt, ft, rt.dot(rt)
+        if improvement < tol*max(cost, 1e-30):
+            break
+    return unpack(p)
+
+class PosynomialFit(object):
+    """
+    Posynomial fit of a positive output in terms of positive inputs, either
+    max affine (a set of monomial constraints) or softmax affine (one
+    posynomial constraint on a power of the output), in log space
+    ________
+    INPUTS
+    kind = 'max-affine' or 'softmax-affine'
+    names = names of the inputs, the ones left out of the fit have zero slopes
+    b, a, alpha = intercepts, slopes and softness of the fit, alpha is None
+    for a max affine fit
+    """
+    def __init__(self, kind, names, b, a, alpha = None):
+        self.kind = kind
+        self.names = list(names)
+        self.b = np.asarray(b, dtype = float)
+        self.a = np.asarray(a, dtype = float)
+        self.alpha = alpha
+
+    @classmethod
+    def fit(cls, kind, names, x, y, K):
+        """
+        fits y in terms of x = (n, len(names)), inputs constant over the
+        samples are left out of the fit
+        """
+        lx, ly = np.log(x), np.log(y)
+        used = np.ptp(lx, axis = 0) > 0
+        a = np.zeros((K, len(names)))
+        if kind == 'max-affine':
+            b, a[:, used] = max_affine_fit(lx[:, used], ly, K)
+            return cls(kind, names, b, a)
+        if kind == 'softmax-affine':
+            b, a[:, used], alpha = softmax_affine_fit(lx[:, used], ly, K)
+            return cls(kind, names, b, a, alpha)
+        raise ValueError("kind must be 'max-affine' or 'softmax-affine', not %s" % kind)
+
+    def __call__(self, x):
+        """
+        evaluates the fit at x = (n, len(names))
+        """
+        lx = np.log(x)
+        if self.kind == 'max-affine':
+            return np.exp(np.max(self.b + lx.dot(self.a.T), axis = 1))
+        return np.exp(softmax_affine(lx, self.b, self.a, self.alpha)[0])
+
+    def errors(self, x, y):
+        """
+        returns the (rms, largest) relative errors of the fit at the samples x, y
+        """
+        rel = self(x)/y - 1
+        return np.sqrt(np.mean(rel**2)), np.max(np.abs(rel))
+
+    def constraints(self, y, x):
+        """
+        returns the constraints bounding the monomial y below by the fit of
+        the monomials x = {name: monomial}, which only needs the inputs of
+        nonzero slope
+        """
+        terms = []
+        for b, a in zip(self.b, self.a):
+            term = 1
+            for name, exponent in zip(self.names, a):
+                if exponent != 0:
+                    term *= x[name]**exponent
+            terms.append((b, term))
+        if self.kind == 'max-affine':
+            return [y >= np.exp(b)*term for b, term in terms]
+        return [y**self.alpha >= sum(np.exp(self.alpha*b)*term**self.alpha for b, term in terms)]
+
+    def todict(self):
+        """
+        returns the fit as a dict of plain lists, for json
+        """
+        return {'kind': self.kind, 'names': self.names, 'b': self.b.tolist(),
+                'a': self.a.tolist(), 'alpha': self.alpha}
+
+class EngineSurrogate(object):
+    """
+    Fits of the TSFC [1/hr] and of the engine weight needed at a flight
+    condition over the design thrust [N/N] of an Engine, both corrected to
+    sea level pressure, in terms of FEATURES
+    ________
+    INPUTS
+    tsfc = PosynomialFit of TSFC
+    weight = PosynomialFit of the corrected W_{engine}/F_{D}
+    ranges = {name: (lower, upper)} of the sampled inputs
+    errors = {name: (rms, largest)} relative fit errors over the samples
+    """
+    def __init__(self, tsfc, weight, ranges, errors = None):
+        self.tsfc = tsfc
+        self.weight = weight
+        self.ranges = ranges
+        self.errors = errors or {}
+
+    def save(self, path):
+        """
+        writes the surrogate to path as json
+        """
+        with open(path, 'w') as f:
+            json.dump({'tsfc': self.tsfc.todict(), 'weight': self.weight.todict(),
+                       'ranges': self.ranges, 'errors': self.errors}, f, indent = 1)
+
+    @classmethod
+    def load(cls, path):
+        """
+        reads a surrogate written by save
+        """
+        with open(path) as f:
+            data = json.load(f)
+        fits = [PosynomialFit(**data[name]) for name in ['tsfc', 'weight']]
+        ranges = dict((name, tuple(value)) for name, value in data['ranges'].items())
+        return cls(fits[0], fits[1], ranges, data['errors'])
+
+def _sample_chunk(args):
+    """
+    solves a chunk of random operating points of a design with the mission's
+    face conditions, module level so the worker processes can unpickle it
+    """
+    design, Fdesign, throttle, M, h = args
+    Tatm, Patm = atmosphere(h)
+    F = throttle*Fdesign*Patm/PSL
+    fixed = dict((name, value*np.ones(len(M))) for name, value in MISSION_CONDITIONS.items())
+    fixed['M_2'] = M
+    res = offdesign(design, M, Tatm, Patm, Fspec = F, fixed = fixed, mode = 'face')
+    #keep the points the GP can reach, inside the maps and under the by pass ratio bound
+    valid = res['converged'] & res['in map'] & (res['\\alpha'] <= design.values['\\alpha_{max}'])
+    x = np.array([throttle, M, h/1e3] + [design.values[name]*np.ones(len(M)) for name in FEATURES[3:]]).T
+    return x[valid], res['TSFC'][valid], (engine_weight(res)*PSL/(Fdesign*Patm))[valid]
+
+def sample_engine(designs, npoints, ranges = None, processes = None, seed = 0):
+    """
+    samples npoints random operating points of each design, split over worker
+    processes
+    ________
+    INPUTS
+    designs = list of (EngineDesign, corrected design thrust [N]) pairs
+    ranges = {name: (lower, upper)} of the throttle, M and h [km]
+    processes = number of worker processes, all cores by default, 1 to sample
+    in this process
+
+    OUTPUTS
+    (x, TSFC, corrected W_{engine}/F_{D}) of the points the GP can reach
+    """
+    ranges = ranges or {'throttle': (.5, 1.3), 'M': (.3, .85), 'h': (1., 12.)}
+    rand = np.random.RandomState(seed)
+    tasks = []
+    nchunk = max(processes or 1, 1)
+    for design, Fdesign in designs:
+        draws = [rand.uniform(ranges[name][0], ranges[name][1], npoints) for name in FEATURES[:3]]
+        for idx in np.array_split(np.arange(npoints), nchunk):
+            tasks.append((design, Fdesign, draws[0][idx], draws[1][idx], draws[2][idx]*1e3))
+    if processes == 1:
+        chunks = map(_sample_chunk, tasks)
+    else:
+        pool = Pool(processes)
+        try:
+            chunks = pool.map(_sample_chunk, tasks)
+        finally:
+            pool.close()
+            pool.join()
+    return [np.concatenate(arrays) for arrays in zip(*chunks)]
+
+def validation_design(substitutions = None, eng = 0):
+    """
+    solves the validation mission of engine eng with extra substitutions,
+    e.g. the design pressure ratios, and returns its (design, corrected design
+    thrust), the largest segment thrust corrected to sea level pressure
+    """
+    N = 3 if eng == 1 else 2
+    engine, m = engine_validation.validation_model(eng)
+    m.substitutions.update(substitutions or {})
+    sol = m.localsolve(verbosity = 0, x0 = estimate(engine, m, N).x0(m))
+    corrected = mag(sol(engine.engineP.thrustP['F']))*PSL/mag(sol(engine.state['P_{atm}']))
+    return engine_design(engine, sol), np.max(corrected)
+
+def build_surrogate(designs, npoints = 2000, K = 3, kind = 'softmax-affine', ranges = None, processes = None):
+    """
+    samples designs and fits an EngineSurrogate, designs is a list of (EngineDesign,
+    corrected design thrust [N]) pairs, see validation_design
+    """
+    x, tsfc, weight = sample_engine(designs, npoints, ranges, processes)
+    fits = [PosynomialFit.fit(kind, FEATURES, x, y, K) for y in [tsfc, weight]]
+    errors = {'TSFC': fits[0].errors(x, tsfc), 'W_{engine}': fits[1].errors(x, weight)}
+    ranges = dict((name, (float(x[:, i].min()), float(x[:, i].max()))) for i, name in enumerate(FEATURES))
+    return EngineSurrogate(fits[0], fits[1], ranges, errors)
+
+class SurrogateEngine(Model):
+    """
+    Stand in for Engine in Aircraft, TSFC and the engine weight follow the
+    fits of an EngineSurrogate instead of the engine cycle
+    ________
+    INPUTS
+    N = number of flight segments
+    state = FlightState of the flight segments
+    surrogate = EngineSurrogate to use
+    Nfleet - number of discrete missions in a fleet mission optimization problem, default is 0
+    """
+    def setup(self, N, state, surrogate, Nfleet = 0):
+        self.state = state
+        self.surrogate = surrogate
+
+        W_engine = Variable('W_{engine}', 'N', 'Weight of a Single Turbofan Engine')
+        FD = Variable('F_{D}', 'N', 'Design Thrust of a Single Engine Corrected to Sea Level Pressure')
+        hfit = Variable('h_{fit}', 1000, 'm', 'Altitude Unit of the Surrogate Fits')
+        Pfit = Variable('P_{fit}', PSL, 'kPa', 'Pressure the Surrogate Fits Correct the Thrust to')
+        TSFCfit = Variable('TSFC_{fit}', 1, '1/hr', 'TSFC Unit of the Surrogate Fits')
+
+        if Nfleet != 0:
+            with Vectorize(Nfleet):
+                with Vectorize(N):
+                    F, Fspec, TSFC = self.performance()
+        else:
+            with Vectorize(N):
+                F, Fspec, TSFC = self.performance()
+
+        tmin, tmax = surrogate.ranges['throttle']
+        inputs = {'throttle': F*Pfit/(FD*state['P_{atm}']), 'M': state['M'], 'h': state['h']/hfit}
+        for name in FEATURES[3:]:
+            inputs[name] = Variable(name, surrogate.ranges[name][0], '-', 'Design Pressure Ratio of the Surrogate Fits')
+
+        constraints = [
+            F == Fspec,
+
+            #stay inside the sampled throttle range
+            inputs['throttle'] <= tmax,
+            inputs['throttle'] >= tmin,
+
+            #fitted TSFC and engine weight
+            surrogate.tsfc.constraints(TSFC/TSFCfit, inputs),
+            surrogate.weight.constraints(W_engine*Pfit/(FD*state['P_{atm}']), inputs),
+            ]
+
+        return constraints
+
+    def performance(self):
+        """
+        declares the variables of each flight segment
+        """
+        F = Variable('F', 'N', 'Total Thrust')
+        Fspec = Variable('F_{spec}', 'N', 'Specified Total Thrust')
+        TSFC = Variable('TSFC', '1/hr', 'Thrust Specific Fuel Consumption')
+        return F, Fspec, TSFC
+
+def _known_substitutions(mission, substitutions):
+    """
+    keeps the substitutions naming variables of mission, so one dict serves
+    the full and surrogate engines
+    """
+    return dict((name, value) for name, value in substitutions.items() if name in mission.varkeys)
+
+def compare(surrogate, Nclimb = 2, Ncruise = 2, fleet = False):
+    """
+    solves Mission(Nclimb, Ncruise), or FleetMission(Nclimb, Ncruise, 4), with
+    the full engine and with surrogate, returns {engine: (variables,
+    constraints, solve time [s], fuel burn [N])}
+    """
+    substitutions = mission_substitutions()
+    if fleet:
+        #the fleet mission sets its own ranges
+        del substitutions['ReqRng']
+    objective = 'W_{f_{fleet}}' if fleet else 'W_{f_{total}}'
+    report = {}
+    for name, engine in [('full', None), ('surrogate', surrogate)]:
+        if fleet:
+            mission = FleetMission(Nclimb, Ncruise, 4, surrogate = engine)
+        else:
+            mission = Mission(Nclimb, Ncruise, surrogate = engine)
+        m = Model(mission[objective], mission, _known_substitutions(mission, substitutions))
+        tic = time()
+        sol = m.localsolve(verbosity = 0)
+        report[name] = (len(m.varkeys), len(m.program.gps[-1].posynomials), time() - tic,
+                        mag(sol(mission[objective])))
+    for name, (nvars, ncons, soltime, fuel) in sorted(report.items()):
+        print("%s engine: %i variables, %i constraints, %.3g s, fuel burn %.6g N"
+              % (name, nvars, ncons, soltime, np.sum(fuel)))
+    return report
+
+def test():
+    """
+    fits the CFM56 validation engine, checks the fit errors, that the saved fit
+    reads back the same and that a Mission(2, 2) with the surrogate solves
+    """
+    import os, tempfile
+    surrogate = build_surrogate([validation_design()], 2000, processes = 2)
+    for name, (rms, largest) in surrogate.errors.items():
+        assert rms < .03, (name, rms)
+
+    handle, path = tempfile.mkstemp(suffix = '.json')
+    os.close(handle)
+    try:
+        surrogate.save(path)
+        loaded = EngineSurrogate.load(path)
+    finally:
+        os.remove(path)
+    x = np.array([[.9, .8, 10.7] + [loaded.ranges[name][0] for name in FEATURES[3:]]])
+    assert np.allclose(loaded.tsfc(x), surrogate.tsfc(x))
+    assert np.allclose(loaded.weight(x), surrogate.weight(x))
+
+    mission = Mission(2, 2, surrogate = loaded)
+    m = Model(mission['W_{f_{total}}'], mission, _known_substitutions(mission, mission_substitutions()))
+    m.localsolve(verbosity = 0)
+
+if __name__ == "__main__":
+    surrogate = build_surrogate([validation_design()])
+    print("fit errors (rms, largest): %s" % surrogate.errors)
+    surrogate.save('cfm56_surrogate.json')
+    compare(surrogate)
+    compare(surrogate, fleet = True)
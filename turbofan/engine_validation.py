@@ -3,9 +3,104 @@ from gpkit import Model, Variable, SignomialsEnabled, units, Vectorize, Signomia
 from gpkit.constraints.tight import Tight as TCS
 from gpkit.small_scripts import mag
 import numpy as np
+from threading import Lock
+from multiprocessing.pool import ThreadPool
+from engine_presets import get_preset, preset_substitutions
+import cycle_estimate
 
 #Cp and gamma values estimated from https://www.ohio.edu/mechanical/thermo/property_tables/air/air_Cp_Cv.html
 
+def get_calibration(eng):
+    """
+    returns the calibration of engine eng
+    """
+    return get_preset(eng).calibration
+
+#gpkit names and vectorizes variables through process wide state, so models
+#built from several threads must hold this lock while they are constructed
+BUILD_LOCK = Lock()
+
+#units and descriptions of the quantities of a station
+QUANTITIES = {
+    'Pt': ('kPa', 'Stagnation Pressure'),
+    'Tt': ('K', 'Stagnation Temperature'),
+    'ht': ('J/kg', 'Stagnation Enthalpy'),
+    'P': ('kPa', 'Static Pressure'),
+    'T': ('K', 'Static Temperature'),
+    'h': ('J/kg', 'Static Enthalpy'),
+    'u': ('m/s', 'Flow Velocity'),
+    'M': ('-', 'Mach Number'),
+    'rho': ('kg/m^3', 'Static Density'),
+    'a': ('m/s', 'Speed of Sound'),
+    }
+
+#station table of the engine, (station, performance model that owns the
+#variables, location, [(quantity, variable name)]), a station can be split
+#between the stagnation states of one model and the static states of another
+STATIONS = [
+    ('0', 'compressor', 'Free Stream', [('Pt', 'P_{t_0}'), ('Tt', 'T_{t_0}'), ('ht', 'h_{t_0}')]),
+    ('1.8', 'compressor', 'Diffuser Exit', [('Pt', 'P_{t_{1.8}}'), ('Tt', 'T_{t_{1.8}}'), ('ht', 'h_{t_{1.8}}')]),
+    ('2', 'compressor', 'Fan Inlet', [('Pt', 'P_{t_2}'), ('Tt', 'T_{t_2}'), ('ht', 'h_{t_2}')]),
+    ('2.1', 'compressor', 'Fan Exit', [('Pt', 'P_{t_2.1}'), ('Tt', 'T_{t_2.1}'), ('ht', 'h_{t_2.1}')]),
+    ('2.5', 'compressor', 'LPC Exit', [('Pt', 'P_{t_{2.5}}'), ('Tt', 'T_{t_{2.5}}'), ('ht', 'h_{t_{2.5}}')]),
+    ('3', 'compressor', 'HPC Exit', [('Pt', 'P_{t_3}'), ('Tt', 'T_{t_3}'), ('ht', 'h_{t_3}')]),
+    ('7', 'compressor', 'Fan Nozzle Exit', [('Pt', 'P_{t_7}'), ('Tt', 'T_{t_7}'), ('ht', 'h_{t_7}')]),
+    ('4', 'combustor', 'Combustor Exit', [('Pt', 'P_{t_4}'), ('Tt', 'T_{t_4}'), ('ht', 'h_{t_4}')]),
+    ('4.1', 'combustor', 'Turbine Inlet', [('Pt', 'P_{t_{4.1}}'), ('Tt', 'T_{t_{4.1}}'), ('ht', 'h_{t_{4.1}}'),
+                                           ('T', 'T_{4.1}'), ('u', 'u_{4.1}')]),
+    ('4a', 'combustor', 'Cooling Flow Mixing Inlet', [('P', 'P_{4a}'), ('u', 'u_{4a}'), ('M', 'M_{4a}')]),
+    ('4.5', 'turbine', 'HPT Exit', [('Pt', 'P_{t_{4.5}}'), ('Tt', 'T_{t_{4.5}}'), ('ht', 'h_{t_{4.5}}')]),
+    ('4.9', 'turbine', 'LPT Exit', [('Pt', 'P_{t_{4.9}}'), ('Tt', 'T_{t_{4.9}}'), ('ht', 'h_{t_{4.9}}')]),
+    ('5', 'turbine', 'Turbine Nozzle Exit', [('Pt', 'P_{t_5}'), ('Tt', 'T_{t_5}'), ('ht', 'h_{t_5}')]),
+    ('6', 'thrust', 'Core Exhaust', [('Pt', 'P_{t_6}'), ('Tt', 'T_{t_6}'), ('ht', 'h_{t_6}'),
+                                     ('P', 'P_6'), ('T', 'T_{6}'), ('h', 'h_6'), ('u', 'u_6')]),
+    ('8', 'thrust', 'Fan Exhaust', [('Pt', 'P_{t_8}'), ('Tt', 'T_{t_8}'), ('ht', 'h_{t_8}'),
+                                    ('P', 'P_8'), ('T', 'T_{8}'), ('h', 'h_8'), ('u', 'u_8')]),
+    ('2', 'sizing', 'Fan Face', [('P', 'P_2'), ('T', 'T_2'), ('h', 'h_{2}'), ('u', 'u_2'), ('M', 'M_2'),
+                                 ('rho', '\\rho_2')]),
+    ('2.5', 'sizing', 'HPC Face', [('P', 'P_{2.5}'), ('T', 'T_{2.5}'), ('h', 'h_{2.5}'), ('u', 'u_{2.5}'),
+                                   ('M', 'M_{2.5}'), ('rho', '\\rho_2.5')]),
+    ('5', 'sizing', 'Core Nozzle Exit', [('P', 'P_{5}'), ('T', 'T_{5}'), ('u', 'u_5'), ('M', 'M_5'),
+                                         ('rho', '\\rho_5'), ('a', 'a_5')]),
+    ('7', 'sizing', 'Fan Nozzle Exit', [('P', 'P_{7}'), ('T', 'T_{7}'), ('u', 'u_7'), ('M', 'M_7'),
+                                        ('rho', '\\rho_7'), ('a', 'a_7')]),
+    ]
+
+class Station(object):
+    """
+    handles to the variables of one engine station, an attribute per quantity
+    of QUANTITIES, e.g. stations['4.1'].ht
+    """
+    def __init__(self, station):
+        self.station = station
+
+def station_variables(owner):
+    """
+    creates the variables of the stations of STATIONS owned by the performance
+    model owner, to be called from that model's setup so the variables are
+    named and vectorized with it
+    ________
+    OUTPUTS
+    ({station: Station}, {variable name: variable}) handles to the variables
+    """
+    stations, variables = {}, {}
+    for station, model, location, quantities in STATIONS:
+        if model != owner:
+            continue
+        handle = stations.setdefault(station, Station(station))
+        for quantity, name in quantities:
+            unit, descr = QUANTITIES[quantity]
+            variables[name] = Variable(name, unit, '%s at the %s (%s)' % (descr, location, station))
+            setattr(handle, quantity, variables[name])
+    return stations, variables
+
+def handles(*variables):
+    """
+    returns {variable name: variable} of variables, the lookup table that
+    replaces searching a model's varkeys by name
+    """
+    return dict((v.key.name, v) for v in variables)
+
 class Engine(Model):
     """
     Tasopt engine model
@@ -17,12 +112,17 @@ class Engine(Model):
     state = state model discretized into N segments
     eng = 0, 1, or 2. 0 = CFM56 vals, 1 = TASOPT 737-800 vals, 2 = GE90 vals, 3 = TASOPT D8.2 vals
     Nfleet - number of discrete missions in a fleet mission optimization problem, default is 0
+    calibration - EngineCalibration to use in place of the one for eng, default is None
+    frozen - True to keep only the off design constraints, for a design fixed by substitution
+    shared - SharedConstants of the mission, whose R and g replace the engine's own, default is None
     """
-    def setup(self, res7, cooling, N, state, eng, Nfleet=0, BLI = False):
+    def setup(self, res7, cooling, N, state, eng, Nfleet=0, BLI = False, calibration = None, frozen = False, shared = None):
         """
         setup method for the engine model
         """
-        self.setvals(eng)
+        if calibration is None:
+            calibration = get_calibration(eng)
+        self.calibration = calibration
         self.compressor = Compressor()
         self.combustor = Combustor()
         self.turbine = Turbine()
@@ -31,14 +131,14 @@ class Engine(Model):
         self.hpcmap = HPCMap()
         self.thrust = Thrust()
         self.sizing = Sizing()
-        self.constants = EngineConstants()
+        self.constants = EngineConstants(shared)
         self.state = state
 
         if Nfleet != 0:
             with Vectorize(Nfleet):
                 with Vectorize(N):
                     #-------------------Specified Thrust or Tt4-----------------------
-                    self.engineP = self.dynamic(self.state, res7, BLI)
+                    self.engineP = self.dynamic(self.state, res7, BLI, cooling)
                     if res7 == 0:
                         #variables for the thrust constraint
                         Fspec = Variable('F_{spec}', 'N', 'Specified Total Thrust')
@@ -49,7 +149,7 @@ class Engine(Model):
         else:
             with Vectorize(N):
                 #-------------------Specified Thrust or Tt4-----------------------
-                self.engineP = self.dynamic(self.state, res7, BLI)
+                self.engineP = self.dynamic(self.state, res7, BLI, cooling)
                 if res7 == 0:
                     #variables for the thrust constraint
                     Fspec = Variable('F_{spec}', 'N', 'Specified Total Thrust')
@@ -59,6 +159,13 @@ class Engine(Model):
             
         models = [self.compressor , self. combustor, self. turbine, self. thrust, self.fanmap, self.lpcmap, self.hpcmap, self.sizing, self.state, self.engineP]
 
+        #handles to the component and performance variables, the constraints
+        #take them from here instead of searching the models' varkeys by name
+        v = {}
+        for model in [self.constants, self.compressor, self.combustor, self.turbine, self.thrust,
+                      self.fanmap, self.lpcmap, self.hpcmap, self.sizing, self.engineP]:
+            v.update(model.v)
+
         #engine weight
         W_engine = Variable('W_{engine}', 'N', 'Weight of a Single Turbofan Engine')
 
@@ -68,106 +175,118 @@ class Engine(Model):
         HTRfSub = Variable('HTR_{f_SUB}', '-', '1 - HTRf^2')
         HTRlpcSub = Variable('HTR_{lpc_SUB}', '-', '1 - HTRlpc^2')
 
+        #on design estimates, constants so presets can be swapped by substitution
+        presetsubs = preset_substitutions(eng)
+        CmhtD = Variable('C_{m_{htD}}', presetsubs['C_{m_{htD}}'], '-', 'On Design HPT Corrected Mass Flow Estimate Ratio')
+        CmltD = Variable('C_{m_{ltD}}', presetsubs['C_{m_{ltD}}'], '-', 'On Design LPT Corrected Mass Flow Estimate Ratio')
+        CmlcD = Variable('C_{m_{lc_D}}', presetsubs['C_{m_{lc_D}}'], '-', 'On Design LPC Corrected Mass Flow Estimate Ratio')
+        CmhcD = Variable('C_{m_{hc_D}}', presetsubs['C_{m_{hc_D}}'], '-', 'On Design HPC Corrected Mass Flow Estimate Ratio')
+        CmfanD = Variable('C_{m_{fan_D}}', presetsubs['C_{m_{fan_D}}'], '-', 'On Design Fan Corrected Mass Flow Estimate Ratio')
+        fDmin = Variable('f_{D_{min}}', presetsubs['f_{D_{min}}'], '-', 'Lower Bound Factor on the On Design Mass Flow Estimates')
+        fDmax = Variable('f_{D_{max}}', presetsubs['f_{D_{max}}'], '-', 'Upper Bound Factor on the On Design Mass Flow Estimates')
+        ffanDmin = Variable('f_{fan_{D_{min}}}', presetsubs['f_{fan_{D_{min}}}'], '-', 'Lower Bound Factor on the On Design Fan Mass Flow Estimate')
+        ffanDmax = Variable('f_{fan_{D_{max}}}', presetsubs['f_{fan_{D_{max}}}'], '-', 'Upper Bound Factor on the On Design Fan Mass Flow Estimate')
+
         #make the constraints
         constraints = []
 
         with SignomialsEnabled():
 
             weight = [
-                  W_engine >= ((self.engineP['m_{total}']/(self.engineP['alphap1']*self.engineP['m_{core}'])*self.engineP['m_{core}'])*.220462)*(1684.5+17.7*(self.engineP['\pi_f']*self.engineP['\pi_{lc}']*self.engineP['\pi_{hc}'])/30+1662.2*(self.engineP['\\alpha']/5)**1.2)*self.engineP['dum2'],
+                  W_engine >= ((v['m_{total}']/(v['alphap1']*v['m_{core}'])*v['m_{core}'])*.220462)*(1684.5+17.7*(v['\pi_f']*v['\pi_{lc}']*v['\pi_{hc}'])/30+1662.2*(v['\\alpha']/5)**1.2)*v['dum2'],
                   ]
 
             diameter = [
-                df == (4 * self.sizing['A_2']/(np.pi * HTRfSub))**.5,
-                dlpc == (4 * self.sizing['A_{2.5}']/(np.pi * HTRlpcSub))**.5,
+                df == (4 * v['A_2']/(np.pi * HTRfSub))**.5,
+                dlpc == (4 * v['A_{2.5}']/(np.pi * HTRlpcSub))**.5,
                 ]
 
             fmix = [
                 #compute f with mixing
-                TCS([self.combustor['eta_{B}'] * self.engineP['f'] * self.combustor['h_f'] >= (1-self.combustor['\\alpha_c'])*self.engineP['h_{t_4}']-(1-self.combustor['\\alpha_c'])*self.engineP['h_{t_3}']+self.combustor['Cp_{fuel}']*self.engineP['f']*(self.engineP['T_{t_4}']-self.combustor['T_{t_f}'])]),
+                TCS([v['eta_{B}'] * v['f'] * v['h_f'] >= (1-v['\\alpha_c'])*v['h_{t_4}']-(1-v['\\alpha_c'])*v['h_{t_3}']+v['Cp_{fuel}']*v['f']*(v['T_{t_4}']-v['T_{t_f}'])]),
                 #compute Tt41...mixing causes a temperature drop
                 #had to include Tt4 here to prevent it from being pushed down to zero
-                SignomialEquality(self.engineP['h_{t_{4.1}}']*self.engineP['fp1'], ((1-self.combustor['\\alpha_c']+self.engineP['f'])*self.engineP['h_{t_4}'] + self.combustor['\\alpha_c']*self.engineP['h_{t_3}'])),
+                SignomialEquality(v['h_{t_{4.1}}']*v['fp1'], ((1-v['\\alpha_c']+v['f'])*v['h_{t_4}'] + v['\\alpha_c']*v['h_{t_3}'])),
 
-                self.engineP['P_{t_4}'] == self.combustor['\pi_{b}'] * self.engineP['P_{t_3}'],   #B.145
+                v['P_{t_4}'] == v['\pi_{b}'] * v['P_{t_3}'],   #B.145
                 ]
 
             fnomix = [
                 #only if mixing = false
                 #compute f without mixing, overestimation if there is cooling
-                TCS([self.combustor['eta_{B}'] * self.engineP['f'] * self.combustor['h_f'] + self.engineP['h_{t_3}'] >= self.engineP['h_{t_4}']]),
+                TCS([v['eta_{B}'] * v['f'] * v['h_f'] + v['h_{t_3}'] >= v['h_{t_4}']]),
 
-                self.engineP['P_{t_4}'] == self.combustor['\pi_{b}'] * self.engineP['P_{t_3}'],   #B.145
+                v['P_{t_4}'] == v['\pi_{b}'] * v['P_{t_3}'],   #B.145
                 ]
 
             shaftpower = [
                 #HPT shafter power balance
                 #SIGNOMIAL   
-                SignomialEquality(self.constants['M_{takeoff}']*self.turbine['\eta_{HPshaft}']*(1+self.engineP['f'])*(self.engineP['h_{t_{4.1}}']-self.engineP['h_{t_{4.5}}']), self.engineP['h_{t_3}'] - self.engineP['h_{t_{2.5}}']),    #B.161
+                SignomialEquality(v['M_{takeoff}']*v['\eta_{HPshaft}']*(1+v['f'])*(v['h_{t_{4.1}}']-v['h_{t_{4.5}}']), v['h_{t_3}'] - v['h_{t_{2.5}}']),    #B.161
 
                 #LPT shaft power balance
                 #SIGNOMIAL  
-                SignomialEquality(self.constants['M_{takeoff}']*self.turbine['\eta_{LPshaft}']*(1+self.engineP['f'])*
-                (self.engineP['h_{t_{4.9}}'] - self.engineP['h_{t_{4.5}}']),-((self.engineP['h_{t_{2.5}}']-self.engineP['h_{t_{1.8}}'])+self.engineP['alphap1']*(self.engineP['h_{t_2.1}'] - self.engineP['h_{t_2}']))),    #B.165
+                SignomialEquality(v['M_{takeoff}']*v['\eta_{LPshaft}']*(1+v['f'])*
+                (v['h_{t_{4.9}}'] - v['h_{t_{4.5}}']),-((v['h_{t_{2.5}}']-v['h_{t_{1.8}}'])+v['alphap1']*(v['h_{t_2.1}'] - v['h_{t_2}']))),    #B.165
                 ]
 
             hptexit = [
                 #HPT Exit states (station 4.5)
-                self.engineP['P_{t_{4.5}}'] == self.engineP['\pi_{HPT}'] * self.engineP['P_{t_{4.1}}'],
-                self.engineP['\pi_{HPT}'] == (self.engineP['T_{t_{4.5}}']/self.engineP['T_{t_{4.1}}'])**(hptexp1),      #turbine efficiency is 0.9
+                v['P_{t_{4.5}}'] == v['\pi_{HPT}'] * v['P_{t_{4.1}}'],
+                v['\pi_{HPT}'] == (v['T_{t_{4.5}}']/v['T_{t_{4.1}}'])**(self.calibration.hptexp1),      #turbine efficiency is 0.9
                 ]
 
             fanmap = [
-                self.engineP['\pi_f']*(1.7/self.fanmap['\pi_{f_D}']) == (1.05*self.engineP['N_f']**.0871)**10,
-                (self.engineP['\pi_f']*(1.7/self.fanmap['\pi_{f_D}']))**(.1) <= 1.1*(1.06 * (self.engineP['m_{tild_f}'])**0.137),
-                (self.engineP['\pi_f']*(1.7/self.fanmap['\pi_{f_D}']))**(.1) >= .9*(1.06 * (self.engineP['m_{tild_f}'])**0.137),
+                v['\pi_f']*(1.7/v['\pi_{f_D}']) == (1.05*v['N_f']**.0871)**10,
+                (v['\pi_f']*(1.7/v['\pi_{f_D}']))**(.1) <= 1.1*(1.06 * (v['m_{tild_f}'])**0.137),
+                (v['\pi_f']*(1.7/v['\pi_{f_D}']))**(.1) >= .9*(1.06 * (v['m_{tild_f}'])**0.137),
 
                 #define mbar
-                self.engineP['m_{f}'] == self.engineP['m_{fan}']*((self.engineP['T_{t_2}']/self.constants['T_{ref}'])**.5)/(self.engineP['P_{t_2}']/self.constants['P_{ref}']),    #B.280
+                v['m_{f}'] == v['m_{fan}']*((v['T_{t_2}']/v['T_{ref}'])**.5)/(v['P_{t_2}']/v['P_{ref}']),    #B.280
 
-                self.engineP['\pi_f'] >= 1,
+                v['\pi_f'] >= 1,
 
                 ]
 
             lpcmap = [
-                self.engineP['\pi_{lc}']*(26/self.lpcmap['\pi_{lc_D}']) == (1.38 * (self.engineP['N_1'])**0.566)**10,
-                self.engineP['\pi_{lc}']*(26/self.lpcmap['\pi_{lc_D}']) <= 1.1*(1.38 * (self.engineP['m_{tild_lc}'])**0.122)**10,
-                self.engineP['\pi_{lc}']*(26/self.lpcmap['\pi_{lc_D}']) >= .9*(1.38 * (self.engineP['m_{tild_lc}'])**0.122)**10,
+                v['\pi_{lc}']*(26/v['\pi_{lc_D}']) == (1.38 * (v['N_1'])**0.566)**10,
+                v['\pi_{lc}']*(26/v['\pi_{lc_D}']) <= 1.1*(1.38 * (v['m_{tild_lc}'])**0.122)**10,
+                v['\pi_{lc}']*(26/v['\pi_{lc_D}']) >= .9*(1.38 * (v['m_{tild_lc}'])**0.122)**10,
 
-                self.engineP['\pi_{lc}'] >= 1,
+                v['\pi_{lc}'] >= 1,
 
                 #define mbar..technially not needed b/c constrained in res 2 and/or 3
-                self.engineP['m_{lc}'] == self.engineP['m_{core}']*((self.engineP['T_{t_2}']/self.constants['T_{ref}'])**.5)/(self.engineP['P_{t_2}']/self.constants['P_{ref}']),    #B.280
+                v['m_{lc}'] == v['m_{core}']*((v['T_{t_2}']/v['T_{ref}'])**.5)/(v['P_{t_2}']/v['P_{ref}']),    #B.280
                 ]
 
             hpcmap = [
-                self.engineP['\pi_{hc}']*(26/self.hpcmap['\pi_{hc_D}']) == (1.35 * (self.engineP['N_2'])**0.566)**10,
-                self.engineP['\pi_{hc}']*(26/self.hpcmap['\pi_{hc_D}']) >= .9*(1.38 * (self.engineP['m_{tild_hc}'])**0.122)**10,
-                self.engineP['\pi_{hc}']*(26/self.hpcmap['\pi_{hc_D}']) <= 1.1*(1.38 * (self.engineP['m_{tild_hc}'])**0.122)**10,
+                v['\pi_{hc}']*(26/v['\pi_{hc_D}']) == (1.35 * (v['N_2'])**0.566)**10,
+                v['\pi_{hc}']*(26/v['\pi_{hc_D}']) >= .9*(1.38 * (v['m_{tild_hc}'])**0.122)**10,
+                v['\pi_{hc}']*(26/v['\pi_{hc_D}']) <= 1.1*(1.38 * (v['m_{tild_hc}'])**0.122)**10,
 
-                self.engineP['m_{hc}'] == self.engineP['m_{core}']*((self.engineP['T_{t_{2.5}}']/self.constants['T_{ref}'])**.5)/(self.engineP['P_{t_{2.5}}']/self.constants['P_{ref}']),    #B.280
+                v['m_{hc}'] == v['m_{core}']*((v['T_{t_{2.5}}']/v['T_{ref}'])**.5)/(v['P_{t_{2.5}}']/v['P_{ref}']),    #B.280
 
-                self.engineP['\pi_{hc}'] >= 1,
+                v['\pi_{hc}'] >= 1,
                 ]
  
             thrust = [
-                self.engineP['P_{t_8}'] == self.engineP['P_{t_7}'], #B.179
-                self.engineP['T_{t_8}'] == self.engineP['T_{t_7}'], #B.180
+                v['P_{t_8}'] == v['P_{t_7}'], #B.179
+                v['T_{t_8}'] == v['T_{t_7}'], #B.180
 
-                self.engineP['P_{t_6}'] == self.engineP['P_{t_5}'], #B.183
-                self.engineP['T_{t_6}'] == self.engineP['T_{t_5}'], #B.184
+                v['P_{t_6}'] == v['P_{t_5}'], #B.183
+                v['T_{t_6}'] == v['T_{t_5}'], #B.184
 
-                TCS([self.engineP['F_6']/(self.constants['M_{takeoff}']*self.engineP['m_{core}']) + (self.engineP['f']+1)*self.state['V'] <= (self.engineP['fp1'])*self.engineP['u_6']]),
+                TCS([v['F_6']/(v['M_{takeoff}']*v['m_{core}']) + (v['f']+1)*self.engineP.state['V'] <= (v['fp1'])*v['u_6']]),
 
                 #ISP
-                self.engineP['I_{sp}'] == self.engineP['F_{sp}']*self.state['a']*(self.engineP['alphap1'])/(self.engineP['f']*self.constants['g']),  #B.192
+                v['I_{sp}'] == v['F_{sp}']*self.engineP.state['a']*(v['alphap1'])/(v['f']*v['g']),  #B.192
                 ]
 
             res1 = [
                 #residual 1 Fan/LPC speed
-                self.engineP['N_f']*self.sizing['G_f'] == self.engineP['N_1'],
-                self.engineP['N_1'] <= 1.1,
-                self.engineP['N_2'] <= 1.1,
+                v['N_f']*v['G_f'] == v['N_1'],
+                v['N_1'] <= 1.1,
+                v['N_2'] <= 1.1,
                 ]
 
                 #note residuals 2 and 3 differ from TASOPT, by replacing mhc with mlc
@@ -176,132 +295,86 @@ class Engine(Model):
 
             res2 = [
                 #residual 2 HPT mass flow
-                self.sizing['m_{htD}'] == (self.engineP['fp1'])*self.engineP['m_{hc}']*self.constants['M_{takeoff}']*
-                (self.engineP['P_{t_{2.5}}']/self.engineP['P_{t_{4.1}}'])*
-                (self.engineP['T_{t_{4.1}}']/self.engineP['T_{t_{2.5}}'])**.5,
+                v['m_{htD}'] == (v['fp1'])*v['m_{hc}']*v['M_{takeoff}']*
+                (v['P_{t_{2.5}}']/v['P_{t_{4.1}}'])*
+                (v['T_{t_{4.1}}']/v['T_{t_{2.5}}'])**.5,
                 ]
 
             res3 = [
                 #residual 3 LPT mass flow
-                (self.engineP['fp1'])*self.engineP['m_{lc}']*self.constants['M_{takeoff}']*
-                (self.engineP['P_{t_{1.8}}']/self.engineP['P_{t_{4.5}}'])*
-                (self.engineP['T_{t_{4.5}}']/self.engineP['T_{t_{1.8}}'])**.5
-                == self.sizing['m_{ltD}'],
+                (v['fp1'])*v['m_{lc}']*v['M_{takeoff}']*
+                (v['P_{t_{1.8}}']/v['P_{t_{4.5}}'])*
+                (v['T_{t_{4.5}}']/v['T_{t_{1.8}}'])**.5
+                == v['m_{ltD}'],
                 ]
 
             res4 = [
                 #residual 4
-                (self.engineP['P_{7}']/self.engineP['P_{t_7}']) == (self.engineP['T_{7}']/self.engineP['T_{t_7}'])**(3.5),
-                (self.engineP['T_{7}']/self.engineP['T_{t_7}'])**-1 >= 1 + .2 * self.engineP['M_7']**2,
+                (v['P_{7}']/v['P_{t_7}']) == (v['T_{7}']/v['T_{t_7}'])**(3.5),
+                (v['T_{7}']/v['T_{t_7}'])**-1 >= 1 + .2 * v['M_7']**2,
                 ]
 
             res5 = [
                 #residual 5 core nozzle mass flow
-                (self.engineP['P_{5}']/self.engineP['P_{t_5}']) == (self.engineP['T_{5}']/self.engineP['T_{t_5}'])**(3.583979),
-                (self.engineP['T_{5}']/self.engineP['T_{t_5}'])**-1 >= 1 + .2 * self.engineP['M_5']**2,
+                (v['P_{5}']/v['P_{t_5}']) == (v['T_{5}']/v['T_{t_5}'])**(3.583979),
+                (v['T_{5}']/v['T_{t_5}'])**-1 >= 1 + .2 * v['M_5']**2,
                 ]
 
 
             massflux = [
                 #compute core mass flux
-                self.constants['M_{takeoff}'] * self.engineP['m_{core}'] == self.engineP['\\rho_5'] * self.sizing['A_5'] * self.engineP['u_5']/(self.engineP['fp1']),
+                v['M_{takeoff}'] * v['m_{core}'] == v['\\rho_5'] * v['A_5'] * v['u_5']/(v['fp1']),
 
                 #compute fan mas flow
-                self.engineP['m_{fan}'] == self.engineP['\\rho_7']*self.sizing['A_7']*self.engineP['u_7'],
+                v['m_{fan}'] == v['\\rho_7']*v['A_7']*v['u_7'],
 
-                self.engineP['m_{total}'] >= self.engineP['m_{fan}'] + self.engineP['m_{core}'],
+                v['m_{total}'] >= v['m_{fan}'] + v['m_{core}'],
                 ]
 
             #component area sizing
             fanarea = [
                 #fan area
-                self.engineP['P_2'] == self.engineP['P_{t_2}']*(self.engineP['hold_{2}'])**(-3.512),
-                self.engineP['T_2'] == self.engineP['T_{t_2}'] * self.engineP['hold_{2}']**-1,
-                self.sizing['A_2'] == self.engineP['m_{fan}']/(self.engineP['\\rho_2']*self.engineP['u_2']),     #B.198
+                v['P_2'] == v['P_{t_2}']*(v['hold_{2}'])**(-3.512),
+                v['T_2'] == v['T_{t_2}'] * v['hold_{2}']**-1,
+                v['A_2'] == v['m_{fan}']/(v['\\rho_2']*v['u_2']),     #B.198
                 ]
 
             HPCarea = [
                 #HPC area
-                self.engineP['P_{2.5}'] == self.engineP['P_{t_{2.5}}']*(self.engineP['hold_{2.5}'])**(-3.824857),
-                self.engineP['T_{2.5}'] == self.engineP['T_{t_{2.5}}'] * self.engineP['hold_{2.5}']**-1,
-                self.sizing['A_{2.5}'] == self.engineP['m_{core}']/(self.engineP['\\rho_2.5']*self.engineP['u_{2.5}']),     #B.203
+                v['P_{2.5}'] == v['P_{t_{2.5}}']*(v['hold_{2.5}'])**(-3.824857),
+                v['T_{2.5}'] == v['T_{t_{2.5}}'] * v['hold_{2.5}']**-1,
+                v['A_{2.5}'] == v['m_{core}']/(v['\\rho_2.5']*v['u_{2.5}']),     #B.203
                 ]
 
-            if eng == 0:
-                """CFM56 vals"""
-                onDest = [
-                    #estimate relevant on design values
-                    self.sizing['m_{htD}'] <= 1.3*self.engineP['fp1']*self.constants['M_{takeoff}']*self.sizing['m_{coreD}'] *((1400.0/288)**.5)/(1527/101.325),
-                    self.sizing['m_{htD}'] >= .7*self.engineP['fp1']*self.constants['M_{takeoff}']*self.sizing['m_{coreD}'] *((1400.0/288)**.5)/(1527/101.325),
-                    self.sizing['m_{ltD}'] <= 1.3*self.engineP['fp1']*self.constants['M_{takeoff}']*self.sizing['m_{coreD}'] *((1038.8/288)**.5)/(589.2/101.325),
-                    self.sizing['m_{ltD}'] >= .7*self.engineP['fp1']*self.constants['M_{takeoff}']*self.sizing['m_{coreD}'] *((1038.8/288)**.5)/(589.2/101.325),
-                    self.lpcmap['m_{lc_D}'] >= .7*self.sizing['m_{coreD}']*((292.57/288)**.5)/(84.25/101.325),
-                    self.lpcmap['m_{lc_D}'] <= 1.3*self.sizing['m_{coreD}'] *((292.57/288)**.5)/(84.25/101.325),
-                    self.hpcmap['m_{hc_D}'] >= .7*self.sizing['m_{coreD}'] *((362.47/288)**.5)/(163.02/101.325),
-                    self.hpcmap['m_{hc_D}'] <= 1.3*self.sizing['m_{coreD}'] *((362.47/288)**.5)/(163.02/101.325),
-                    self.fanmap['\\bar{m}_{fan_{D}}'] >= .7 * self.sizing['\\alpha_{OD}'] * self.sizing['m_{coreD}'] *((250.0/288)**.5)/(50/101.325),
-                    self.fanmap['\\bar{m}_{fan_{D}}'] <= 1.3 * self.sizing['\\alpha_{OD}'] * self.sizing['m_{coreD}']* ((250.0/288)**.5)/(50/101.325),
-                    ]
-            if eng == 1:
-                """TASOPT 737-800 vals"""
-                onDest = [
-                    self.sizing['m_{htD}'] <= 1.3*self.engineP['fp1']*self.constants['M_{takeoff}']*self.sizing['m_{coreD}'] *((1400.0/288)**.5)/(1498/101.325),
-                    self.sizing['m_{htD}'] >= .7*self.engineP['fp1']*self.constants['M_{takeoff}']*self.sizing['m_{coreD}']*((1400.0/288)**.5)/(1498/101.325),
-                    self.sizing['m_{ltD}'] <= 1.3*self.engineP['fp1']*self.constants['M_{takeoff}']*self.sizing['m_{coreD}'] *((1144.8/288)**.5)/(788.5/101.325),
-                    self.sizing['m_{ltD}'] >= .7*self.engineP['fp1']*self.constants['M_{takeoff}']*self.sizing['m_{coreD}']*((1144.8/288)**.5)/(788.5/101.325),
-                    self.lpcmap['m_{lc_D}'] >= .7*self.sizing['m_{coreD}']*((294.5/288)**.5)/(84.25/101.325),
-                    self.lpcmap['m_{lc_D}'] <= 1.3*self.sizing['m_{coreD}'] *((294.5/288)**.5)/(84.25/101.325),
-                    self.hpcmap['m_{hc_D}'] >= .7*self.sizing['m_{coreD}'] *((482.7/288)**.5)/(399.682/101.325),
-                    self.hpcmap['m_{hc_D}'] <= 1.3*self.sizing['m_{coreD}'] *((482.7/288)**.5)/(399.682/101.325),
-                    self.fanmap['\\bar{m}_{fan_{D}}'] >= .7 * self.sizing['\\alpha_{OD}'] * self.sizing['m_{coreD}'] *((250.0/288)**.5)/(50/101.325),
-                    self.fanmap['\\bar{m}_{fan_{D}}'] <= 1.3 * self.sizing['\\alpha_{OD}'] * self.sizing['m_{coreD}']* ((250.0/288)**.5)/(50/101.325),
-                    ]
-            if eng == 2:
-                """GE90 vals"""
-                onDest = [
-                    #estimate relevant on design values
-                    self.sizing['m_{htD}'] <= 1.3*self.engineP['fp1']*self.constants['M_{takeoff}']*self.sizing['m_{coreD}'] *((1400.0/288)**.5)/(1527/101.325),
-                    self.sizing['m_{htD}'] >= .7*self.engineP['fp1']*self.constants['M_{takeoff}']*self.sizing['m_{coreD}'] *((1400.0/288)**.5)/(1527/101.325),
-                    self.sizing['m_{ltD}'] <= 1.3*self.engineP['fp1']*self.constants['M_{takeoff}']*self.sizing['m_{coreD}'] *((1038.8/288)**.5)/(589.2/101.325),
-                    self.sizing['m_{ltD}'] >= .7*self.engineP['fp1']*self.constants['M_{takeoff}']*self.sizing['m_{coreD}'] *((1038.8/288)**.5)/(589.2/101.325),
-                    self.lpcmap['m_{lc_D}'] >= .7*self.sizing['m_{coreD}']*((292.57/288)**.5)/(84.25/101.325),
-                    self.lpcmap['m_{lc_D}'] <= 1.3*self.sizing['m_{coreD}'] *((292.57/288)**.5)/(84.25/101.325),
-                    self.hpcmap['m_{hc_D}'] >= .7*self.sizing['m_{coreD}'] *((362.47/288)**.5)/(163.02/101.325),
-                    self.hpcmap['m_{hc_D}'] <= 1.3*self.sizing['m_{coreD}'] *((362.47/288)**.5)/(163.02/101.325),
-                    self.fanmap['\\bar{m}_{fan_{D}}'] >= .3 * self.sizing['\\alpha_{OD}'] * self.sizing['m_{coreD}'] *((250.0/288)**.5)/(50/101.325),
-                    self.fanmap['\\bar{m}_{fan_{D}}'] <= 1.7 * self.sizing['\\alpha_{OD}'] * self.sizing['m_{coreD}']* ((250.0/288)**.5)/(50/101.325),
+            onDest = [
+                #estimate relevant on design values
+                v['m_{htD}'] <= fDmax*v['fp1']*v['M_{takeoff}']*v['m_{coreD}']*CmhtD,
+                v['m_{htD}'] >= fDmin*v['fp1']*v['M_{takeoff}']*v['m_{coreD}']*CmhtD,
+                v['m_{ltD}'] <= fDmax*v['fp1']*v['M_{takeoff}']*v['m_{coreD}']*CmltD,
+                v['m_{ltD}'] >= fDmin*v['fp1']*v['M_{takeoff}']*v['m_{coreD}']*CmltD,
+                v['m_{lc_D}'] >= fDmin*v['m_{coreD}']*CmlcD,
+                v['m_{lc_D}'] <= fDmax*v['m_{coreD}']*CmlcD,
+                v['m_{hc_D}'] >= fDmin*v['m_{coreD}']*CmhcD,
+                v['m_{hc_D}'] <= fDmax*v['m_{coreD}']*CmhcD,
+                v['\\bar{m}_{fan_{D}}'] >= ffanDmin * v['\\alpha_{OD}'] * v['m_{coreD}']*CmfanD,
+                v['\\bar{m}_{fan_{D}}'] <= ffanDmax * v['\\alpha_{OD}'] * v['m_{coreD}']*CmfanD,
                 ]
 
-            if eng == 3:
-                """TASOPT D8.2 vals"""
-                onDest = [
-                    self.sizing['m_{htD}'] <= 1.3*self.engineP['fp1']*self.constants['M_{takeoff}']*self.sizing['m_{coreD}'] *((1400.0/288)**.5)/(1598.32/101.325),
-                    self.sizing['m_{htD}'] >= .7*self.engineP['fp1']*self.constants['M_{takeoff}']*self.sizing['m_{coreD}']*((1400.0/288)**.5)/(1598.32/101.325),
-                    self.sizing['m_{ltD}'] <= 1.3*self.engineP['fp1']*self.constants['M_{takeoff}']*self.sizing['m_{coreD}'] *((1142.6/288)**.5)/(835.585/101.325),
-                    self.sizing['m_{ltD}'] >= .7*self.engineP['fp1']*self.constants['M_{takeoff}']*self.sizing['m_{coreD}']*((1142.6/288)**.5)/(835.585/101.325),
-                    self.lpcmap['m_{lc_D}'] >= .7*self.sizing['m_{coreD}']*((289.77/288)**.5)/(80.237/101.325),
-                    self.lpcmap['m_{lc_D}'] <= 1.3*self.sizing['m_{coreD}'] *((289.77/288)**.5)/( 80.237/101.325),
-                    self.hpcmap['m_{hc_D}'] >= .7*self.sizing['m_{coreD}'] *((481.386/288)**.5)/(399.58/101.325),
-                    self.hpcmap['m_{hc_D}'] <= 1.3*self.sizing['m_{coreD}'] *((481.386/288)**.5)/(399.58/101.325),
-                    self.fanmap['\\bar{m}_{fan_{D}}'] >= .7 * self.sizing['\\alpha_{OD}'] * self.sizing['m_{coreD}'] *((250.0/288)**.5)/(50/101.325),
-                    self.fanmap['\\bar{m}_{fan_{D}}'] <= 1.3 * self.sizing['\\alpha_{OD}'] * self.sizing['m_{coreD}']* ((250.0/288)**.5)/(50/101.325),
-                    ]
-
         if res7 == 0:
             res7list = [
                 #residual 7
                 #option #1, constrain the engine's thrust
-                self.engineP['F'] == Fspec,
+                v['F'] == Fspec,
                 ]
             if cooling == True:
                 Tt41max = Variable('T_{t_{4.1_{max}}}', 'K', 'Max turbine inlet temperature')
                 res7list.extend([
-                    self.engineP['T_{t_{4.1}}']  <= Tt41max,
+                    v['T_{t_{4.1}}']  <= Tt41max,
                     ])
             else:
                 Tt4max = Variable('T_{t_{4_{max}}}', 'K', 'Max turbine inlet temperature')
                 res7list.extend([
-                    self.engineP['T_{t_4}'] <= Tt4max,
+                    v['T_{t_4}'] <= Tt4max,
                     ])
     
         if res7 == 1:
@@ -309,13 +382,13 @@ class Engine(Model):
                 res7list = [
                     #residual 7
                     #option #2 constrain the burner exit temperature
-                    self.engineP['T_{t_{4.1}}'] == Tt4spec,  #B.265
+                    v['T_{t_{4.1}}'] == Tt4spec,  #B.265
                     ]
             if cooling == False:
                 res7list = [
                     #residual 7
                     #option #2 constrain the burner exit temperature
-                    self.engineP['T_{t_4}'] == Tt4spec,  #B.265
+                    v['T_{t_4}'] == Tt4spec,  #B.265
                     ]
 
         if cooling == True:
@@ -323,260 +396,48 @@ class Engine(Model):
 
         if cooling == False:
             constraints = [weight, diameter, fnomix, shaftpower, hptexit, fanmap, lpcmap, hpcmap, thrust, res1, res2, res3, res4, res5, massflux, fanarea, HPCarea, onDest, res7list]
+
+        #a frozen design needs neither its sizing outputs nor the on design estimates
+        if frozen:
+            constraints = [c for c in constraints if c is not weight and c is not diameter and c is not onDest]
         
         return models, constraints
 
-    def dynamic(self, state, res7, BLI):
+    def dynamic(self, state, res7, BLI, cooling = True):
         """
         creates an instance of the engine performance model
         """
-        return EnginePerformance(self, state, res7, BLI)
-
-    def setvals(self, eng):
-        global fgamma, lpcgamma, hpcgamma, ccgamma, lptgamma, hptgamma, faneta, fexp1, LPCeta, lpcexp1, \
-               HPCeta, hpcexp1, ccexp1, ccexp2, LPTeta, lptexp1, HPTeta, hptexp1, sta8gamma, fanexexp, sta6gamma, turbexexp
-        #goption sets the gamma value
-        goption = 1
-        if eng == 0:
-            """set CFM56 validation exponents"""
-            if goption == 1:
-                fgamma = 1.401
-                lpcgamma = 1.398
-                hpcgamma = 1.354
-                ccgamma = 1.313    #gamma value of air @ 1400 K
-                lptgamma = 1.354
-                hptgamma = 1.318
-            if goption == 0:
-                fgamma = 1.401
-                lpcgamma = 1.398
-                hpcgamma = 1.354
-                ccgamma = 1.313    #gamma value of air @ 1400 K
-                lptgamma = 1.3060
-                hptgamma = 1.2987
-            #Fan
-            faneta = .9005
-            fexp1 = (fgamma - 1)/(faneta * fgamma)
-
-            #LPC
-            LPCeta = .9306
-            lpcexp1 = (lpcgamma - 1)/(LPCeta * lpcgamma)
-
-            #HPC
-            HPCeta = .9030
-            hpcexp1 = (hpcgamma - 1)/(HPCeta * hpcgamma)
-
-            #combustor cooling exponents
-            ccexp1 = ccgamma/(1 - ccgamma)
-            ccexp2 = -ccgamma/(1 - ccgamma)
-
-            #Turbines
-            #LPT
-            LPTeta = .8851
-            lptexp1 = lptgamma * LPTeta / (lptgamma - 1)
-
-            #HPT
-            HPTeta = .8731
-            hptexp1 = hptgamma * HPTeta / (hptgamma - 1)
-
-            #Exhaust and Thrust
-            #station 8, fan exit
-            sta8gamma = 1.4
-            fanexexp = (sta8gamma - 1)/ sta8gamma
-
-            #station 6, turbine exit
-            sta6gamma = 1.387
-            turbexexp = (sta6gamma - 1) / sta6gamma
-
-        if eng == 1:
-            """set TASOPT validation exponents"""
-            if goption == 1:
-                fgamma = 1.401
-                lpcgamma = 1.398
-                hpcgamma = 1.354
-                ccgamma = 1.313    #gamma value of air @ 1400 K
-                lptgamma = 1.354
-                hptgamma = 1.318
-            if goption == 0:
-                fgamma = 1.401
-                lpcgamma = 1.398
-                hpcgamma = 1.354
-                ccgamma = 1.313    #gamma value of air @ 1400 K
-                lptgamma = 1.3060
-                hptgamma = 1.2987
-
-            #Fan
-            faneta = .8948
-            fexp1 = (fgamma - 1)/(faneta * fgamma)
-
-            #LPC
-            LPCeta = .88
-            lpcexp1 = (lpcgamma - 1)/(LPCeta * lpcgamma)
-
-            #HPC
-            HPCeta = .87
-            hpcexp1 = (hpcgamma - 1)/(HPCeta * hpcgamma)
-
-            #combustor cooling exponents
-            ccexp1 = ccgamma/(1 - ccgamma)
-            ccexp2 = -ccgamma/(1 - ccgamma)
-
-            #Turbines
-            #LPT
-            LPTeta = .889
-            lptexp1 = lptgamma * LPTeta / (lptgamma - 1)
-
-            #HPT
-            HPTeta = .899
-            hptexp1 = hptgamma * HPTeta / (hptgamma - 1)
-
-            #Exhaust and Thrust
-            #station 8, fan exit
-            sta8gamma = 1.4
-            fanexexp = (sta8gamma - 1)/ sta8gamma
-
-            #station 6, turbine exit
-            sta6gamma = 1.387
-            turbexexp = (sta6gamma - 1) / sta6gamma
-
-        if eng == 3:
-            #option used for a D8 engine
-            if goption == 1:
-                fgamma = 1.401
-                lpcgamma = 1.398
-                hpcgamma = 1.354
-                ccgamma = 1.313    #gamma value of air @ 1400 K
-                lptgamma = 1.354
-                hptgamma = 1.318
-            if goption == 0:
-                fgamma = 1.401
-                lpcgamma = 1.398
-                hpcgamma = 1.354
-                ccgamma = 1.313    #gamma value of air @ 1400 K
-                lptgamma = 1.3060
-                hptgamma = 1.2987
-
-            #Fan
-            faneta = .93
-            fgamma = 1.4
-
-            fexp1 = (fgamma - 1)/(faneta * fgamma)
-
-            #LPC
-            lpcgamma = 1.398
-            LPCeta = .92
-
-            lpcexp1 = (lpcgamma - 1)/(LPCeta * lpcgamma)
-
-            #HPC
-            HPCeta = .89
-            hpcgamma = 1.354
-
-            hpcexp1 = (hpcgamma - 1)/(HPCeta * hpcgamma)
-
-            #combustor cooling exponents
-            ccgamma = 1.313    #gamma value of air @ 1400 K
-
-            ccexp1 = ccgamma/(1 - ccgamma)
-            ccexp2 = -ccgamma/(1 - ccgamma)
-
-            #Turbines
-            #LPT
-            lptgamma = 1.354
-            LPTeta = .92
-            lptexp1 = lptgamma * LPTeta / (lptgamma - 1)
-
-            #HPT
-            hptgamma = 1.318
-            HPTeta = .91
-            hptexp1 = hptgamma * HPTeta / (hptgamma - 1)
-
-            #Exhaust and Thrust
-            #station 8, fan exit
-            sta8gamma = 1.4
-            fanexexp = (sta8gamma - 1)/ sta8gamma
-
-            #station 6, turbine exit
-            sta6gamma = 1.387
-            turbexexp = (sta6gamma - 1) / sta6gamma
-
-        if eng == 2:
-            if goption == 1:
-                fgamma = 1.401
-                lpcgamma = 1.398
-                hpcgamma = 1.354
-                ccgamma = 1.313    #gamma value of air @ 1400 K
-                lptgamma = 1.354
-                hptgamma = 1.318
-            if goption == 0:
-                fgamma = 1.401
-                lpcgamma = 1.398
-                hpcgamma = 1.354
-                ccgamma = 1.313    #gamma value of air @ 1400 K
-                lptgamma = 1.3060
-                hptgamma = 1.2987
-
-            #Fan
-            faneta = .9153
-            fgamma = 1.4
-
-            fexp1 = (fgamma - 1)/(faneta * fgamma)
-
-            #LPC
-            lpcgamma = 1.398
-            LPCeta = .9037
-
-            lpcexp1 = (lpcgamma - 1)/(LPCeta * lpcgamma)
-
-            #HPC
-            HPCeta = .9247
-            hpcgamma = 1.354
-
-            hpcexp1 = (hpcgamma - 1)/(HPCeta * hpcgamma)
-
-            #combustor cooling exponents
-            ccgamma = 1.313    #gamma value of air @ 1400 K
-
-            ccexp1 = ccgamma/(1 - ccgamma)
-            ccexp2 = -ccgamma/(1 - ccgamma)
-
-            #Turbines
-            #LPT
-            lptgamma = 1.354
-            LPTeta = .9228
-            lptexp1 = lptgamma * LPTeta / (lptgamma - 1)
-
-            #HPT
-            hptgamma = 1.318
-            HPTeta = .9121
-            hptexp1 = hptgamma * HPTeta / (hptgamma - 1)
-
-            #Exhaust and Thrust
-            #station 8, fan exit
-            sta8gamma = 1.4
-            fanexexp = (sta8gamma - 1)/ sta8gamma
-
-            #station 6, turbine exit
-            sta6gamma = 1.387
-            turbexexp = (sta6gamma - 1) / sta6gamma
-
+        return EnginePerformance(self, state, res7, BLI, cooling)
 
 class EnginePerformance(Model):
     """
     Engine performance model
     """
-    def setup(self, engine, state, res7, BLI, **kwargs):
+    def setup(self, engine, state, res7, BLI, cooling = True, **kwargs):
+        #the flight state variables are looked up once and handed to the
+        #subcomponent performance models in place of the state model
+        self.state = dict((name, state[name]) for name in ['T_{atm}', 'P_{atm}', 'V', 'a'])
 
         #create the subcomponent performance models
-        self.compP = engine.compressor.dynamic(engine.constants, state, BLI)
-        self.combP = engine.combustor.dynamic(engine.constants, state)
-        self.turbineP = engine.turbine.dynamic(engine.constants)
-        self.thrustP = engine.thrust.dynamic(engine.constants, state)
+        self.compP = engine.compressor.dynamic(engine.constants, self.state, BLI, engine.calibration)
+        #without the cooling flow model station 4.1 is station 4, nothing mixes in
+        self.combP = engine.combustor.dynamic(engine.constants, self.state, engine.calibration, mixing = cooling)
+        self.turbineP = engine.turbine.dynamic(engine.constants, engine.calibration)
+        self.thrustP = engine.thrust.dynamic(engine.constants, self.state, engine.calibration)
         self.fanmapP = engine.fanmap.dynamic(engine.constants)
         self.lpcmapP = engine.lpcmap.dynamic(engine.constants)
         self.hpcmapP = engine.hpcmap.dynamic(engine.constants)
-        self.sizingP = engine.sizing.dynamic(engine.constants, engine.compressor, engine.fanmap, engine.lpcmap, engine.hpcmap, state, res7)
+        self.sizingP = engine.sizing.dynamic(engine.constants, engine.compressor, engine.fanmap, engine.lpcmap, engine.hpcmap, self.state, res7)
 
         models = [self.compP, self.combP, self.turbineP, self.thrustP, self.fanmapP, self.lpcmapP, self.hpcmapP, self.sizingP]
+
+        #handles to the variables of every subcomponent, the stations split
+        #between the stagnation and static states of two models are joined
+        self.v, self.stations = {}, {}
+        for model in models:
+            self.v.update(model.v)
+            for station, handle in getattr(model, 'stations', {}).items():
+                self.stations.setdefault(station, Station(station)).__dict__.update(handle.__dict__)
     
         return models
 
@@ -584,13 +445,17 @@ class EngineConstants(Model):
     """
     Class of constants used in the engine model
     """
-    def setup(self):
-        #-----------------------air properties------------------
-        #ambient
-        R = Variable('R', 287, 'J/kg/K', 'R')
-
-        #gravity
-        g = Variable('g', 9.81, 'm/(s^2)', 'Gravitational Acceleration')
+    def setup(self, shared = None):
+        if shared is None:
+            #-----------------------air properties------------------
+            #ambient
+            R = Variable('R', 287, 'J/kg/K', 'R')
+
+            #gravity
+            g = Variable('g', 9.81, 'm/(s^2)', 'Gravitational Acceleration')
+        else:
+            #the scalar constants of the whole mission
+            R, g = shared['R'], shared['g']
         
         #-------------------------reference temp and pressure--------------------
         Tref = Variable('T_{ref}', 'K', 'Reference Stagnation Temperature')
@@ -599,6 +464,8 @@ class EngineConstants(Model):
         #---------------------------efficiencies & takeoffs-----------------------
         Mtakeoff = Variable('M_{takeoff}', '-', '1 Minus Percent mass flow loss for de-ice, pressurization, etc.')
 
+        self.v = handles(R, g, Tref, Pref, Mtakeoff)
+
 class Compressor(Model):
     """"
     Compressor model
@@ -616,56 +483,28 @@ class Compressor(Model):
         gammaAir = Variable('gamma_{air}', 1.4, '-', 'Specific Heat Ratio for Ambient Air')
         Cpair = Variable('Cp_{air}', 1003, 'J/kg/K', "Cp Value for Air at 250K")
 
-    def dynamic(self, engine, state, BLI):
+        self.v = handles(Cp1, Cp2, pid, pifn, gammaAir, Cpair)
+
+    def dynamic(self, engine, state, BLI, calibration):
         """
         creates an instance of the compressor performance model
         """
-        return CompressorPerformance(self, engine, state, BLI) 
+        return CompressorPerformance(self, engine, state, BLI, calibration)
 
 class CompressorPerformance(Model):
     """
     combustor perfomrance constraints
     """
-    def setup(self, comp, engine, state, BLI):
+    def setup(self, comp, engine, state, BLI, calibration):
         self.comp = comp
         self.engine = engine
+        self.calibration = calibration
         
-        #define new variables
-        #--------------------------free stream stagnation states--------------------------
-        Pt0 = Variable('P_{t_0}', 'kPa', 'Free Stream Stagnation Pressure')
-        Tt0 = Variable('T_{t_0}', 'K', 'Free Stream Stagnation Temperature')
-        ht0 = Variable('h_{t_0}', 'J/kg', 'Free Stream Stagnation Enthalpy')
-
-        #--------------------------diffuser exit stagnation states------------------------
-        Pt18 = Variable('P_{t_{1.8}}', 'kPa', 'Stagnation Pressure at the Diffuser Exit (1.8)')
-        Tt18 = Variable('T_{t_{1.8}}', 'K', 'Stagnation Temperature at the Diffuser Exit (1.8)')
-        ht18 = Variable('h_{t_{1.8}}', 'J/kg', 'Stagnation Enthalpy at the Diffuser Exit (1.8)')
-        
-        #--------------------------fan inlet (station 2) stagnation states---------------------------
-        Pt2 = Variable('P_{t_2}', 'kPa', 'Stagnation Pressure at the Fan Inlet (2)')
-        Tt2 = Variable('T_{t_2}', 'K', 'Stagnation Temperature at the Fan Inlet (2)')
-        ht2 = Variable('h_{t_2}', 'J/kg', 'Stagnation Enthalpy at the Fan Inlet (2)')
-
-        #--------------------------fan exit (station 2.1) stagnation states---------------------
-        Pt21 = Variable('P_{t_2.1}', 'kPa', 'Stagnation Pressure at the Fan Exit (2.1)')
-        Tt21 = Variable('T_{t_2.1}', 'K', 'Stagnation Temperature at the Fan Exit (2.1)')
-        ht21 = Variable('h_{t_2.1}', 'J/kg', 'Stagnation Enthalpy at the Fan Exit (2.1)')
-
-        #-------------------------LPC exit (station 2.5) stagnation states-------------------
-        Pt25 = Variable('P_{t_{2.5}}', 'kPa', 'Stagnation Pressure at the LPC Exit (2.5)')
-        Tt25 = Variable('T_{t_{2.5}}', 'K', 'Stagnation Temperature at the LPC Exit (2.5)')
-        ht25 = Variable('h_{t_{2.5}}', 'J/kg', 'Stagnation Enthalpy at the LPC Exit (2.5)')
-
-        #--------------------------HPC exit stagnation states (station 3)---------------------
-        Pt3 = Variable('P_{t_3}', 'kPa', 'Stagnation Pressure at the HPC Exit (3)')
-        Tt3 = Variable('T_{t_3}', 'K', 'Stagnation Temperature at the HPC Exit (3)')
-        ht3 = Variable('h_{t_3}', 'J/kg', 'Stagnation Enthalpy at the HPC Exit (3)')
-
-        #---------------------------fan nozzle exit (station 7) stagnation states---------------
-        Pt7 = Variable('P_{t_7}', 'kPa', 'Stagnation Pressure at the Fan Nozzle Exit (7)')
-        Tt7 = Variable('T_{t_7}', 'K', 'Stagnation Temperature at the Fan Nozzle Exit (7)')
-        ht7 = Variable('h_{t_7}', 'J/kg', 'Stagnation Enthalpy at the Fan Nozzle Exit (7)')
+        #station variables
+        self.stations, self.v = station_variables('compressor')
+        s0, s18, s2, s21, s25, s3, s7 = [self.stations[i] for i in ['0', '1.8', '2', '2.1', '2.5', '3', '7']]
 
+        #define new variables
         #------------------------turbo machinery pressure ratios--------------
         pif = Variable('\pi_f', '-', 'Fan Pressure Ratio')
         pilc = Variable('\pi_{lc}', '-', 'LPC Pressure Ratio')
@@ -674,58 +513,59 @@ class CompressorPerformance(Model):
         hold25 = Variable('hold_{2.5}', '-', '1+(gamma-1)/2 * M_2.5**2')
         hold2 = Variable('hold_{2}', '-', '1+(gamma-1)/2 * M_2**2')
         c1 = Variable('c1', '-', 'Constant in Stagnation Eqn')
+        self.v.update(handles(pif, pilc, pihc, hold25, hold2, c1))
 
         diffuser = [
             #free stream stagnation values
              #https://www.grc.nasa.gov/www/k-12/airplane/isentrop.html
-            Tt0 == state["T_{atm}"] / (c1) ** (-1),             #https://www.grc.nasa.gov/www/k-12/airplane/isentrop.html
-            ht0 == self.comp['Cp_{air}'] * Tt0,
+            s0.Tt == state["T_{atm}"] / (c1) ** (-1),             #https://www.grc.nasa.gov/www/k-12/airplane/isentrop.html
+            s0.ht == self.comp.v['Cp_{air}'] * s0.Tt,
 
             #diffuser exit stagnation values (station 1.8)
-            Pt18 == self.comp['\pi_{d}'] * Pt0,  #B.113
-            Tt18 == Tt0,        #B.114
-            ht18 == ht0,        #B.115
+            s18.Pt == self.comp.v['\pi_{d}'] * s0.Pt,  #B.113
+            s18.Tt == s0.Tt,        #B.114
+            s18.ht == s0.ht,        #B.115
             ]
 
         if BLI:
             pdrop = Variable('p_{drop}', 1.2, '-', '1 plus stagnation pressure drop percent due to BLI')
             diffuser.extend([
-                Pt0 == pdrop*state["P_{atm}"] / (c1 ** -3.5),
+                s0.Pt == pdrop*state["P_{atm}"] / (c1 ** -3.5),
                 ])
 
         if not BLI:
             diffuser.extend([
-                Pt0 == state["P_{atm}"] / (c1 ** -3.5),
+                s0.Pt == state["P_{atm}"] / (c1 ** -3.5),
                 ])
 
         fan = [
             #fan inlet constraints (station 2)
-            Tt2 == Tt18,    #B.120
-            ht2 == ht18,    #B.121
-            Pt2 == Pt18,
+            s2.Tt == s18.Tt,    #B.120
+            s2.ht == s18.ht,    #B.121
+            s2.Pt == s18.Pt,
                         
             #fan exit constraints (station 2.1)
-            Pt21 == pif * Pt2,  #16.50
-            Tt21 == Tt2 * pif ** (fexp1),   #16.50
-            ht21 == self.comp['Cp_{air}'] * Tt21,   #16.50
+            s21.Pt == pif * s2.Pt,  #16.50
+            s21.Tt == s2.Tt * pif ** (calibration.fexp1),   #16.50
+            s21.ht == self.comp.v['Cp_{air}'] * s21.Tt,   #16.50
                        
             #fan nozzle exit (station 7)
-            Pt7 == self.comp['\pi_{fn}'] * Pt21,     #B.125
-            Tt7 == Tt21,    #B.126
-            ht7 == ht21,    #B.127
+            s7.Pt == self.comp.v['\pi_{fn}'] * s21.Pt,     #B.125
+            s7.Tt == s21.Tt,    #B.126
+            s7.ht == s21.ht,    #B.127
             ]
 
         lpc = [
             #LPC exit (station 2.5)
-            Pt25 == pilc * pif * Pt2,
-            Tt25 == Tt2 * (pif*pilc) ** (lpcexp1),
-            ht25 == Tt25 * self.comp['Cp_{1}'],
+            s25.Pt == pilc * pif * s2.Pt,
+            s25.Tt == s2.Tt * (pif*pilc) ** (calibration.lpcexp1),
+            s25.ht == s25.Tt * self.comp.v['Cp_{1}'],
             ]
 
         hpc = [
-            Pt3 == pihc * Pt25,
-            Tt3 == Tt25 * pihc ** (hpcexp1),
-            ht3 == self.comp['Cp_{2}'] * Tt3
+            s3.Pt == pihc * s25.Pt,
+            s3.Tt == s25.Tt * pihc ** (calibration.hpcexp1),
+            s3.ht == self.comp.v['Cp_{2}'] * s3.Tt
             ]
         
         return diffuser, fan, lpc, hpc
@@ -756,44 +596,35 @@ class Combustor(Model):
 
         Ttf = Variable('T_{t_f}', 'K', 'Incoming Fuel Total Temperature')
 
-    def dynamic(self, engine, state):
+        self.v = handles(Cpc, Cpfuel, hf, pib, etaB, ac, ruc, hold4a, Ttf)
+
+    def dynamic(self, engine, state, calibration, mixing = True):
         """
         creates an instance of the fan map performance model
         """
-        return CombustorPerformance(self, engine, state) 
+        return CombustorPerformance(self, engine, state, calibration, mixing)
 
 class CombustorPerformance(Model):
     """
     combustor perfomrance constraints
     """
-    def setup(self, combustor, engine, state, mixing = True):
+    def setup(self, combustor, engine, state, calibration, mixing = True):
         self.combustor = combustor
         self.engine = engine
+        self.calibration = calibration
 
-        #define new variables
-        #--------------------------combustor exit (station 4) stagnation states------------------
-        Pt4 = Variable('P_{t_4}', 'kPa', 'Stagnation Pressure at the Combustor Exit (4)')
-        ht4 = Variable('h_{t_4}', 'J/kg', 'Stagnation Enthalpy at the Combustor Exit (4)')
-        Tt4 = Variable('T_{t_4}', 'K', 'Combustor Exit (Station 4) Stagnation Temperature')
-
-        #--------------------High Pressure Turbine inlet state variables (station 4.1)-------------------------
-        Pt41 = Variable('P_{t_{4.1}}', 'kPa', 'Stagnation Pressure at the Turbine Inlet (4.1)')
-        Tt41 = Variable('T_{t_{4.1}}', 'K', 'Stagnation Temperature at the Turbine Inlet (4.1)')
-        ht41 = Variable('h_{t_{4.1}}', 'J/kg', 'Stagnation Enthalpy at the Turbine Inlet (4.1)')
-        u41 = Variable('u_{4.1}', 'm/s', 'Flow Velocity at Station 4.1')
-        T41 = Variable('T_{4.1}', 'K', 'Static Temperature at the Turbine Inlet (4.1)')
+        #station variables
+        self.stations, self.v = station_variables('combustor')
+        s4, s41, s4a = [self.stations[i] for i in ['4', '4.1', '4a']]
 
         #------------------------Variables for cooling flow model---------------------------
         #define the f plus one variable, limits the number of signomials
-        #variables for station 4a
-        u4a = Variable('u_{4a}', 'm/s', 'Flow Velocity at Station 4a')
-        M4a = Variable('M_{4a}', '-', 'User Specified Station 4a Mach #')
-        P4a = Variable('P_{4a}', 'kPa', 'Static Pressure at Station 4a (4a)')
         uc = Variable('u_c', 'm/s', 'Cooling Airflow Speed at Station 4a')
 
         #---------------------------fuel flow fraction f--------------------------------
         f = Variable('f', '-', 'Fuel Air Mass Flow Fraction')
         fp1 = Variable('fp1', '-', 'f + 1')
+        self.v.update(handles(uc, f, fp1))
 
         #make the constraints
         constraints = []        
@@ -802,38 +633,38 @@ class CombustorPerformance(Model):
             #combustor constraints
             constraints.extend([
                 #flow through combustor
-                ht4 == self.combustor['Cp_c'] * Tt4,
+                s4.ht == self.combustor.v['Cp_c'] * s4.Tt,
 
                 #compute the station 4.1 enthalpy
-                ht41 == self.combustor['Cp_c'] * Tt41,
+                s41.ht == self.combustor.v['Cp_c'] * s41.Tt,
 
                 #making f+1 GP compatible --> needed for convergence
                 SignomialEquality(fp1,f+1),
 
                 #investigate doing this with a substitution
-                M4a == .1025,
+                s4a.M == .1025,
                 ])
                      
             #mixing constraints
             if mixing == True:
                 constraints.extend([
-                    fp1*u41 == (u4a*(fp1)*self.combustor['\\alpha_c']*uc)**.5,
+                    fp1*s41.u == (s4a.u*(fp1)*self.combustor.v['\\alpha_c']*uc)**.5,
                     #this is a stagnation relation...need to fix it to not be signomial
-                    SignomialEquality(T41, Tt41-.5*(u41**2)/self.combustor['Cp_c']),
+                    SignomialEquality(s41.T, s41.Tt-.5*(s41.u**2)/self.combustor.v['Cp_c']),
                     
                     #here we assume no pressure loss in mixing so P41=P4a
-                    Pt41 == P4a*(Tt41/T41)**(ccexp1),
+                    s41.Pt == s4a.P*(s41.Tt/s41.T)**(calibration.ccexp1),
                     
                     #compute station 4a quantities, assumes a gamma value of 1.313 (air @ 1400K)
-                    u4a == M4a*((1.313*self.engine['R']*Tt4)**.5)/self.combustor['hold_{4a}'],
-                    uc == self.combustor['r_{uc}']*u4a,
-                    P4a == Pt4*self.combustor['hold_{4a}']**(ccexp2),
+                    s4a.u == s4a.M*((1.313*self.engine.v['R']*s4.Tt)**.5)/self.combustor.v['hold_{4a}'],
+                    uc == self.combustor.v['r_{uc}']*s4a.u,
+                    s4a.P == s4.Pt*self.combustor.v['hold_{4a}']**(calibration.ccexp2),
                     ])
             #combustor constraints with no mixing
             else:
                 constraints.extend([
-                    Pt41 == Pt4,
-                    Tt41 == Tt4,
+                    s41.Pt == s4.Pt,
+                    s41.Tt == s4.Tt,
                     ])
                 
         return constraints
@@ -855,39 +686,32 @@ class Turbine(Model):
         etaHPshaft = Variable('\eta_{HPshaft}', '-', 'Power Transmission Efficiency of High Pressure Shaft, Smears in Losses for Electrical Power')
         etaLPshaft = Variable('\eta_{LPshaft}', '-', 'Power Transmission Efficiency of Low Pressure Shaft, Smeras in Losses for Electrical Power')
 
-    def dynamic(self, engine):
+        self.v = handles(Cpt1, Cpt2, pitn, etaHPshaft, etaLPshaft)
+
+    def dynamic(self, engine, calibration):
         """
         creates an instance of the fan map performance model
         """
-        return TurbinePerformance(self, engine)
+        return TurbinePerformance(self, engine, calibration)
 
 class TurbinePerformance(Model):
     """
     combustor perfomrance constraints
     """
-    def setup(self, turbine, engine):
+    def setup(self, turbine, engine, calibration):
         self.turbine = turbine
         self.engine = engine
+        self.calibration = calibration
 
-        #define new variables
-        #------------------LPT inlet stagnation states (station 4.5)------------------
-        ht45 = Variable('h_{t_{4.5}}', 'J/kg', 'Stagnation Enthalpy at the HPT Exit (4.5)')
-        Pt45 = Variable('P_{t_{4.5}}', 'kPa', 'Stagnation Pressure at the HPT Exit (4.5)')
-        Tt45 = Variable('T_{t_{4.5}}', 'K', 'Stagnation Temperature at the HPT Exit (4.5)')
-
-        #-------------------HPT exit (station 4.5) stagnation states--------------------
-        Pt49 = Variable('P_{t_{4.9}}', 'kPa', 'Stagnation Pressure at the HPTExit (49)')
-        Tt49 = Variable('T_{t_{4.9}}', 'K', 'Stagnation Temperature at the HPT Exit (49)')
-        ht49 = Variable('h_{t_{4.9}}', 'J/kg', 'Stagnation Enthalpy at the HPT Exit (49)')
+        #station variables
+        self.stations, self.v = station_variables('turbine')
+        s45, s49, s5 = [self.stations[i] for i in ['4.5', '4.9', '5']]
 
+        #define new variables
         #------------------------turbo machinery pressure ratios--------------
         pihpt = Variable('\pi_{HPT}', '-', 'HPT Pressure Ratio')
         pilpt = Variable('\pi_{LPT}', '-', 'LPT Pressure Ratio')
-
-        #------------------turbine nozzle exit stagnation states (station 5)------------
-        Pt5 = Variable('P_{t_5}', 'kPa', 'Stagnation Pressure at the Turbine Nozzle Exit (5)')
-        Tt5 = Variable('T_{t_5}', 'K', 'Stagnation Temperature at the Turbine Nozzle Exit (5)')
-        ht5 = Variable('h_{t_5}', 'J/kg', 'Stagnation Enthalpy at the Turbine Nozzle Exit (5)')
+        self.v.update(handles(pihpt, pilpt))
 
         #make the constraints
         constraints = []
@@ -895,17 +719,17 @@ class TurbinePerformance(Model):
         #turbine constraints
         constraints.extend([
             #HPT Exit states (station 4.5)
-            ht45 == self.turbine['Cp_t1'] * Tt45,
+            s45.ht == self.turbine.v['Cp_t1'] * s45.Tt,
 
             #LPT Exit States
-            Pt49 == pilpt * Pt45,
-            pilpt == (Tt49/Tt45)**(lptexp1),    #turbine efficiency is 0.9
-            ht49 == self.turbine['Cp_t2'] * Tt49,
+            s49.Pt == pilpt * s45.Pt,
+            pilpt == (s49.Tt/s45.Tt)**(calibration.lptexp1),    #turbine efficiency is 0.9
+            s49.ht == self.turbine.v['Cp_t2'] * s49.Tt,
 
             #turbine nozzle exit states
-            Pt5 == self.turbine['\\pi_{tn}'] * Pt49, #B.167
-            Tt5 == Tt49,    #B.168
-            ht5 == ht49     #B.169
+            s5.Pt == self.turbine.v['\\pi_{tn}'] * s49.Pt, #B.167
+            s5.Tt == s49.Tt,    #B.168
+            s5.ht == s49.ht     #B.169
             ])
 
         return constraints
@@ -920,6 +744,8 @@ class FanMap(Model):
         mFanBarD = Variable('\\bar{m}_{fan_{D}}', 'kg/s', 'Fan On-Design Corrected Mass Flow')
         piFanD = Variable('\pi_{f_D}', '-', 'On-Design Pressure Ratio')
 
+        self.v = handles(mFanBarD, piFanD)
+
     def dynamic(self, engine):
         """
         creates an instance of the fan map performance model
@@ -944,6 +770,7 @@ class FanMapPerformance(Model):
         #Speed Variables...by setting the design speed to be 1 since only ratios are
         #imporant I was able to drop out all the other speeds
         Nf = Variable('N_f', '-', 'Fan Speed')
+        self.v = handles(mf, mtildf, Nf)
 
         #make the constraints
         constraints = []
@@ -951,7 +778,7 @@ class FanMapPerformance(Model):
         #fan map
         constraints.extend([
             #define mtild
-            mtildf == mf/self.fanmap['\\bar{m}_{fan_{D}}'],   #B.282
+            mtildf == mf/self.fanmap.v['\\bar{m}_{fan_{D}}'],   #B.282
             ])
 
         return constraints
@@ -966,6 +793,8 @@ class LPCMap(Model):
         mlcD = Variable('m_{lc_D}', 'kg/s', 'On Design LPC Corrected Mass Flow')
         pilcD = Variable('\pi_{lc_D}', '-', 'LPC On-Design Pressure Ratio')
 
+        self.v = handles(mlcD, pilcD)
+
     def dynamic(self, engine):
         """
         creates an instance of the HPC map performance model
@@ -990,6 +819,7 @@ class LPCMapPerformance(Model):
         #Speed Variables...by setting the design speed to be 1 since only ratios are
         #imporant I was able to drop out all the other speeds
         N1 = Variable('N_1', '-', 'LPC Speed')
+        self.v = handles(mlc, mtildlc, N1)
 
         #make the constraints
         constraints = []
@@ -997,7 +827,7 @@ class LPCMapPerformance(Model):
         #LPC map
         constraints.extend([
             #define mtild
-            mtildlc == mlc/self.lpcmap['m_{lc_D}'],   #B.282
+            mtildlc == mlc/self.lpcmap.v['m_{lc_D}'],   #B.282
         ])
 
         return constraints
@@ -1013,6 +843,8 @@ class HPCMap(Model):
         pihcD = Variable('\pi_{hc_D}', '-', 'HPC On-Design Pressure Ratio')
         mhcD = Variable('m_{hc_D}', 'kg/s', 'On Design HPC Corrected Mass Flow')
 
+        self.v = handles(mhcD, pihcD)
+
     def dynamic(self, engine):
         """
         creates an instance of the HPC map performance model
@@ -1037,6 +869,7 @@ class HPCMapPerformance(Model):
         #Speed Variables...by setting the design speed to be 1 since only ratios are
         #imporant I was able to drop out all the other speeds
         N2 = Variable('N_2', '-', 'HPC Speed')
+        self.v = handles(mhc, mtildhc, N2)
 
         #make the constraints
         constraints = []
@@ -1044,7 +877,7 @@ class HPCMapPerformance(Model):
         #HPC map
         constraints.extend([
             #define mtild
-            mtildhc == mhc/self.hpcmap['m_{hc_D}'],   #B.282
+            mtildhc == mhc/self.hpcmap.v['m_{hc_D}'],   #B.282
             ])
 
         return constraints
@@ -1062,37 +895,28 @@ class Thrust(Model):
         #max by pass ratio
         alpha_max = Variable('\\alpha_{max}', '-', 'By Pass Ratio')
 
-    def dynamic(self, engine, state):
+        self.v = handles(Cptex, Cpfanex, alpha_max)
+
+    def dynamic(self, engine, state, calibration):
         """
         creates an instance of the thrust performance model
         """
-        return ThrustPerformance(self, engine, state)
+        return ThrustPerformance(self, engine, state, calibration)
 
 class ThrustPerformance(Model):
     """
     thrust performacne model
     """
-    def setup(self, thrust, engine, state):
+    def setup(self, thrust, engine, state, calibration):
         self.thrust = thrust
         self.engine = engine
+        self.calibration = calibration
         
-        #define new variables
-        #------------------fan exhaust (station 8) statge variables------------
-        P8 = Variable('P_8', 'kPa', 'Fan Exhaust Static Pressure')
-        Pt8 = Variable('P_{t_8}', 'kPa', 'Fan Exhaust Stagnation Pressure')
-        ht8 = Variable('h_{t_8}', 'J/kg', 'Fan Exhaust Stagnation Enthalpy')
-        h8 = Variable('h_8', 'J/kg', 'Fan Exhasut Static Enthalpy')
-        Tt8 = Variable('T_{t_8}', 'K', 'Fan Exhaust Stagnation Temperature (8)')
-        T8 = Variable('T_{8}', 'K', 'Fan Exhaust Sttic Temperature (8)')
-
-        #-----------------core exhaust (station 6) state variables-------------
-        P6 = Variable('P_6', 'kPa', 'Core Exhaust Static Pressure')
-        Pt6 = Variable('P_{t_6}', 'kPa', 'Core Exhaust Stagnation Pressure')
-        Tt6 = Variable('T_{t_6}', 'K', 'Core Exhaust Stagnation Temperature (6)')
-        T6 = Variable('T_{6}', 'K', 'Core Exhaust Static Temperature (6)')
-        ht6 = Variable('h_{t_6}', 'J/kg', 'Core Exhaust Stagnation Enthalpy')
-        h6 = Variable('h_6', 'J/kg', 'Core Exhasut Static Enthalpy')
+        #station variables
+        self.stations, self.v = station_variables('thrust')
+        s6, s8 = self.stations['6'], self.stations['8']
 
+        #define new variables
         #thrust variables
         F8 = Variable('F_8', 'N', 'Fan Thrust')
         F6 = Variable('F_6', 'N', 'Core Thrust')
@@ -1101,10 +925,6 @@ class ThrustPerformance(Model):
         Isp = Variable('I_{sp}', 's', 'Specific Impulse')
         TSFC = Variable('TSFC', '1/hr', 'Thrust Specific Fuel Consumption')
 
-        #exhaust speeds
-        u6 = Variable('u_6', 'm/s', 'Core Exhaust Velocity')
-        u8 = Variable('u_8', 'm/s', 'Fan Exhaust Velocity')
-
         #mass flows
         mCore = Variable('m_{core}', 'kg/s', 'Core Mass Flow')
         mFan = Variable('m_{fan}', 'kg/s', 'Fan Mass Flow')
@@ -1114,6 +934,7 @@ class ThrustPerformance(Model):
         alphap1 = Variable('alphap1', '-', '1 plus BPR')
 
         hold = Variable('hold', '-', 'unecessary hold var')
+        self.v.update(handles(F8, F6, F, Fsp, Isp, TSFC, mCore, mFan, alpha, alphap1, hold))
 
         #constraints
         constraints = []
@@ -1121,32 +942,32 @@ class ThrustPerformance(Model):
         with SignomialsEnabled():
             #exhaust and thrust constraints
             constraints.extend([
-                P8 == state["P_{atm}"],
-                h8 == self.thrust['Cp_fex'] * T8,
-                TCS([u8**2 + 2*h8 <= 2*ht8]),
-                (P8/Pt8)**(fanexexp) == T8/Tt8,
-                ht8 == self.thrust['Cp_fex'] * Tt8,
+                s8.P == state["P_{atm}"],
+                s8.h == self.thrust.v['Cp_fex'] * s8.T,
+                TCS([s8.u**2 + 2*s8.h <= 2*s8.ht]),
+                (s8.P/s8.Pt)**(calibration.fanexexp) == s8.T/s8.Tt,
+                s8.ht == self.thrust.v['Cp_fex'] * s8.Tt,
                 
                 #core exhaust
-                P6 == state["P_{atm}"],   #B.4.11 intro
+                s6.P == state["P_{atm}"],   #B.4.11 intro
  
-                (P6/Pt6)**(turbexexp) == T6/Tt6,
-                TCS([u6**2 + 2*h6 <= 2*ht6]),
-                h6 == self.thrust['Cp_tex'] * T6,
-                ht6 == self.thrust['Cp_tex'] * Tt6,
+                (s6.P/s6.Pt)**(calibration.turbexexp) == s6.T/s6.Tt,
+                TCS([s6.u**2 + 2*s6.h <= 2*s6.ht]),
+                s6.h == self.thrust.v['Cp_tex'] * s6.T,
+                s6.ht == self.thrust.v['Cp_tex'] * s6.Tt,
 
-                u6 >= state['V'],
-                u8 >= state['V'],
+                s6.u >= state['V'],
+                s8.u >= state['V'],
 
                 #constrain the new BPR
                 alpha == mFan / mCore,
                 hold == alphap1,
                 SignomialEquality(hold, alpha + 1),
-                alpha <= self.thrust['\\alpha_{max}'],
+                alpha <= self.thrust.v['\\alpha_{max}'],
 
                 #overall thrust values
-                TCS([F8/(alpha * mCore) + state['V'] <= u8]),  #B.188
-                TCS([F6/(mCore) + state['V'] <= u6]),  #B.188, unneeded
+                TCS([F8/(alpha * mCore) + state['V'] <= s8.u]),  #B.188
+                TCS([F6/(mCore) + state['V'] <= s6.u]),  #B.188, unneeded
                 
                 #SIGNOMIAL
                 TCS([F <= F6 + F8]),
@@ -1182,6 +1003,8 @@ class Sizing(Model):
 
         mCoreD = Variable('m_{coreD}', 'kg/s', 'Estimated on Design Mass Flow')  
 
+        self.v = handles(Gf, mhtD, mltD, alpha_max, A2, A25, A5, A7, mCoreD)
+
         #constraints
         constraints = []
 
@@ -1210,47 +1033,18 @@ class SizingPerformance(Model):
         self.lpcmap = lpcmap
         self.hpcmap = hpcmap
 
+        #station variables
+        self.stations, self.v = station_variables('sizing')
+        s2, s25, s5, s7 = [self.stations[i] for i in ['2', '2.5', '5', '7']]
+
         #new variables
-        #exhaust mach numbers
-        a5 = Variable('a_5', 'm/s', 'Speed of Sound at Station 5')
-        a7 = Variable('a_7', 'm/s', 'Speed of Sound at Station 7')
-        
         #mass flows
         mtot = Variable('m_{total}', 'kg/s', 'Total Engine Mass Flux')
-        
-        #-------------------fan face variables---------------------
-        rho2 = Variable('\\rho_2', 'kg/m^3', 'Air Static Density at Fan Face')
-        T2 = Variable('T_2', 'K', 'Air Static Temperature at Fan Face')
-        P2 = Variable('P_2', 'kPa', 'Air Static Pressure at Fan Face')
-        u2 = Variable('u_2', 'm/s', 'Air Speed at Fan Face')
-        h2 = Variable('h_{2}', 'J/kg', 'Static Enthalpy at the Fan Inlet (2)')
-        M2 = Variable('M_2', '-', 'Fan Face/LPC Face Axial Mach Number')
-
-        #------------------HPC face variables---------------------
-        rho25 = Variable('\\rho_2.5', 'kg/m^3', 'Static Air Density at HPC Face')
-        T25 = Variable('T_{2.5}', 'K', 'Static Air Temperature at HPC Face')
-        P25 = Variable('P_{2.5}', 'kPa', 'Static Air Pressure at HPC Face')
-        u25 = Variable('u_{2.5}', 'm/s', 'Air Speed at HPC Face')
-        h25 = Variable('h_{2.5}', 'J/kg', 'Static Enthalpy at the LPC Exit (2.5)')
-        M25 = Variable('M_{2.5}', '-', 'HPC Face Axial Mach Number')
-
-        #fan exhuast states
-        P7 = Variable('P_{7}', 'kPa', 'Fan Exhaust Static Pressure (7)')
-        T7 = Variable('T_{7}', 'K', 'Static Temperature at the Fan Nozzle Exit (7)')
-        u7 = Variable('u_7', 'm/s', 'Station 7 Exhaust Velocity')
-        M7 = Variable('M_7', '-', 'Station 7 Mach Number')
-        rho7 = Variable('\\rho_7', 'kg/m^3', 'Air Static Density at Fam Exhaust Exit (7)')
-
-        #core exhaust states
-        P5 = Variable('P_{5}', 'kPa', 'Core Exhaust Static Pressure (5)')
-        T5 = Variable('T_{5}', 'K', 'Static Temperature at the Turbine Nozzle Exit (5)')
-        M5 = Variable('M_5', '-', 'Station 5 Mach Number')
-        u5 = Variable('u_5', 'm/s', 'Station 5 Exhaust Velocity')
-        rho5 = Variable('\\rho_5', 'kg/m^3', 'Air Static Density at Core Exhaust Exit (5)')
 
         #dummy vairables for pint purposes
         dum = Variable("dum", 781, 'J/kg/K')
         dum2 = Variable('dum2', 1, 'm/s')
+        self.v.update(handles(mtot, dum, dum2))
 
         #constraints
         constraints = []
@@ -1258,31 +1052,31 @@ class SizingPerformance(Model):
         #sizing constraints that hold the engine together
         constraints.extend([
             #residual 4
-            P7 >= state["P_{atm}"],
-            M7 <= 1,
-            u7 >= state['V'],
-            a7 == (1.4*self.engine['R']*T7)**.5,
-            a7*M7 == u7,
-            rho7 == P7/(self.engine['R']*T7),
+            s7.P >= state["P_{atm}"],
+            s7.M <= 1,
+            s7.u >= state['V'],
+            s7.a == (1.4*self.engine.v['R']*s7.T)**.5,
+            s7.a*s7.M == s7.u,
+            s7.rho == s7.P/(self.engine.v['R']*s7.T),
             
             #residual 5 core nozzle mass flow
-            P5 >= state["P_{atm}"],
-            M5 <= 1,
-            u5 >= state['V'],
-            a5 == (1.387*self.engine['R']*T5)**.5,
-            a5*M5 == u5,
-            rho5 == P5/(self.engine['R']*T5),
+            s5.P >= state["P_{atm}"],
+            s5.M <= 1,
+            s5.u >= state['V'],
+            s5.a == (1.387*self.engine.v['R']*s5.T)**.5,
+            s5.a*s5.M == s5.u,
+            s5.rho == s5.P/(self.engine.v['R']*s5.T),
             
             #component area sizing
             #fan area
-            h2 == self.compressor['Cp_{1}'] * T2,
-            rho2 == P2/(self.engine['R'] * T2),  #B.196
-            u2 == M2*(self.compressor['Cp_{1}']*self.engine['R']*T2/(dum))**.5,  #B.197
+            s2.h == self.compressor.v['Cp_{1}'] * s2.T,
+            s2.rho == s2.P/(self.engine.v['R'] * s2.T),  #B.196
+            s2.u == s2.M*(self.compressor.v['Cp_{1}']*self.engine.v['R']*s2.T/(dum))**.5,  #B.197
 
             #HPC area
-            h25 == self.compressor['Cp_{2}'] * T25,
-            rho25 == P25/(self.engine['R']*T25),
-            u25 == M25*(self.compressor['Cp_{2}']*self.engine['R']*T25/(dum))**.5,   #B.202
+            s25.h == self.compressor.v['Cp_{2}'] * s25.T,
+            s25.rho == s25.P/(self.engine.v['R']*s25.T),
+            s25.u == s25.M*(self.compressor.v['Cp_{2}']*self.engine.v['R']*s25.T/(dum))**.5,   #B.202
         ])
 
         return constraints
@@ -1490,350 +1284,18 @@ class TestMissionD82(Model):
 
         return engineclimb, enginecruise
 
-def test():
+def validation_substitutions(eng):
     """
-    Test each different engine
+    returns the substitutions used to validate engine eng against
+    its reference data
+    eng = 0 is CFM56, 1 is TASOPT 737-800, 2 is GE90, 3 is TASOPT D8.2
     """
-    #dict of initial guesses
-    x0 = {
-        'W_{engine}': 1e4*units('N'),
-        'P_{t_0}': 1e1*units('kPa'),
-        'T_{t_0}': 1e3*units('K'),
-        'h_{t_0}': 1e6*units('J/kg'),
-        'P_{t_{1.8}}': 1e1*units('kPa'),
-        'T_{t_{1.8}}': 1e3*units('K'),
-        'h_{t_{1.8}}': 1e6*units('J/kg'),
-        'P_{t_2}': 1e1*units('kPa'),
-        'T_{t_2}': 1e3*units('K'),
-        'h_{t_2}': 1e6*units('J/kg'),
-        'P_{t_2.1}': 1e3*units('K'),
-        'T_{t_2.1}': 1e3*units('K'),
-        'h_{t_2.1}': 1e6*units('J/kg'),
-        'P_{t_{2.5}}': 1e3*units('kPa'),
-        'T_{t_{2.5}}': 1e3*units('K'),
-        'h_{t_{2.5}}': 1e6*units('J/kg'),
-        'P_{t_3}': 1e4*units('kPa'),
-        'T_{t_3}': 1e4*units('K'),
-        'h_{t_3}': 1e7*units('J/kg'),
-        'P_{t_7}': 1e2*units('kPa'),
-        'T_{t_7}': 1e3*units('K'),
-        'h_{t_7}': 1e6*units('J/kg'),
-        'P_{t_4}': 1e4*units('kPa'),
-        'h_{t_4}': 1e7*units('J/kg'),
-        'T_{t_4}': 1e4*units('K'),
-        'P_{t_{4.1}}': 1e4*units('kPa'),
-        'T_{t_{4.1}}': 1e4*units('K'),
-        'h_{t_{4.1}}': 1e7*units('J/kg'),
-        'T_{4.1}': 1e4*units('K'),
-        'f': 1e-2,
-        'P_{4a}': 1e4*units('kPa'),
-        'h_{t_{4.5}}': 1e6*units('J/kg'),
-        'P_{t_{4.5}}': 1e3*units('kPa'),
-        'T_{t_{4.5}}': 1e4*units('K'),
-        'P_{t_{4.9}}': 1e2*units('kPa'),
-        'T_{t_{4.9}}': 1e3*units('K'),
-        'h_{t_{4.9}}': 1e6*units('J/kg'),
-        '\pi_{HPT}': 1e-1,
-        '\pi_{LPT}': 1e-1,
-        'P_{t_5}': 1e2*units('kPa'),
-        'T_{t_5}': 1e3*units('K'),
-        'h_{t_5}': 1e6*units('J/kg'),
-        'P_8': 1e2*units('kPa'),
-        'P_{t_8}': 1e2*units('kPa'),
-        'h_{t_8}': 1e6*units('J/kg'),
-        'h_8': 1e6*units('J/kg'),
-        'T_{t_8}': 1e3*units('K'),
-        'T_{8}': 1e3*units('K'),
-        'P_6': 1e2*units('kPa'),
-        'P_{t_6}': 1e2*units('kPa'),
-        'T_{t_6': 1e3*units('K'),
-        'h_{t_6}': 1e6*units('J/kg'),
-        'h_6': 1e6*units('J/kg'),
-        'F_8': 1e2 * units('kN'),
-        'F_6': 1e2 * units('kN'),
-        'F': 1e2 * units('kN'),
-        'F_{sp}': 1e-1,
-        'TSFC': 1e-1,
-        'I_{sp}': 1e4*units('s'),
-        'u_6': 1e3*units('m/s'),
-        'u_8': 1e3*units('m/s'),
-        'm_{core}': 1e2*units('kg/s'),
-        'm_{fan}': 1e3*units('kg/s'),
-        '\\alpha': 1e1,
-        'alphap1': 1e1,
-        'm_{total}': 1e3*units('kg/s'),
-        'T_2': 1e3*units('K'),
-        'P_2': 1e2*units('kPa'),
-        'u_2': 1e3*units('m/s'),
-        'h_{2}': 1e6*units('J/kg'),
-        'T_{2.5}': 1e3*units('K'),
-        'P_{2.5}': 1e2*units('kPa'),
-        'u_{2.5}': 1e3*units('m/s'),
-        'h_{2.5}': 1e6*units('J/kg'),
-        'P_{7}': 1e2*units('kPa'),
-        'T_{7}': 1e3*units('K'),
-        'u_7': 1e3*units('m/s'),
-        'P_{5}': 1e2*units('kPa'),
-        'T_{5}': 1e3*units('K'),
-        'u_5': 1e3*units('m/s'),
-        'P_{atm}': 1e2*units('kPa'),
-        'T_{atm}': 1e3*units('K'),
-        'V': 1e3*units('knot'),
-        'a': 1e3*units('m/s'),
-    }
-
-    #test the CFM engine
-
-    with Vectorize(2):
-        state = TestState()
-
-    engine = Engine(0, True, 2, state, 0)
-
-    mission = TestMissionCFM(engine)
-
-    M4a = .1025
-    fan = 1.685
-    lpc  = 1.935
-    hpc = 9.369
-
-    substitutions = {
-            '\\pi_{tn}': .98,
-            '\pi_{b}': .94,
-            '\pi_{d}': .98,
-            '\pi_{fn}': .98,
-            'T_{ref}': 288.15,
-            'P_{ref}': 101.325,
-            '\eta_{HPshaft}': .97,
-            '\eta_{LPshaft}': .97,
-            'eta_{B}': .9827,
-
-            '\pi_{f_D}': fan,
-            '\pi_{hc_D}': hpc,
-            '\pi_{lc_D}': lpc,
-
-            '\\alpha_{OD}': 5.105,
-            '\\alpha_{max}': 5.105,
-
-            'hold_{4a}': 1+.5*(1.313-1)*M4a**2,
-            'r_{uc}': .01,
-            '\\alpha_c': .19036,
-            'T_{t_f}': 435,
-
-            'M_{takeoff}': .9556,
-
-            'G_f': 1,
-
-            'h_f': 43.003,
-
-            'Cp_t1': 1280,
-            'Cp_t2': 1184,
-            'Cp_c': 1216,
-
-            'HTR_{f_SUB}': 1-.3**2,
-            'HTR_{lpc_SUB}': 1 - 0.6**2,
-           }
-    m = Model((10*engine.engineP.thrustP['TSFC'][0]+engine.engineP.thrustP['TSFC'][1]) * (engine['W_{engine}'] * units('1/hr/N'))**.00001, [engine, mission], substitutions, x0=x0)
-    m.substitutions.update(substitutions)
-    sol = m.localsolve(verbosity = 0)
-    
-    #test the TASOPT engine
-
-    with Vectorize(3):
-        state = TestState()
-
-    engine = Engine(0, True, 3, state, 1)
-
-    mission = TestMissionTASOPT(engine)
-
-    M4a = .1025
-    fan = 1.685
-    lpc  = 4.744
-    hpc = 3.75
- 
-    substitutions = {
-            '\\pi_{tn}': .989,
-            '\pi_{b}': .94,
-            '\pi_{d}': .998,
-            '\pi_{fn}': .98,
-            'T_{ref}': 288.15,
-            'P_{ref}': 101.325,
-            '\eta_{HPshaft}': .97,
-            '\eta_{LPshaft}': .97,
-            'eta_{B}': .9827,
-
-            '\pi_{f_D}': fan,
-            '\pi_{hc_D}': hpc,
-            '\pi_{lc_D}': lpc,
-            '\\alpha_{max}': 5.1362,
-
-            'hold_{4a}': 1+.5*(1.313-1)*M4a**2,
-            'r_{uc}': .5,
-            '\\alpha_c': .19036,
-            'T_{t_f}': 435,
-
-            'M_{takeoff}': .972,
-
-            'G_f': 1,
-
-            'h_f': 43.003,
-
-            'Cp_t1': 1280,
-            'Cp_t2': 1184,
-            'Cp_c': 1216,
-
-            'HTR_{f_SUB}': 1-.3**2,
-            'HTR_{lpc_SUB}': 1 - 0.6**2,
-           }
-    m = Model((10*engine.engineP.thrustP['TSFC'][2]+engine.engineP.thrustP['TSFC'][1]+engine.engineP.thrustP['TSFC'][0]) * (engine['W_{engine}'] * units('1/hr/N'))**.00001, [engine, mission], substitutions, x0=x0)
-    m.substitutions.update(substitutions)
-    sol = m.localsolve(verbosity = 0)
-        
-    #test the GE90 engine
-
-    with Vectorize(2):
-        state = TestState()
-
-    engine = Engine(0, True, 2, state, 2)
-
-    mission = TestMissionGE90(engine)
-
-    M4a = .1025
-    fan = 1.58
-    lpc  = 1.26
-    hpc = 20.033
-    
-    substitutions = {
-        '\pi_{tn}': .98,
-        '\pi_{b}': .94,
-        '\pi_{d}': .98,
-        '\pi_{fn}': .98,
-        'T_{ref}': 288.15,
-        'P_{ref}': 101.325,
-        '\eta_{HPshaft}': .98,
-        '\eta_{LPshaft}': .98,
-        'eta_{B}': .9970,
-
-        '\pi_{f_D}': 1.58,
-        '\pi_{hc_D}': 20.033,
-        '\pi_{lc_D}': 1.26,
-
-        '\\alpha_{max}': 8.7877,
-
-        'hold_{4a}': 1+.5*(1.313-1)*M4a**2,#sol('hold_{4a}'),
-        'r_{uc}': .1,
-        '\\alpha_c': .14,
-        'T_{t_f}': 435,
-
-        'M_{takeoff}': .955,
-
-        'G_f': 1,
-
-        'h_f': 43.003,
-
-        'Cp_t1': 1280,
-        'Cp_t2': 1184,
-        'Cp_c': 1216,
-
-        'HTR_{f_SUB}': 1-.3**2,
-        'HTR_{lpc_SUB}': 1 - 0.6**2,
-        }
-    m = Model((10*engine.engineP.thrustP['TSFC'][0]+engine.engineP.thrustP['TSFC'][1]) * (engine['W_{engine}'] * units('1/hr/N'))**.00001, [engine, mission], substitutions, x0=x0)
-    m.substitutions.update(substitutions)
-    sol = m.localsolve(verbosity = 0)
-
-    #test the D8.2 engine
-    with Vectorize(2):
-        state = TestState()
-
-    engine = Engine(0, True, 2, state, 3)
-
-    mission = TestMissionD82(engine)
-
-    M4a = .1025
-    fan = 1.60474
-    lpc  = 4.98
-    hpc = 35/8
-
-    substitutions = {
-        # Engine substitutions
-        '\\pi_{tn}': .995,
-        '\pi_{b}': .94,
-        '\pi_{d}': .995,
-        '\pi_{fn}': .985,
-        'T_{ref}': 288.15,
-        'P_{ref}': 101.325,
-        '\eta_{HPshaft}': .97,
-        '\eta_{LPshaft}': .97,
-        'eta_{B}': .9827,
-
-        '\pi_{f_D}': fan,
-        '\pi_{hc_D}': hpc,
-        '\pi_{lc_D}': lpc,
-
-        '\\alpha_{OD}': 6.97,
-        '\\alpha_{max}': 6.97,
-
-        'hold_{4a}': 1+.5*(1.313-1)*M4a**2,
-        'r_{uc}': .01,
-        '\\alpha_c': .19036,
-        'T_{t_f}': 435,
-
-        'M_{takeoff}': .9556,
-
-        'G_f': 1,
-
-        'h_f': 43.003,
-
-        'Cp_t1': 1280,
-        'Cp_t2': 1184,
-        'Cp_c': 1216,
-
-        'HTR_{f_SUB}': 1-.3**2,
-        'HTR_{lpc_SUB}': 1 - 0.6**2,
-     }
-
-    m = Model((10*engine.engineP.thrustP['TSFC'][0]+engine.engineP.thrustP['TSFC'][1]) * (engine['W_{engine}'] * units('1/hr/N'))**.00001, [engine, mission], substitutions, x0=x0)
-    m.substitutions.update(substitutions)
-    sol = m.localsolve(verbosity = 0)
-
-
-if __name__ == "__main__":
-    """
-    eng = 0 is CFM56, set N = 2
-    eng = 1 is TASOPT 737-800, set N = 3
-    eng = 2 is GE90, set N = 2
-    eng = 3 is TASOPT D8.2, set N=2
-    """
-    eng = 3
-    
-    if eng == 0 or eng == 2 or eng == 3:
-        N = 2
-    if eng == 1:
-        N = 3
-        
-    with Vectorize(N):
-        state = TestState()
-
-    engine = Engine(0, True, N, state, eng)
-
-    if eng == 0:
-        mission = TestMissionCFM(engine)
-        
-    if eng == 1:
-        mission = TestMissionTASOPT(engine)
-
-    if eng == 2:
-        mission = TestMissionGE90(engine)
-    
-    if eng == 3:
-        mission = TestMissionD82(engine)
-
     if eng == 0:
         M4a = .1025
         fan = 1.685
         lpc  = 1.935
         hpc = 9.369
-     
+
         substitutions = {
                 '\\pi_{tn}': .98,
                 '\pi_{b}': .94,
@@ -1876,7 +1338,7 @@ if __name__ == "__main__":
         fan = 1.685
         lpc  = 4.744
         hpc = 3.75
-     
+
         substitutions = {
                 '\\pi_{tn}': .989,
                 '\pi_{b}': .94,
@@ -1892,7 +1354,6 @@ if __name__ == "__main__":
                 '\pi_{hc_D}': hpc,
                 '\pi_{lc_D}': lpc,
                 '\\alpha_{max}': 5.1362,
-##                '\\alpha_{OD}': 5.1362,
 
                 'hold_{4a}': 1+.5*(1.313-1)*M4a**2,
                 'r_{uc}': .5,
@@ -1918,7 +1379,7 @@ if __name__ == "__main__":
         fan = 1.58
         lpc  = 1.26
         hpc = 20.033
-        
+
         substitutions = {
             '\pi_{tn}': .98,
             '\pi_{b}': .94,
@@ -1934,7 +1395,6 @@ if __name__ == "__main__":
             '\pi_{hc_D}': 20.033,
             '\pi_{lc_D}': 1.26,
 
-##            '\\alpha_{OD}': 8.7877,
             '\\alpha_{max}': 8.7877,
 
             'hold_{4a}': 1+.5*(1.313-1)*M4a**2,#sol('hold_{4a}'),
@@ -1963,139 +1423,157 @@ if __name__ == "__main__":
         hpc = 35/8
 
         substitutions = {
-        # Engine substitutions
-        '\\pi_{tn}': .995,
-        '\pi_{b}': .94,
-        '\pi_{d}': .995,
-        '\pi_{fn}': .985,
-        'T_{ref}': 288.15,
-        'P_{ref}': 101.325,
-        '\eta_{HPshaft}': .97,
-        '\eta_{LPshaft}': .97,
-        'eta_{B}': .9827,
-
-        '\pi_{f_D}': fan,
-        '\pi_{hc_D}': hpc,
-        '\pi_{lc_D}': lpc,
-
-        '\\alpha_{OD}': 6.97,
-        '\\alpha_{max}': 6.97,
-
-        'hold_{4a}': 1+.5*(1.313-1)*M4a**2,
-        'r_{uc}': .01,
-        '\\alpha_c': .19036,
-        'T_{t_f}': 435,
-
-        'M_{takeoff}': .9556,
-
-        'G_f': 1,
-
-        'h_f': 43.003,
-
-        'Cp_t1': 1280,
-        'Cp_t2': 1184,
-        'Cp_c': 1216,
-
-        'HTR_{f_SUB}': 1-.3**2,
-        'HTR_{lpc_SUB}': 1 - 0.6**2,
-     }
-
-    #dict of initial guesses
-    x0 = {
-        'W_{engine}': 1e4*units('N'),
-        'P_{t_0}': 1e1*units('kPa'),
-        'T_{t_0}': 1e3*units('K'),
-        'h_{t_0}': 1e6*units('J/kg'),
-        'P_{t_{1.8}}': 1e1*units('kPa'),
-        'T_{t_{1.8}}': 1e3*units('K'),
-        'h_{t_{1.8}}': 1e6*units('J/kg'),
-        'P_{t_2}': 1e1*units('kPa'),
-        'T_{t_2}': 1e3*units('K'),
-        'h_{t_2}': 1e6*units('J/kg'),
-        'P_{t_2.1}': 1e3*units('K'),
-        'T_{t_2.1}': 1e3*units('K'),
-        'h_{t_2.1}': 1e6*units('J/kg'),
-        'P_{t_{2.5}}': 1e3*units('kPa'),
-        'T_{t_{2.5}}': 1e3*units('K'),
-        'h_{t_{2.5}}': 1e6*units('J/kg'),
-        'P_{t_3}': 1e4*units('kPa'),
-        'T_{t_3}': 1e4*units('K'),
-        'h_{t_3}': 1e7*units('J/kg'),
-        'P_{t_7}': 1e2*units('kPa'),
-        'T_{t_7}': 1e3*units('K'),
-        'h_{t_7}': 1e6*units('J/kg'),
-        'P_{t_4}': 1e4*units('kPa'),
-        'h_{t_4}': 1e7*units('J/kg'),
-        'T_{t_4}': 1e4*units('K'),
-        'P_{t_{4.1}}': 1e4*units('kPa'),
-        'T_{t_{4.1}}': 1e4*units('K'),
-        'h_{t_{4.1}}': 1e7*units('J/kg'),
-        'T_{4.1}': 1e4*units('K'),
-        'f': 1e-2,
-        'P_{4a}': 1e4*units('kPa'),
-        'h_{t_{4.5}}': 1e6*units('J/kg'),
-        'P_{t_{4.5}}': 1e3*units('kPa'),
-        'T_{t_{4.5}}': 1e4*units('K'),
-        'P_{t_{4.9}}': 1e2*units('kPa'),
-        'T_{t_{4.9}}': 1e3*units('K'),
-        'h_{t_{4.9}}': 1e6*units('J/kg'),
-        '\pi_{HPT}': 1e-1,
-        '\pi_{LPT}': 1e-1,
-        'P_{t_5}': 1e2*units('kPa'),
-        'T_{t_5}': 1e3*units('K'),
-        'h_{t_5}': 1e6*units('J/kg'),
-        'P_8': 1e2*units('kPa'),
-        'P_{t_8}': 1e2*units('kPa'),
-        'h_{t_8}': 1e6*units('J/kg'),
-        'h_8': 1e6*units('J/kg'),
-        'T_{t_8}': 1e3*units('K'),
-        'T_{8}': 1e3*units('K'),
-        'P_6': 1e2*units('kPa'),
-        'P_{t_6}': 1e2*units('kPa'),
-        'T_{t_6': 1e3*units('K'),
-        'h_{t_6}': 1e6*units('J/kg'),
-        'h_6': 1e6*units('J/kg'),
-        'F_8': 1e2 * units('kN'),
-        'F_6': 1e2 * units('kN'),
-        'F': 1e2 * units('kN'),
-        'F_{sp}': 1e-1,
-        'TSFC': 1e-1,
-        'I_{sp}': 1e4*units('s'),
-        'u_6': 1e3*units('m/s'),
-        'u_8': 1e3*units('m/s'),
-        'm_{core}': 1e2*units('kg/s'),
-        'm_{fan}': 1e3*units('kg/s'),
-        '\\alpha': 1e1,
-        'alphap1': 1e1,
-        'm_{total}': 1e3*units('kg/s'),
-        'T_2': 1e3*units('K'),
-        'P_2': 1e2*units('kPa'),
-        'u_2': 1e3*units('m/s'),
-        'h_{2}': 1e6*units('J/kg'),
-        'T_{2.5}': 1e3*units('K'),
-        'P_{2.5}': 1e2*units('kPa'),
-        'u_{2.5}': 1e3*units('m/s'),
-        'h_{2.5}': 1e6*units('J/kg'),
-        'P_{7}': 1e2*units('kPa'),
-        'T_{7}': 1e3*units('K'),
-        'u_7': 1e3*units('m/s'),
-        'P_{5}': 1e2*units('kPa'),
-        'T_{5}': 1e3*units('K'),
-        'u_5': 1e3*units('m/s'),
-        'P_{atm}': 1e2*units('kPa'),
-        'T_{atm}': 1e3*units('K'),
-        'V': 1e3*units('knot'),
-        'a': 1e3*units('m/s'),
-    }
+            # Engine substitutions
+            '\\pi_{tn}': .995,
+            '\pi_{b}': .94,
+            '\pi_{d}': .995,
+            '\pi_{fn}': .985,
+            'T_{ref}': 288.15,
+            'P_{ref}': 101.325,
+            '\eta_{HPshaft}': .97,
+            '\eta_{LPshaft}': .97,
+            'eta_{B}': .9827,
+
+            '\pi_{f_D}': fan,
+            '\pi_{hc_D}': hpc,
+            '\pi_{lc_D}': lpc,
+
+            '\\alpha_{OD}': 6.97,
+            '\\alpha_{max}': 6.97,
+
+            'hold_{4a}': 1+.5*(1.313-1)*M4a**2,
+            'r_{uc}': .01,
+            '\\alpha_c': .19036,
+            'T_{t_f}': 435,
 
-    #select the proper objective based off of the number of flight segments
+            'M_{takeoff}': .9556,
+
+            'G_f': 1,
+
+            'h_f': 43.003,
+
+            'Cp_t1': 1280,
+            'Cp_t2': 1184,
+            'Cp_c': 1216,
+
+            'HTR_{f_SUB}': 1-.3**2,
+            'HTR_{lpc_SUB}': 1 - 0.6**2,
+         }
+
+    return substitutions
+
+def validation_model(eng, calibration = None):
+    """
+    builds the engine, test mission and model used to validate engine eng,
+    calibration replaces the EngineCalibration of eng when given
+    """
+    #select the number of flight segments based off of the engine
     if eng == 0 or eng == 2 or eng == 3:
-        m = Model((10*engine.engineP.thrustP['TSFC'][0]+engine.engineP.thrustP['TSFC'][1]) * (engine['W_{engine}'] * units('1/hr/N'))**.00001, [engine, mission], substitutions, x0=x0)
+        N = 2
     if eng == 1:
-        m = Model((10*engine.engineP.thrustP['TSFC'][2]+engine.engineP.thrustP['TSFC'][1]+engine.engineP.thrustP['TSFC'][0]) * (engine['W_{engine}'] * units('1/hr/N'))**.00001, [engine, mission], substitutions, x0=x0)
-    #update substitutions and solve
-    m.substitutions.update(substitutions)
-    sol = m.localsolve(solver = 'mosek', verbosity = 1)
+        N = 3
+
+    substitutions = validation_substitutions(eng)
+
+    with BUILD_LOCK:
+        with Vectorize(N):
+            state = TestState()
+
+        engine = Engine(0, True, N, state, eng, calibration = calibration)
+
+        if eng == 0:
+            mission = TestMissionCFM(engine)
+        if eng == 1:
+            mission = TestMissionTASOPT(engine)
+        if eng == 2:
+            mission = TestMissionGE90(engine)
+        if eng == 3:
+            mission = TestMissionD82(engine)
+
+        #select the proper objective based off of the number of flight segments
+        if eng == 0 or eng == 2 or eng == 3:
+            m = Model((10*engine.engineP.thrustP['TSFC'][0]+engine.engineP.thrustP['TSFC'][1]) * (engine['W_{engine}'] * units('1/hr/N'))**.00001, [engine, mission], substitutions)
+        if eng == 1:
+            m = Model((10*engine.engineP.thrustP['TSFC'][2]+engine.engineP.thrustP['TSFC'][1]+engine.engineP.thrustP['TSFC'][0]) * (engine['W_{engine}'] * units('1/hr/N'))**.00001, [engine, mission], substitutions)
+        m.substitutions.update(substitutions)
+
+    return engine, m
+
+def exponents(model, var):
+    """
+    returns the set of exponents var is raised to in the monomial equalities of model
+    """
+    exps = set()
+    for constraint in model.flat(constraintsets=False):
+        for side in [getattr(constraint, 'left', None), getattr(constraint, 'right', None)]:
+            for key, exp in getattr(side, 'exp', {}).items():
+                if key.name == var:
+                    exps.add(round(exp, 10))
+    return exps
+
+def test_concurrent_builds(nbuilds = 8, nthreads = 4):
+    """
+    builds mixed engine types from a thread pool and checks the exponents each
+    model ends up with against its own calibration
+    """
+    engs = [i % 4 for i in range(nbuilds)]
+    pool = ThreadPool(nthreads)
+    try:
+        engines = pool.map(lambda eng: validation_model(eng)[0], engs)
+    finally:
+        pool.close()
+        pool.join()
+
+    for eng, engine in zip(engs, engines):
+        calibration = get_calibration(eng)
+        assert engine.calibration is calibration
+        assert round(calibration.fexp1, 10) in exponents(engine.engineP.compP, '\\pi_f')
+        assert round(calibration.lpcexp1, 10) in exponents(engine.engineP.compP, '\\pi_{lc}')
+        assert round(calibration.hpcexp1, 10) in exponents(engine.engineP.compP, '\\pi_{hc}')
+        assert round(calibration.lptexp1, 10) in exponents(engine.engineP.turbineP, 'T_{t_{4.9}}')
+
+def test_stations():
+    """
+    checks that the handles of the station table and of the performance
+    models are the variables a search by name finds
+    """
+    engine, m = validation_model(0)
+    for station, owner, location, quantities in STATIONS:
+        for quantity, name in quantities:
+            assert getattr(engine.engineP.stations[station], quantity).key == engine.engineP[name].key, name
+    for name, variable in engine.engineP.v.items():
+        assert variable.key == engine.engineP[name].key, name
+
+def test():
+    """
+    Test each different engine
+    """
+    #test the CFM, TASOPT, GE90 and D8.2 engines, starting from the cycle estimate
+    for eng in range(4):
+        N = 3 if eng == 1 else 2
+        engine, m = validation_model(eng)
+        x0 = cycle_estimate.estimate(engine, m, N).x0(m)
+        sol = m.localsolve(verbosity = 0, x0 = x0)
+
+    test_concurrent_builds()
+    test_stations()
+
+
+if __name__ == "__main__":
+    """
+    eng = 0 is CFM56, set N = 2
+    eng = 1 is TASOPT 737-800, set N = 3
+    eng = 2 is GE90, set N = 2
+    eng = 3 is TASOPT D8.2, set N=2
+    """
+    eng = 3
+    N = 3 if eng == 1 else 2
+
+    engine, m = validation_model(eng)
+
+    #solve from the closed form cycle estimate
+    x0 = cycle_estimate.estimate(engine, m, N).x0(m)
+    sol = m.localsolve(solver = 'mosek', verbosity = 1, x0 = x0)
 
     #print out various percent differences in TSFC and engine areas
     if eng == 0:
@@ -2124,27 +1602,3 @@ if __name__ == "__main__":
         weighterror =  100*(mag(sol('W_{engine}').to('lbf'))-17400)/17400
 
         print tocerror, cruiseerror, weighterror
-
-
-#code for estimating on design parameters
-##Pt0 = 50
-##Tt0 = 250
-##Pt3 = Pt0*lpc*fan*hpc
-##Pt21 = fan * Pt0
-##Pt25 = Pt0 * fan * lpc
-##
-##Tt21 = Tt0 * (fan)**(.4/(1.4*.9153))
-##Tt25 = Tt21 * (lpc)**(.4/(1.4*.9037))
-##Tt3 = Tt25 * (hpc)**(.4/(1.4*.9247))
-##
-##Tt41 = 1400
-##
-##Tt45 = Tt41 - (Tt3 - Tt25)
-##
-##Tt49 = Tt45 - (Tt25 - Tt21)
-##
-##piHPT = (Tt45/Tt41)**(.9121*1.4/.4)
-##
-##piLPT = (Tt49/Tt45)**(.9228*1.4/.4)
-##
-##Pt45 = piHPT * Pt3
@@ -0,0 +1,182 @@
+"""Maximum thrust flight envelopes of a fixed engine design"""
+import numpy as np
+from time import time
+from multiprocessing import Pool
+from cycle_estimate import estimate, flight_conditions
+from offdesign import UNKNOWNS, atmosphere, offdesign, engine_design
+import engine_validation
+
+#what limits the thrust of an envelope point, -1 marks points with no feasible thrust
+LIMITS = ['T_{t_{4.1}}', 'N_1', 'N_2', 'map']
+
+def _feasible(design, M, h, Tt41, x0, N1max, N2max):
+    """
+    solves the points at turbine inlet temperature Tt41 with the mission's
+    fan face Mach number, returns the (feasibility flags, the limit each
+    infeasible point breaks, the solution, the log unknowns)
+    """
+    Tatm, Patm = atmosphere(h)
+    if x0 is not None:
+        #points without a solution to start from start from the map design points
+        guess = design.initial_guess(flight_conditions({'M': M, 'T_{atm}': Tatm, 'P_{atm}': Patm}, len(M)), Tt41)
+        x0 = np.where(np.isnan(x0), guess, x0)
+    res = offdesign(design, M, Tatm, Patm, Tt41spec = Tt41, fixed = {'M_2': M}, mode = 'face', x0 = x0,
+                    outputs = ['F', 'TSFC', 'N_1', 'N_2', 'converged', 'in map'] + UNKNOWNS)
+    N1ok, N2ok = res['N_1'] <= N1max, res['N_2'] <= N2max
+    ok = res['converged'] & res['in map'] & N1ok & N2ok
+    limit = np.where(~N1ok, 1, np.where(~N2ok, 2, 3))
+    x = np.log(np.array([res[name] for name in UNKNOWNS]).T)
+    return ok, limit, res, x
+
+def _bisect(args):
+    """
+    bisects the turbine inlet temperature of a chunk of points for their
+    maximum thrust, module level so the worker processes can unpickle it
+    ________
+    INPUTS
+    args = (design, M, h [m], lower and upper turbine inlet temperatures [K],
+    x0 log unknowns to start from or None, N1max, N2max, tol [K])
+
+    OUTPUTS
+    (F [N], TSFC, Tt4.1 [K], limit index in LIMITS, log unknowns) of the
+    chunk, nan and -1 at the points with no feasible thrust
+    """
+    design, M, h, lower, upper, x0, N1max, N2max, tol = args
+    n = len(M)
+    F, TSFC, Tt41 = np.nan*np.ones(n), np.nan*np.ones(n), np.nan*np.ones(n)
+    limit = -np.ones(n, dtype = int)
+    x = np.nan*np.ones((n, len(UNKNOWNS))) if x0 is None else np.array(x0)
+    lo, hi = lower*np.ones(n), upper*np.ones(n)
+
+    def keep(idx, res, xi, T):
+        F[idx], TSFC[idx], Tt41[idx], x[idx] = res['F'], res['TSFC'], T, xi
+
+    #points feasible at the full temperature are limited by it
+    ok, fail, res, xi = _feasible(design, M, h, hi, x0, N1max, N2max)
+    keep(ok, _take(res, ok), xi[ok], hi[ok])
+    limit[ok] = 0
+
+    #points infeasible at the lowest temperature are proven infeasible and skipped
+    active = np.where(~ok)[0]
+    limit[active] = fail[active]
+    start = None if x0 is None else x[active]
+    ok, _, res, xi = _feasible(design, M[active], h[active], lo[active], start, N1max, N2max)
+    keep(active[ok], _take(res, ok), xi[ok], lo[active[ok]])
+    limit[active[~ok]] = -1
+    active = active[ok]
+
+    #every iteration starts from the last feasible solution of each point
+    while len(active) and np.max(hi[active] - lo[active]) > tol:
+        mid = (lo[active] + hi[active])/2
+        ok, fail, res, xi = _feasible(design, M[active], h[active], mid, x[active], N1max, N2max)
+        keep(active[ok], _take(res, ok), xi[ok], mid[ok])
+        lo[active[ok]] = mid[ok]
+        hi[active[~ok]] = mid[~ok]
+        limit[active[~ok]] = fail[~ok]
+        active = active[hi[active] - lo[active] > tol]
+    return F, TSFC, Tt41, limit, x
+
+def _take(res, idx):
+    """
+    returns the entries idx of every array of res
+    """
+    return dict((name, value[idx]) for name, value in res.items())
+
+def _solve(tasks, processes):
+    """
+    runs the bisection tasks in worker processes, or in this one with processes = 1
+    """
+    if processes == 1:
+        return map(_bisect, tasks)
+    pool = Pool(processes)
+    try:
+        return pool.map(_bisect, tasks)
+    finally:
+        pool.close()
+        pool.join()
+
+def envelope(design, M, h, Tt41max, Tt41min = 1200., N1max = 1.1, N2max = 1.1, tol = 1., processes = None):
+    """
+    maximum available thrust of design over the grid M x h, limited by the
+    turbine inlet temperature, the spool speeds and the map bands
+    ________
+    INPUTS
+    design = EngineDesign
+    M, h [m] = Mach number and altitude grid lines
+    Tt41max [K] = turbine inlet temperature limit
+    Tt41min [K] = lowest turbine inlet temperature of the bisection, a part
+    power setting inside the maps, points infeasible there have no feasible thrust
+    tol [K] = width of the final turbine inlet temperature bracket
+    processes = number of worker processes, all cores by default, 1 to solve
+    in this process
+
+    OUTPUTS
+    {name: (M, h) array} of 'F' [N], 'TSFC', 'T_{t_{4.1}}' [K] and 'limit',
+    the index in LIMITS of what sets each point's thrust, -1 and nan where
+    no thrust is feasible
+    """
+    M, h = np.asarray(M, dtype = float), np.asarray(h, dtype = float)
+    MM, hh = np.meshgrid(M, h, indexing = 'ij')
+    shape = MM.shape
+    nchunk = max(processes or 1, 1)
+    result = dict((name, np.nan*np.ones(shape)) for name in ['F', 'TSFC', 'T_{t_{4.1}}'])
+    result['limit'] = -np.ones(shape, dtype = int)
+    x = np.nan*np.ones(shape + (len(UNKNOWNS),))
+
+    #a coarse pass over every other grid line, the other points start from
+    #the solution of their coarse neighbour
+    coarse = np.zeros(shape, dtype = bool)
+    coarse[::2, ::2] = True
+    ii, jj = np.indices(shape)
+    neighbour = (ii - ii % 2, jj - jj % 2)
+    for points in [coarse, ~coarse]:
+        idx = np.where(points.ravel())[0]
+        if not len(idx):
+            continue
+        x0 = None if points is coarse else x[neighbour][points]
+        tasks = [(design, MM.ravel()[c], hh.ravel()[c], Tt41min, Tt41max,
+                  None if x0 is None else x0[np.searchsorted(idx, c)], N1max, N2max, tol)
+                 for c in np.array_split(idx, nchunk) if len(c)]
+        chunks = _solve(tasks, processes)
+        F, TSFC, Tt41, limit, xi = [np.concatenate(a) for a in zip(*chunks)]
+        for name, value in [('F', F), ('TSFC', TSFC), ('T_{t_{4.1}}', Tt41), ('limit', limit)]:
+            result[name].ravel()[idx] = value
+        x.reshape(-1, len(UNKNOWNS))[idx] = xi
+    return result
+
+def test():
+    """
+    computes a small envelope of the CFM56 validation engine in two worker
+    processes and checks that every point sits on the limit that sets it
+    """
+    engine, m = engine_validation.validation_model(0)
+    sol = m.localsolve(verbosity = 0, x0 = estimate(engine, m, 2).x0(m))
+    design = engine_design(engine, sol)
+
+    M, h = np.linspace(.6, .8, 3), np.linspace(8000, 11000, 4)
+    env = envelope(design, M, h, 1400., processes = 2)
+    assert env['F'].shape == (3, 4)
+    feasible = env['limit'] >= 0
+    assert np.all(np.isfinite(env['F'][feasible])) and np.any(feasible)
+
+    #the same envelope in this process
+    serial = envelope(design, M, h, 1400., processes = 1)
+    assert np.allclose(serial['F'], env['F'], equal_nan = True)
+
+    #hotter than the limit of each point breaks that limit
+    MM, hh = [a[feasible] for a in np.meshgrid(M, h, indexing = 'ij')]
+    Tt41 = env['T_{t_{4.1}}'][feasible]
+    limited = env['limit'][feasible] > 0
+    ok, fail, _, _ = _feasible(design, MM[limited], hh[limited], Tt41[limited] + 2., None, 1.1, 1.1)
+    assert not np.any(ok)
+    assert np.all(env['T_{t_{4.1}}'][env['limit'] == 0] == 1400.)
+
+if __name__ == "__main__":
+    engine, m = engine_validation.validation_model(0)
+    sol = m.localsolve(verbosity = 0, x0 = estimate(engine, m, 2).x0(m))
+    design = engine_design(engine, sol)
+    tic = time()
+    env = envelope(design, np.linspace(.3, .85, 12), np.linspace(0, 12000, 13), 1450.)
+    print("envelope of %i points in %.3g s, %i feasible" % (env['F'].size, time() - tic, np.sum(env['limit'] >= 0)))
+    for i, name in enumerate(LIMITS):
+        print("%i points limited by %s" % (np.sum(env['limit'] == i), name))
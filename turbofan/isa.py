@@ -0,0 +1,223 @@
+"""Standard atmosphere of the Atmosphere model in NumPy, substituted at fixed altitudes and fitted by monomials at free ones"""
+import numpy as np
+from time import time
+from gpkit import Model, Vectorize, units
+from gpkit.small_scripts import mag
+from simple_ac_imports import CONSTANTS, FlightState, SharedConstants
+
+#values of the CONSTANTS in their units
+VALUES = dict((c[0], c[1]) for c in CONSTANTS)
+
+#exponent of the pressure-temperature relation of the Atmosphere model
+TH = 5.257
+
+#quantities of an Atmosphere, (variable name, units of isa), the units of
+#its variables
+QUANTITIES = [('T_{atm}', 'K'), ('P_{atm}', 'Pa'), ('\\rho', 'kg/m^3'), ('\\mu', 'kg/(m*s)')]
+
+#cruise altitudes [m] the fits of a mission are made for, 30000 ft, the
+#lowest the missions allow, to 41000 ft
+CRUISE_BAND = (9144., 12496.8)
+
+#fits made so far, by (hmin, hmax, n)
+_FITS = {}
+
+def isa(h):
+    """
+    returns {name: array} of QUANTITIES at the altitudes h [m], the relations
+    of the Atmosphere model in closed form
+    """
+    h = np.asarray(h, dtype = float)
+    T = VALUES['T_{sl}'] - VALUES['L_{atm}']*h
+    P = VALUES['p_{sl}']*(T/VALUES['T_{sl}'])**TH
+    return {'T_{atm}': T, 'P_{atm}': P, '\\rho': P*VALUES['M_{atm}']/(VALUES['R_{atm}']*T),
+            '\\mu': VALUES['C_1']*T**1.5/(T + VALUES['T_s'])}
+
+def _monomial(x, y):
+    """
+    returns (c, e) of y = c*x**e fitted in log space, the least squares
+    exponent with c centering the largest errors either way
+    """
+    e = np.polyfit(np.log(x), np.log(y), 1)[0]
+    residual = np.log(y) - e*np.log(x)
+    return np.exp(.5*(residual.max() + residual.min())), e
+
+class AtmosphereFit(object):
+    """
+    Monomial fits of the Atmosphere model over an altitude band, for states
+    whose altitude is free, the temperature in altitude and the Sutherland
+    viscosity in temperature, pressure and density keep their exact monomial
+    relations to the temperature, the fitted states are held to the band
+    ________
+    INPUTS
+    hmin, hmax = altitude band [m], above sea level
+    n = altitudes the fits are made and checked at
+
+    OUTPUTS
+    self.T = (c, e), T_{atm} [K] = c*(h [m])**e
+    self.mu = (c, e), mu [kg/(m*s)] = c*(T_{atm} [K])**e
+    self.errors = {name: largest relative error over the band} of QUANTITIES
+    """
+    def __init__(self, hmin, hmax, n = 1001):
+        if not 0 < hmin < hmax:
+            raise ValueError("an altitude band is 0 < hmin < hmax, not (%s, %s)" % (hmin, hmax))
+        self.band = (hmin, hmax)
+        h = np.linspace(hmin, hmax, n)
+        exact = isa(h)
+        self.T = _monomial(h, exact['T_{atm}'])
+        self.mu = _monomial(exact['T_{atm}'], exact['\\mu'])
+        fitted = self(h)
+        self.errors = dict((name, np.max(np.abs(fitted[name]/exact[name] - 1))) for name, _ in QUANTITIES)
+
+    def __call__(self, h):
+        """
+        returns {name: array} of QUANTITIES at the altitudes h [m] by the fits
+        """
+        T = self.T[0]*np.asarray(h, dtype = float)**self.T[1]
+        P = VALUES['p_{sl}']*(T/VALUES['T_{sl}'])**TH
+        return {'T_{atm}': T, 'P_{atm}': P, '\\rho': P*VALUES['M_{atm}']/(VALUES['R_{atm}']*T),
+                '\\mu': self.mu[0]*T**self.mu[1]}
+
+    def constraints(self, h, T_atm, mu):
+        """
+        returns the monomial constraints of the fits on the variables of one
+        state
+        """
+        return [
+            T_atm == self.T[0]*units('K')*(h/units('m'))**self.T[1],
+            mu == self.mu[0]*units('kg/(m*s)')*(T_atm/units('K'))**self.mu[1],
+            h >= self.band[0]*units('m'),
+            h <= self.band[1]*units('m'),
+            ]
+
+def fit(hmin, hmax, n = 1001):
+    """
+    returns the AtmosphereFit of the band, made once per band
+    """
+    key = (float(hmin), float(hmax), n)
+    if key not in _FITS:
+        _FITS[key] = AtmosphereFit(hmin, hmax, n)
+    return _FITS[key]
+
+def mission_modes(Nclimb, Ncruise, mode, band = CRUISE_BAND):
+    """
+    returns the atmosphere modes of the Nclimb + Ncruise states of a
+    mission, in which climb segment i flies at (i + 1)/Nclimb of the cruise
+    altitude, 'sp' and 'isa' for every state or, for 'fit', the fit of each
+    state over its share of band, the cruise altitudes [m] allowed
+    """
+    if mode in ('sp', 'isa'):
+        return mode
+    if mode != 'fit':
+        raise ValueError("the atmosphere of a mission is 'sp', 'isa' or 'fit', not %r" % (mode,))
+    shares = [(i + 1.)/Nclimb for i in range(Nclimb)] + [1.]*Ncruise
+    return [fit(share*band[0], share*band[1]) for share in shares]
+
+def altitudes(Nclimb, Ncruise, cruisealt):
+    """
+    returns the altitudes [m] of the states of a mission cruising at
+    cruisealt [m], the climb segments evenly spaced below it
+    """
+    return np.array([(i + 1.)/Nclimb*cruisealt for i in range(Nclimb)] + [cruisealt]*Ncruise)
+
+def substitutions(state, h):
+    """
+    returns {VarKey: value} of QUANTITIES of the vectorized FlightState state
+    at the altitudes h [m] of its elements, for the states of 'isa' mode
+    """
+    values = isa(h)
+    subs = {}
+    for name, _ in QUANTITIES:
+        variable = state.atm[name]
+        for i, value in enumerate(np.ravel(values[name])):
+            subs[variable[i].key] = value
+    return subs
+
+def _state_model(h, mode):
+    """
+    returns (state, model) of three flight states at Mach .8, the altitudes
+    h [m] substituted for every mode but a fit's, minimizing their speeds
+    """
+    constants = SharedConstants()
+    with Vectorize(len(h)):
+        state = FlightState(constants, atmosphere = mode)
+    m = Model(np.sum(state['V'])/units('kts'), [state], {'M': .8*np.ones(len(h))})
+    if mode == 'isa':
+        m.substitutions.update(substitutions(state, h))
+    if not isinstance(mode, list):
+        m.substitutions.update({state.alt['h']: h})
+    return state, m
+
+def test():
+    """
+    checks isa against the standard atmosphere tables, then solves three
+    flight states with each mode, the substituted states against the SP of
+    the Atmosphere relations and the fitted ones against their error bounds
+    """
+    values = isa([0., 11000.])
+    assert np.allclose(values['T_{atm}'], [288.15, 216.65])
+    assert np.allclose(values['P_{atm}'], [101325., 22632.], rtol = 1e-3)
+    assert np.allclose(values['\\rho'], [1.225, .3639], rtol = 1e-3)
+    assert np.allclose(values['\\mu'], [1.789e-5, 1.422e-5], rtol = 1e-3)
+    #the fits narrow with the band
+    assert fit(9000., 11000.).errors['P_{atm}'] < .006 < fit(1500., 11000.).errors['P_{atm}']
+    assert fit(9000., 11000.) is fit(9000, 11000)
+
+    h = np.array([3000., 9144., 11000.])
+    state, m = _state_model(h, 'sp')
+    sol = m.localsolve(verbosity = 0)
+    exact = isa(h)
+    for name, _ in QUANTITIES:
+        assert np.allclose(mag(sol(state.atm[name])), exact[name], rtol = 1e-5), name
+    V = mag(sol(state['V']))
+    state, m = _state_model(h, 'isa')
+    #nothing is left of the atmosphere's signomial equalities
+    isasol = m.solve(verbosity = 0)
+    assert np.allclose(mag(isasol(state['V'])), V, rtol = 1e-5)
+
+    fits = [fit(h_i - 500., h_i + 500.) for h_i in h]
+    state, m = _state_model(h, fits)
+    fitsol = m.solve(verbosity = 0)
+    #the speeds are smallest at the tops of the bands
+    hfit = mag(fitsol(state.alt['h']))
+    assert np.allclose(hfit, h + 500.)
+    exact = isa(hfit)
+    for name, _ in QUANTITIES:
+        error = np.abs(mag(fitsol(state.atm[name]))/exact[name] - 1)
+        assert np.all(error <= [f.errors[name]*(1 + 1e-3) + 1e-6 for f in fits]), name
+
+def benchmark(cruisealt = 35000.):
+    """
+    compares GP solves, interior point iterations and seconds of
+    Mission(2, 2) with each atmosphere mode, at the fixed cruise altitude
+    cruisealt [ft] for the SP and the substituted states and at the free
+    cruise altitude for the SP and the fits
+    """
+    from scaling import counting_cvxopt, _run
+    from engine_flight_profile_integration import Mission, mission_substitutions
+    rows = []
+    for mode, fixed in [('sp', True), ('isa', True), ('sp', False), ('fit', False)]:
+        mission = Mission(2, 2, atmosphere = mode)
+        subs = mission_substitutions()
+        if fixed:
+            subs['CruiseAlt'] = cruisealt
+        if mode == 'isa':
+            subs.update(substitutions(mission.enginestate, altitudes(2, 2, cruisealt*.3048)))
+        m = Model(mission['W_{f_{total}}'], mission, subs)
+        result = _run(lambda: m.localsolve(verbosity = 0, solver = counting_cvxopt))
+        rows.append((mode, 'fixed' if fixed else 'free', result))
+
+    print("%-5s %-9s %6s %11s %9s %12s %10s" % ('mode', 'CruiseAlt', 'GPs', 'iterations', 'seconds',
+                                              'fuel [N]', 'alt [ft]'))
+    for mode, alt, (sol, gps, iterations, seconds) in rows:
+        if sol is None:
+            print("%-5s %-9s failed" % (mode, alt))
+            continue
+        print("%-5s %-9s %6i %11i %9.3g %12.6g %10.6g" % (mode, alt, gps, iterations, seconds,
+                                                        mag(sol('W_{f_{total}}')), mag(sol('CruiseAlt'))))
+    for band in [(1500., 11000.), (3000., 11000.), CRUISE_BAND, (9000., 11000.)]:
+        print("fit %5i to %5i m: largest errors %s" % (band + (', '.join(
+            '%s %.2g%%' % (name, 100*fit(*band).errors[name]) for name, _ in QUANTITIES),)))
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,529 @@
+"""Vectorized NumPy off-design solver for engines of fixed design"""
+import numpy as np
+from time import time
+from gpkit import Model, Vectorize
+from gpkit.small_scripts import mag
+from engine_cache import CACHE, signature
+from cycle_estimate import cycle_constants, flight_conditions, march, face_flows, conditions, estimate, initial_guess
+#plain import, engine_validation imports cycle_estimate which this module depends on
+import engine_validation
+
+#names of the unknowns, solved for in log space
+UNKNOWNS = ['\\pi_f', '\\pi_{lc}', '\\pi_{hc}', 'm_{core}', '\\alpha', 'T_{t_{4.1}}']
+
+#design variables of the Sizing, FanMap, LPCMap and HPCMap models that a frozen
+#engine holds fixed, the on design estimates are left out with their constraints
+FROZEN = ['m_{htD}', 'm_{ltD}', 'A_2', 'A_{2.5}', 'A_5', 'A_7', 'G_f',
+          '\\bar{m}_{fan_{D}}', '\\pi_{f_D}', 'm_{lc_D}', '\\pi_{lc_D}', 'm_{hc_D}', '\\pi_{hc_D}']
+
+#flight condition variables set at every operating point of a frozen engine
+CONDITIONS = ['M', 'T_{atm}', 'P_{atm}', 'c1', 'M_2', 'M_{2.5}', 'hold_{2}', 'hold_{2.5}']
+
+#quantities a frozen engine returns for every operating point
+OUTPUTS = ['TSFC', 'F', 'T_{t_{4.1}}', '\\pi_f', '\\pi_{lc}', '\\pi_{hc}', 'm_{core}', '\\alpha']
+
+#sea level values of the Atmosphere model in simple_ac_imports
+TSL = 288.15
+PSL = 101.325
+LATM = .0065
+
+def atmosphere(h):
+    """
+    returns the (temperature [K], pressure [kPa]) at altitude h [m], using the
+    same lapse rate relations as the Atmosphere model
+    """
+    Tatm = TSL - LATM*np.asarray(h, dtype=float)
+    return Tatm, PSL*(Tatm/TSL)**5.257
+
+def engine_weight(res):
+    """
+    engine weight [N] of the weight constraint of Engine.setup at every point of
+    res, an off design solution or the segments of a solved engine
+    """
+    opr = res['\\pi_f']*res['\\pi_{lc}']*res['\\pi_{hc}']
+    return res['m_{total}']/(1 + res['\\alpha'])*.220462*(1684.5 + 17.7*opr/30 + 1662.2*(res['\\alpha']/5)**1.2)
+
+class EngineDesign(object):
+    """
+    Frozen design of a solved engine, evaluates the TASOPT residuals of
+    Engine.setup at off-design operating points
+    ________
+    INPUTS
+    calibration = EngineCalibration of the engine
+    values = {name: value} of the engine's constants and design variables in
+    the units of each variable, see design_values
+    """
+    def __init__(self, calibration, values):
+        self.calibration = calibration
+        self.values = values
+        self.constants = cycle_constants(values)
+
+    def speeds(self, pif, pilc, pihc):
+        """
+        returns the fan, LPC and HPC speeds from the map speed lines
+        """
+        v = self.values
+        Nf = ((pif*1.7/v['\\pi_{f_D}'])**.1/1.05)**(1/.0871)
+        N1 = ((pilc*26/v['\\pi_{lc_D}'])**.1/1.38)**(1/.566)
+        N2 = ((pihc*26/v['\\pi_{hc_D}'])**.1/1.35)**(1/.566)
+        return Nf, N1, N2
+
+    def initial_guess(self, fc, Tt41 = 1400.):
+        """
+        returns the log of the unknowns at the map design points, with the core
+        mass flow set by the design corrected flow at the inlet conditions
+        """
+        v = self.values
+        c = self.constants
+        n = np.size(fc['T_{atm}'])
+        Tt2 = fc['T_{atm}']*fc['c1']
+        Pt2 = c['pid']*fc['P_{atm}']*fc['c1']**3.5
+        mcore = v['m_{lc_D}']*(Pt2/c['Pref'])/(Tt2/c['Tref'])**.5
+        alpha = v['\\bar{m}_{fan_{D}}']/v['m_{lc_D}']
+        x = [v['\\pi_{f_D}'], v['\\pi_{lc_D}'], v['\\pi_{hc_D}'], mcore, alpha, Tt41]
+        return np.log(np.array([np.ones(n)*xi for xi in x]).T)
+
+    def limits(self):
+        """
+        returns the (lower, upper) log values of the unknowns that bound the
+        Newton steps to the physical region
+        """
+        v = self.values
+        lower = [.5, .5, .5, 1e-3, 1e-2, 400.]
+        upper = [3*v['\\pi_{f_D}'], 3*v['\\pi_{lc_D}'], 3*v['\\pi_{hc_D}'], 1e4, 50., 2500.]
+        return np.log(lower), np.log(upper)
+
+    def residuals(self, x, fc, spec, mode = 'nozzle'):
+        """
+        returns the (n, 6) residuals of the unknowns x (log values) along with
+        the marched stations
+        ________
+        INPUTS
+        fc = flight conditions of the n points, see flight_conditions
+        spec = {'F': thrust [N], 'T_{t_{4.1}}': turbine inlet temperature [K],
+        '\\alpha': by pass ratio} length n arrays of the specified values, the
+        turbine inlet temperature is used where the thrust is nan and the by
+        pass ratio replaces residual 4 where it is not nan
+        mode = 'nozzle' to pass the fan and core flows through the nozzle areas,
+        'face' to fix them with the fan and HPC face areas at the face Mach numbers
+        the way the test missions do
+        """
+        v = self.values
+        c = self.constants
+        pif, pilc, pihc, mcore, alpha, Tt41 = np.exp(x).T
+        st = march(self.calibration, c, fc, pif, pilc, pihc, alpha, Tt41, mcore)
+        Nf, N1, N2 = self.speeds(pif, pilc, pihc)
+        fp1, Mto = st['fp1'], c['Mto']
+
+        #residual 1, fan/LPC speed
+        r1 = np.log(Nf*v['G_f']/N1)
+        #residual 2, HPT mass flow
+        r2 = np.log(fp1*st['m_{hc}']*Mto*(st['P_{t_{2.5}}']/st['P_{t_{4.1}}'])*
+                    (Tt41/st['T_{t_{2.5}}'])**.5/v['m_{htD}'])
+        #residual 3, LPT mass flow
+        r3 = np.log(fp1*st['m_{lc}']*Mto*(st['P_{t_2}']/st['P_{t_{4.5}}'])*
+                    (st['T_{t_{4.5}}']/st['T_{t_2}'])**.5/v['m_{ltD}'])
+        #residuals 4 and 5, fan and core mass flows
+        if mode == 'nozzle':
+            r4 = np.log(st['m_{fan}']/(st['\\rho_7']*v['A_7']*st['u_7']))
+            r5 = np.log(Mto*mcore*fp1/(st['\\rho_5']*v['A_5']*st['u_5']))
+        else:
+            fanflux, coreflux = face_flows(c, fc, st)
+            r4 = np.log(st['m_{fan}']/(v['A_2']*fanflux))
+            r5 = np.log(mcore/(v['A_{2.5}']*coreflux))
+        r4 = np.where(np.isnan(spec['\\alpha']), r4, np.log(alpha/spec['\\alpha']))
+        #residual 7, specified thrust or turbine inlet temperature
+        r7 = np.where(np.isnan(spec['F']), np.log(Tt41/spec['T_{t_{4.1}}']), st['F']/spec['F'] - 1)
+
+        st.update({'N_f': Nf, 'N_1': N1, 'N_2': N2})
+        return np.array([r1, r2, r3, r4, r5, r7]).T, st
+
+    def in_map(self, st):
+        """
+        returns True where the operating point is inside the map bands, speed
+        limits and pressure ratio limits that Engine.setup imposes as inequalities
+        """
+        v = self.values
+        pif = st['\\pi_f']*1.7/v['\\pi_{f_D}']
+        pilc = st['\\pi_{lc}']*26/v['\\pi_{lc_D}']
+        pihc = st['\\pi_{hc}']*26/v['\\pi_{hc_D}']
+        fan = 1.06*(st['m_{f}']/v['\\bar{m}_{fan_{D}}'])**.137
+        lpc = (1.38*(st['m_{lc}']/v['m_{lc_D}'])**.122)**10
+        hpc = (1.38*(st['m_{hc}']/v['m_{hc_D}'])**.122)**10
+        return ((pif**.1 <= 1.1*fan) & (pif**.1 >= .9*fan) & (pilc <= 1.1*lpc) & (pilc >= .9*lpc) &
+                (pihc <= 1.1*hpc) & (pihc >= .9*hpc) & (st['N_1'] <= 1.1) & (st['N_2'] <= 1.1) &
+                (st['\\pi_f'] >= 1) & (st['\\pi_{lc}'] >= 1) & (st['\\pi_{hc}'] >= 1))
+
+def design_values(engine, sol):
+    """
+    returns {name: value} of the scalar variables of engine in solution sol,
+    in the units of each variable
+    """
+    values = {}
+    for key in engine.varkeys:
+        if key.idx or key.shape or key not in sol["variables"]:
+            continue
+        values[key.name] = float(mag(sol["variables"][key]))
+    return values
+
+def engine_design(engine, sol):
+    """
+    freezes the design of engine at solution sol
+    """
+    return EngineDesign(engine.calibration, design_values(engine, sol))
+
+def _take(arrays, idx):
+    """
+    returns the entries idx of each array in arrays, scalars pass through
+    """
+    return dict((name, value[idx] if np.ndim(value) else value) for name, value in arrays.items())
+
+def _newton(design, x, fc, spec, mode, tol, maxiter, broyden, J = None, maxstep = .5):
+    """
+    batched Newton iteration, the Jacobian is found by forward differences and,
+    with broyden, reused between refreshes through rank one updates, returns
+    the unknowns, residuals, Jacobians, convergence flags and iteration counts
+    """
+    n = len(x)
+    lower, upper = design.limits()
+    x = np.clip(x, lower, upper)
+    r = design.residuals(x, fc, spec, mode)[0]
+    norm = np.max(np.abs(r), axis = 1)
+    J = np.zeros((n, 6, 6)) if J is None else np.array(J)
+    stale = ~np.all(np.isfinite(J), axis = (1, 2)) | ~np.any(J, axis = (1, 2))
+    iterations = np.zeros(n, dtype = int)
+    for i in range(maxiter):
+        active = np.where(~(norm < tol))[0]
+        if not len(active):
+            break
+        iterations[active] += 1
+
+        #forward difference Jacobian of the points whose Jacobian is out of date
+        fresh = active[stale[active]]
+        if len(fresh):
+            fcf, specf = _take(fc, fresh), _take(spec, fresh)
+            for j in range(6):
+                xp = x[fresh].copy()
+                xp[:, j] += 1e-7
+                rp = design.residuals(xp, fcf, specf, mode)[0]
+                J[fresh, :, j] = (rp - r[fresh])/1e-7
+            stale[fresh] = False
+
+        #limited Newton step, singular points are left where they are
+        Ja, ra = J[active], r[active]
+        ok = np.all(np.isfinite(Ja), axis = (1, 2)) & np.all(np.isfinite(ra), axis = 1)
+        try:
+            dx = -np.linalg.solve(np.where(ok[:, None, None], Ja, np.eye(6)), np.where(ok[:, None], ra, 0.)[:, :, None])[:, :, 0]
+        except np.linalg.LinAlgError:
+            ok[ok] = np.abs(np.linalg.det(Ja[ok])) > 1e-300
+            dx = np.zeros((len(active), 6))
+            dx[ok] = -np.linalg.solve(Ja[ok], ra[ok][:, :, None])[:, :, 0]
+        dx *= np.minimum(1., maxstep/np.maximum(np.max(np.abs(dx), axis = 1), 1e-300))[:, None]
+
+        #halve the step of the points where it does not reduce the residual
+        fca, speca = _take(fc, active), _take(spec, active)
+        xa = np.clip(x[active] + dx, lower, upper)
+        ra = design.residuals(xa, fca, speca, mode)[0]
+        worse = ~(np.max(np.abs(ra), axis = 1) < norm[active])
+        retry = np.where(worse)[0]
+        for k in range(3):
+            if not len(retry):
+                break
+            dx[retry] *= .5
+            xa[retry] = np.clip(x[active[retry]] + dx[retry], lower, upper)
+            ra[retry] = design.residuals(xa[retry], _take(fca, retry), _take(speca, retry), mode)[0]
+            worse[retry] = ~(np.max(np.abs(ra[retry]), axis = 1) < norm[active[retry]])
+            retry = retry[worse[retry]]
+
+        #points that stepped out of the physical region keep their last state
+        keep = np.all(np.isfinite(ra), axis = 1)
+        stale[active[~keep]] = True
+        active, xa, ra, worse = active[keep], xa[keep], ra[keep], worse[keep]
+        s = xa - x[active]
+
+        #Broyden update of the Jacobian, a fresh one where the step went uphill
+        if broyden:
+            ss = np.einsum('ij,ij->i', s, s)
+            Js = np.einsum('ijk,ik->ij', J[active], s)
+            J[active] += np.einsum('ij,ik->ijk', ra - r[active] - Js, s)/np.maximum(ss, 1e-300)[:, None, None]
+            stale[active] = worse
+        else:
+            stale[active] = True
+
+        x[active] = xa
+        r[active] = ra
+        norm[active] = np.max(np.abs(ra), axis = 1)
+    return x, r, J, norm < tol, iterations
+
+def _features(fc, spec):
+    """
+    returns the (n, 9) log features of the operating points that the seed fit
+    is linear in, a monomial fit of the unknowns
+    """
+    isF = ~np.isnan(spec['F'])
+    isalpha = ~np.isnan(spec['\\alpha'])
+    cols = [np.log(fc[name]) for name in ['M', 'T_{atm}', 'P_{atm}', 'c1']]
+    cols.extend([np.where(isF, np.log(np.abs(np.where(isF, spec['F'], 1.))), 0.),
+                 np.where(isF, 0., np.log(np.where(isF, 1., spec['T_{t_{4.1}}']))),
+                 np.where(isalpha, np.log(np.where(isalpha, spec['\\alpha'], 1.)), 0.),
+                 isF*1., isalpha*1.])
+    return np.array([np.ones(len(isF))] + cols).T
+
+def _guess(design, fc, spec):
+    """
+    returns the map design point initial guess of the operating points
+    """
+    Tt41 = spec['T_{t_{4.1}}']
+    return design.initial_guess(fc, np.where(np.isnan(Tt41), 1400., Tt41))
+
+def offdesign(design, M, Tatm, Patm, Fspec = None, Tt41spec = None, alphaspec = None, fixed = None,
+              mode = 'nozzle', x0 = None, tol = 1e-9, maxiter = 50, broyden = True, chunk = 50000,
+              nseed = 1000, outputs = None):
+    """
+    solves the off-design cycle of design at every operating point
+    ________
+    INPUTS
+    design = EngineDesign
+    M, Tatm [K], Patm [kPa] = arrays of the flight Mach number and ambient conditions
+    Fspec [N] or Tt41spec [K] = array of the specified thrust or turbine inlet
+    temperature, nan entries of Fspec fall back on Tt41spec
+    alphaspec = array of the by pass ratio to hold in place of the fan flow
+    residual, nan where the fan flow residual applies
+    fixed = {name: array} of other flight condition variables to hold, e.g. the
+    face Mach numbers 'M_2' and 'M_{2.5}' of 'face' mode or a mission's 'c1'
+    x0 = (n, 6) initial log values of UNKNOWNS, defaults to a monomial fit of
+    the solutions at nseed random points, themselves started at the map design points
+    chunk = number of points solved together, bounds the memory use
+    outputs = names of the returned quantities, all of them by default
+
+    OUTPUTS
+    {name: array} of every station quantity plus 'converged', 'iterations',
+    'residual' (largest residual) and 'in map'
+    """
+    M, Tatm, Patm = np.broadcast_arrays(*[np.atleast_1d(np.asarray(a, dtype=float)) for a in [M, Tatm, Patm]])
+    n = len(M)
+    spec = {}
+    for name, value in [('F', Fspec), ('T_{t_{4.1}}', Tt41spec), ('\\alpha', alphaspec)]:
+        spec[name] = np.nan*np.ones(n) if value is None else np.asarray(value, dtype=float)*np.ones(n)
+    if np.any(np.isnan(spec['F']) & np.isnan(spec['T_{t_{4.1}}'])):
+        raise ValueError("every point needs a specified thrust or turbine inlet temperature")
+    values = {'M': M, 'T_{atm}': Tatm, 'P_{atm}': Patm, 'R': design.constants['R']}
+    for name, value in (fixed or {}).items():
+        values[name] = np.asarray(value, dtype=float)*np.ones(n)
+    fc = flight_conditions(values, n)
+
+    #solve a random subset from the map design points, the rest start from a
+    #monomial fit of its unknowns and Jacobians
+    coef = None
+    if x0 is None and nseed and n > 2*nseed:
+        pick = np.random.RandomState(0).choice(n, nseed, replace = False)
+        fcs, specs = _take(fc, pick), _take(spec, pick)
+        xs, rs, Js, ok, its = _newton(design, _guess(design, fcs, specs), fcs, specs, mode, tol, maxiter, broyden)
+        if np.sum(ok) > 20:
+            coef = np.linalg.lstsq(_features(_take(fcs, ok), _take(specs, ok)),
+                                   np.hstack([xs[ok], Js[ok].reshape(-1, 36)]), rcond = None)[0]
+
+    result = {}
+    for start in range(0, n, chunk):
+        idx = slice(start, min(start + chunk, n))
+        fci, speci = _take(fc, idx), _take(spec, idx)
+        Ji = None
+        if x0 is not None:
+            xi = np.array(x0[idx], dtype = float)
+        elif coef is not None:
+            fit = _features(fci, speci).dot(coef)
+            xi, Ji = fit[:, :6], fit[:, 6:].reshape(-1, 6, 6)
+        else:
+            xi = _guess(design, fci, speci)
+        xi, ri, Ji, converged, iterations = _newton(design, xi, fci, speci, mode, tol, maxiter, broyden, Ji)
+        st = design.residuals(xi, fci, speci, mode)[1]
+        st.update(fci)
+        st.update({'converged': converged, 'iterations': iterations,
+                   'residual': np.max(np.abs(ri), axis = 1), 'in map': design.in_map(st)})
+        for name, value in st.items():
+            if np.ndim(value) and (outputs is None or name in outputs):
+                result.setdefault(name, []).append(np.asarray(value))
+    return dict((name, np.concatenate(value)) for name, value in result.items())
+
+def frozen_model(eng, N, substitutions, res7 = 0):
+    """
+    builds an engine of N operating points with only its off design
+    constraints, minimizing the sum of their TSFC, its first GP is unbounded
+    without the sizing constraints unless it is started from a solved cycle
+    """
+    subs = engine_validation.validation_substitutions(eng)
+    subs.update(substitutions)
+    with engine_validation.BUILD_LOCK:
+        with Vectorize(N):
+            state = engine_validation.TestState()
+        engine = engine_validation.Engine(res7, True, N, state, eng, frozen = True)
+        m = Model(engine.engineP.thrustP['TSFC'].sum(), [engine], subs)
+    return engine, m
+
+class FrozenEngine(object):
+    """
+    Engine of fixed design evaluated at batches of operating points through a
+    reduced off design model, the model is compiled once per chunk size and
+    reused by substitution across batches and designs
+    ________
+    INPUTS
+    eng = engine preset of the design
+    design = EngineDesign holding the solved design
+    chunk = number of operating points solved together
+    res7 = 0 for a specified thrust, 1 for a specified turbine inlet temperature
+    cache = EngineCache holding the compiled reduced models
+    fixed = {name: value} of other constants to substitute, e.g. a relaxed
+    '\\alpha_{max}', the by pass ratio bound is the design's otherwise
+    """
+    def __init__(self, eng, design, chunk = 8, res7 = 0, cache = CACHE, fixed = None):
+        self.eng = eng
+        self.design = design
+        self.chunk = chunk
+        self.res7 = res7
+        self.cache = cache
+        self.fixed = fixed or {}
+        self.key = signature(res7, True, chunk, eng) + ('frozen',)
+        self.spec = 'F_{spec}' if res7 == 0 else 'T_{t_{4spec}}'
+
+    def substitutions(self, points):
+        """
+        returns the substitutions fixing the design and a chunk of operating points
+        """
+        #the compiled models are shared, so the by pass ratio bound is always reset
+        subs = dict((name, self.design.values[name]) for name in FROZEN + ['\\alpha_{max}'])
+        subs.update(self.fixed)
+        fc = flight_conditions(points, self.chunk)
+        for name in CONDITIONS:
+            subs[name] = fc[name]
+        subs[self.spec] = points[self.spec]
+        return subs
+
+    def evaluate(self, points, outputs = OUTPUTS):
+        """
+        solves every operating point of points = {name: array}, which needs
+        'M', 'T_{atm}' [K], 'P_{atm}' [kPa] and 'F_{spec}' [N] ('T_{t_{4spec}}' [K]
+        when res7 = 1), the other CONDITIONS default as in flight_conditions,
+        returns {name: array} of outputs plus 'converged', False for the
+        points of chunks that failed to solve
+        """
+        n = len(points['M'])
+        points = dict((name, np.asarray(value, dtype = float)*np.ones(n)) for name, value in points.items())
+        #every chunk starts from the face mode solution of its points
+        fc = flight_conditions(points, n)
+        seed = offdesign(self.design, fc['M'], fc['T_{atm}'], fc['P_{atm}'], Fspec = points.get('F_{spec}'),
+                         Tt41spec = points.get('T_{t_{4spec}}'), mode = 'face',
+                         fixed = dict((name, fc[name]) for name in CONDITIONS[3:]))
+
+        result = dict((name, np.nan*np.ones(n)) for name in outputs)
+        result['converged'] = np.zeros(n, dtype = bool)
+        for start in range(0, n, self.chunk):
+            #the last chunk is padded by repeating its last point
+            idx = np.minimum(np.arange(start, start + self.chunk), n - 1)
+            subs = self.substitutions(dict((name, value[idx]) for name, value in points.items()))
+            compiled = self.cache.get(self.key, lambda: frozen_model(self.eng, self.chunk, subs, self.res7))
+            compiled.x0 = initial_guess(compiled.model, dict((name, value[idx]) for name, value in seed.items()))
+            try:
+                sol = compiled.solve(subs)
+            except (RuntimeWarning, ValueError):
+                continue
+            valid = idx[:min(self.chunk, n - start)]
+            for name in outputs:
+                result[name][valid] = mag(sol(compiled.engine[name]))[:len(valid)]
+            result['converged'][valid] = True
+        return result
+
+def crosscheck(eng, mode = 'face'):
+    """
+    solves validation engine eng with localsolve, freezes its design and
+    re-solves every flight segment with the NumPy solver, returns the
+    {name: largest relative difference} of TSFC, F and Tt4.1
+    """
+    N = 3 if eng == 1 else 2
+    engine, m = engine_validation.validation_model(eng)
+    sol = m.localsolve(verbosity = 0, x0 = estimate(engine, m, N).x0(m))
+    design = engine_design(engine, sol)
+    values = conditions(m, N)
+    fc = flight_conditions(values, N)
+    fixed = dict((name, fc[name]) for name in ['c1', 'M_2', 'M_{2.5}', 'hold_{2}', 'hold_{2.5}'])
+    #where the mission leaves the fan face Mach number free the by pass ratio
+    #sits on its upper bound instead
+    alphaspec = np.where(np.isnan(values.get('M_2', np.nan)*np.ones(N)), design.values['\\alpha_{max}'], np.nan)
+
+    res = offdesign(design, fc['M'], fc['T_{atm}'], fc['P_{atm}'], Fspec = values.get('F_{spec}'),
+                    Tt41spec = values.get('T_{t_{4spec}}'), alphaspec = alphaspec, fixed = fixed, mode = mode)
+    assert np.all(res['converged'])
+    errors = {}
+    for name, key in [('TSFC', engine.engineP.thrustP['TSFC']), ('F', engine.engineP.thrustP['F']),
+                      ('T_{t_{4.1}}', engine.engineP.combP['T_{t_{4.1}}'])]:
+        gp = mag(sol(key))
+        errors[name] = np.max(np.abs(res[name]/gp - 1))
+    return errors
+
+def benchmark(eng = 0, npoints = 10**6):
+    """
+    times the nozzle mode solver over npoints random cruise and climb points
+    of validation engine eng
+    """
+    N = 3 if eng == 1 else 2
+    engine, m = engine_validation.validation_model(eng)
+    sol = m.localsolve(verbosity = 0, x0 = estimate(engine, m, N).x0(m))
+    design = engine_design(engine, sol)
+    Fref = np.min(mag(sol(engine.engineP.thrustP['F'])))
+
+    rand = np.random.RandomState(0)
+    Tatm, Patm = atmosphere(rand.uniform(6000, 11000, npoints))
+    M = rand.uniform(.6, .85, npoints)
+    Fspec = Fref*rand.uniform(.7, 1.1, npoints)
+    tic = time()
+    res = offdesign(design, M, Tatm, Patm, Fspec = Fspec, outputs = ['TSFC', 'T_{t_{4.1}}', 'converged', 'iterations', 'in map'])
+    toc = time() - tic
+    print("%i points in %.3g s, %.4g%% converged, %.4g%% in the maps, %.3g iterations on average"
+          % (npoints, toc, 100*np.mean(res['converged']), 100*np.mean(res['in map']), np.mean(res['iterations'])))
+    return res
+
+def frozen_crosscheck(eng = 0, npoints = 4, chunk = 2):
+    """
+    evaluates npoints random cruise points of validation engine eng with a
+    FrozenEngine and with the face mode solver, returns the largest relative
+    difference of TSFC, the points are kept inside the maps and
+    under the by pass ratio upper bound which only the GP enforces
+    """
+    N = 3 if eng == 1 else 2
+    engine, m = engine_validation.validation_model(eng)
+    sol = m.localsolve(verbosity = 0, x0 = estimate(engine, m, N).x0(m))
+    design = engine_design(engine, sol)
+    Fref = np.min(mag(sol(engine.engineP.thrustP['F'])))
+
+    rand = np.random.RandomState(0)
+    Tatm, Patm = atmosphere(rand.uniform(10000, 11000, npoints))
+    M = rand.uniform(.76, .8, npoints)
+    points = {'M': M, 'T_{atm}': Tatm, 'P_{atm}': Patm, 'F_{spec}': Fref*rand.uniform(1., 1.05, npoints), 'M_2': M}
+    tic = time()
+    res = FrozenEngine(eng, design, chunk).evaluate(points)
+    print("%i points in %.3g s with a frozen engine" % (npoints, time() - tic))
+    assert np.all(res['converged'])
+
+    ref = offdesign(design, M, Tatm, Patm, Fspec = points['F_{spec}'], fixed = {'M_2': M}, mode = 'face')
+    return np.max(np.abs(res['TSFC']/ref['TSFC'] - 1))
+
+def test():
+    """
+    cross checks the face mode solver against localsolve on the CFM56 and
+    TASOPT test missions, checks the nozzle mode solver converges off design
+    and checks a frozen CFM56 matches the face mode solver
+    """
+    for eng in [0, 1]:
+        errors = crosscheck(eng)
+        for name, error in errors.items():
+            assert error < 1e-3, (eng, name, error)
+
+    res = benchmark(0, 5000)
+    assert np.mean(res['converged']) > .99
+
+    assert frozen_crosscheck(0, 4, 2) < 1e-3
+
+if __name__ == "__main__":
+    for eng in range(4):
+        print("engine %i: %s" % (eng, crosscheck(eng)))
+    benchmark()
+    print("frozen engine TSFC difference: %.3g" % frozen_crosscheck())
@@ -0,0 +1,157 @@
+"""Throttle operating lines of a fixed engine design on its fan, LPC and HPC maps"""
+import numpy as np
+from time import time
+import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from engine_cache import CACHE
+from cycle_estimate import estimate, flight_conditions
+from offdesign import FrozenEngine, CONDITIONS, atmosphere, offdesign, engine_design
+import engine_validation
+
+#quantities returned along an operating line
+LINE_OUTPUTS = ['T_{t_{4.1}}', 'F', 'TSFC', 'N_f', 'N_1', 'N_2', '\\pi_f', '\\pi_{lc}', '\\pi_{hc}',
+                'm_{tild_f}', 'm_{tild_lc}', 'm_{tild_hc}', '\\alpha']
+
+#map relations of the fanmap, lpcmap and hpcmap constraint groups of Engine.setup,
+#(name, normalized flow, pressure ratio, design pressure ratio, reference pressure
+#ratio, band edge pressure ratio at normalized flow m and band factor k, speed line
+#pressure ratio at speed N), the pressure ratios are normalized by the reference
+MAPS = [
+    ('fan', 'm_{tild_f}', '\\pi_f', '\\pi_{f_D}', 1.7,
+     lambda m, k: (k*1.06*m**.137)**10, lambda N: (1.05*N**.0871)**10),
+    ('LPC', 'm_{tild_lc}', '\\pi_{lc}', '\\pi_{lc_D}', 26.,
+     lambda m, k: k*(1.38*m**.122)**10, lambda N: (1.38*N**.566)**10),
+    ('HPC', 'm_{tild_hc}', '\\pi_{hc}', '\\pi_{hc_D}', 26.,
+     lambda m, k: k*(1.38*m**.122)**10, lambda N: (1.35*N**.566)**10),
+    ]
+
+def operating_line(eng, design, states, Tt41, alphamax = 50., tol = 1e-3, cache = CACHE):
+    """
+    solves the part power line of design at every flight state in one batched,
+    warm started solve of a frozen engine with a specified turbine inlet temperature
+    ________
+    INPUTS
+    eng = engine preset of design
+    design = EngineDesign
+    states = {name: array} of the flight states, 'M', 'T_{atm}' [K], 'P_{atm}' [kPa]
+    and optionally the other CONDITIONS, the fan face Mach number defaults to
+    the flight Mach number the way the missions set it
+    Tt41 = turbine inlet temperatures [K] of the throttle grid, idle to max
+    alphamax = by pass ratio bound of the solve, the design's bound would cut
+    every line off at its sizing point
+    tol = largest relative TSFC difference to the off design solver of a kept point
+
+    OUTPUTS
+    {name: (states, throttle) array} of LINE_OUTPUTS plus 'converged', points
+    the GP cannot reach are nan
+    """
+    Tt41 = np.asarray(Tt41, dtype = float)
+    nstates, nthrottle = len(np.atleast_1d(states['M'])), len(Tt41)
+    n = nstates*nthrottle
+    points = dict((name, np.repeat(np.asarray(value, dtype = float)*np.ones(nstates), nthrottle))
+                  for name, value in states.items())
+    points.setdefault('M_2', points['M'])
+    points['T_{t_{4spec}}'] = np.tile(Tt41, nstates)
+
+    #the GP holds every point inside the map bands and, its thrusts being
+    #positive variables, needs a positive core nozzle thrust, which the lowest
+    #throttle settings lack, only the points meeting both are solved
+    fc = flight_conditions(points, n)
+    seed = offdesign(design, fc['M'], fc['T_{atm}'], fc['P_{atm}'], Tt41spec = points['T_{t_{4spec}}'],
+                     fixed = dict((name, fc[name]) for name in CONDITIONS[3:]), mode = 'face',
+                     outputs = ['F_6', 'TSFC', 'converged', 'in map'])
+    reach = np.where(seed['converged'] & seed['in map'] & (seed['F_6'] > 0))[0]
+
+    result = dict((name, np.nan*np.ones(n)) for name in LINE_OUTPUTS)
+    result['converged'] = np.zeros(n, dtype = bool)
+    if len(reach):
+        frozen = FrozenEngine(eng, design, len(reach), 1, cache, {'\\alpha_{max}': alphamax})
+        res = frozen.evaluate(dict((name, value[reach]) for name, value in points.items()), LINE_OUTPUTS)
+        #near idle the signomial program can settle on a point where the fuel
+        #inequality is loose, those leave the cycle solution and are dropped
+        tight = np.abs(res['TSFC']/seed['TSFC'][reach] - 1) < tol
+        reach = reach[tight & res['converged']]
+        for name in result:
+            result[name][reach] = res[name][tight & res['converged']]
+    return dict((name, value.reshape(nstates, nthrottle)) for name, value in result.items())
+
+def plot_lines(design, lines, labels = None, path = None):
+    """
+    draws the operating lines on the fan, LPC and HPC maps of design, with
+    the speed lines and the band around the map spine the engine must stay in
+    ________
+    INPUTS
+    lines = output of operating_line
+    labels = names of the flight states, for the legend
+    path = file the figure is saved to, shown instead when None
+    """
+    #a figure that is only saved is drawn without a display
+    fig = Figure(figsize = (15, 5)) if path else plt.figure(figsize = (15, 5))
+    axes = [fig.add_subplot(1, 3, i + 1) for i in range(3)]
+    for ax, (name, flow, pi, piD, piref, band, speed) in zip(axes, MAPS):
+        scale = design.values[piD]/piref
+        m = np.linspace(.5, max(1.3, 1.05*np.nanmax(lines[flow])), 50)
+        ax.plot(m, scale*band(m, 1.), '-k', linewidth = 1.)
+        for k in [.9, 1.1]:
+            ax.plot(m, scale*band(m, k), '--k', linewidth = 1.)
+        for N in [.8, .9, 1., 1.1]:
+            ax.axhline(scale*speed(N), color = '.7', linewidth = .8)
+            ax.text(m[-1], scale*speed(N), ' N = %.1f' % N, va = 'center', fontsize = 8)
+        for i in range(lines[flow].shape[0]):
+            label = labels[i] if labels else None
+            ax.plot(lines[flow][i], lines[pi][i], 'o-', linewidth = 2., label = label)
+        ax.set_xlabel('Normalized Corrected Mass Flow')
+        ax.set_ylabel('Pressure Ratio')
+        ax.set_title('%s Map' % name)
+    if labels:
+        axes[0].legend(loc = 2)
+    if path:
+        FigureCanvasAgg(fig).print_figure(path)
+    else:
+        plt.show()
+
+def test():
+    """
+    solves the operating lines of the CFM56 validation engine at two cruise
+    states and checks them against the off design solver
+    """
+    import os, tempfile
+    engine, m = engine_validation.validation_model(0)
+    sol = m.localsolve(verbosity = 0, x0 = estimate(engine, m, 2).x0(m))
+    design = engine_design(engine, sol)
+
+    Tatm, Patm = atmosphere(np.array([10668., 10000.]))
+    states = {'M': np.array([.8, .78]), 'T_{atm}': Tatm, 'P_{atm}': Patm}
+    Tt41 = np.array([1000., 1250., 1300.])
+    lines = operating_line(0, design, states, Tt41)
+    assert lines['F'].shape == (2, 3)
+
+    #idle has a negative core nozzle thrust, the rest of the line is solved
+    assert not np.any(lines['converged'][:, 0]) and np.all(lines['converged'][:, 1:])
+    assert np.all(np.diff(lines['F'][:, 1:], axis = 1) > 0)
+    for i in range(2):
+        M = states['M'][i]*np.ones(2)
+        ref = offdesign(design, M, Tatm[i], Patm[i], Tt41spec = Tt41[1:], fixed = {'M_2': M}, mode = 'face')
+        assert np.all(np.abs(lines['TSFC'][i, 1:]/ref['TSFC'] - 1) < 1e-3)
+        assert np.all(np.abs(lines['N_1'][i, 1:]/ref['N_1'] - 1) < 1e-3)
+
+    handle, path = tempfile.mkstemp(suffix = '.png')
+    os.close(handle)
+    try:
+        plot_lines(design, lines, ['10668 m', '10000 m'], path)
+        assert os.path.getsize(path) > 0
+    finally:
+        os.remove(path)
+
+if __name__ == "__main__":
+    engine, m = engine_validation.validation_model(0)
+    sol = m.localsolve(verbosity = 0, x0 = estimate(engine, m, 2).x0(m))
+    design = engine_design(engine, sol)
+    h = np.array([10668., 8000., 5000.])
+    Tatm, Patm = atmosphere(h)
+    tic = time()
+    lines = operating_line(0, design, {'M': np.array([.8, .7, .6]), 'T_{atm}': Tatm, 'P_{atm}': Patm},
+                           np.linspace(1100, 1400, 7))
+    print("%i operating points in %.3g s" % (np.sum(lines['converged']), time() - tic))
+    plot_lines(design, lines, ['%i m' % hi for hi in h], 'Figures/operating_lines.png')
@@ -0,0 +1,270 @@
+"""Missions composed of flight phases, one vectorized engine sliced across the climb, cruise climb and cruise segments of every phase"""
+import numpy as np
+from time import time
+from contextlib import contextmanager
+from gpkit import Model, Variable, Vectorize
+from gpkit.constraints.tight import Tight as TCS
+from gpkit.small_scripts import mag
+from simple_ac_imports import (Aircraft, ClimbSegment, CruiseClimbSegment, CruiseSegment, FlightState, StateSlice,
+                               SharedConstants)
+from engine_cache import EngineCache
+
+#segment model of each kind of phase
+SEGMENTS = {'climb': ClimbSegment, 'cruise-climb': CruiseClimbSegment, 'cruise': CruiseSegment}
+
+#name of the phases of each kind, numbered when a name repeats, the fuel burned
+#in a phase is W_{f_{name}}
+NAMES = {'climb': 'climb', 'cruise-climb': 'cruise', 'cruise': 'cruise'}
+
+#compiled missions, by mission class and structure
+CACHE = EngineCache()
+
+def layout(phases):
+    """
+    returns the phases, (kind, N) or (kind, N, name), as a tuple of (kind,
+    N, name), the names NAMES gives numbered from 1 where a name repeats
+    """
+    phases = [tuple(phase) for phase in phases]
+    for phase in phases:
+        if phase[0] not in SEGMENTS:
+            raise ValueError("a phase is one of %s, not %r" % (sorted(SEGMENTS), phase[0]))
+        if phase[1] < 1:
+            raise ValueError("phase %r has no segments" % (phase,))
+    names = [phase[2] if len(phase) > 2 else NAMES[phase[0]] for phase in phases]
+    numbered = []
+    for i, name in enumerate(names):
+        if names.count(name) > 1:
+            name += str(names[:i].count(name) + 1)
+        numbered.append(name)
+    return tuple((kind, N, name) for (kind, N), name in zip([phase[:2] for phase in phases], numbered))
+
+@contextmanager
+def fleet(Nfleet):
+    """
+    vectorizes over the aircraft of a fleet, nothing for a single aircraft
+    """
+    if Nfleet:
+        with Vectorize(Nfleet):
+            yield
+    else:
+        yield
+
+class PhasedMission(Model):
+    """
+    Mission flying the phases of a layout in order, one FlightState and one
+    Engine vectorized over every segment, the segments of each phase fly at
+    its slice of them, the weights are chained across the phase boundaries
+    and the fuel of every segment is burned at its slice of the engine,
+    altitudes and ranges are left to the missions built on it
+    ________
+    INPUTS
+    phases = [(kind, N) or (kind, N, name)], see layout
+    Nfleet = number of aircraft of a fleet, 0 for one aircraft
+    surrogate, reduction, cooling, BLI = engine options, as in Aircraft
+    atmosphere = mode of the Atmosphere of the FlightState
+
+    OUTPUTS
+    self.layout = layout of phases
+    self.phase = {name: segment model}
+    self.slices = {name: slice of the engine's segments}
+    self.weights = {name: Variable} of the total, dry and fuel weights
+    """
+    #variable the compiled missions minimize
+    COST = 'W_{f_{total}}'
+
+    def setup(self, phases, Nfleet = 0, surrogate = None, reduction = None, cooling = True, BLI = False,
+              atmosphere = 'sp', **kwargs):
+        eng = 0
+        self.layout = layout(phases)
+        N = sum(n for _, n, _ in self.layout)
+        Nclimb = sum(n for kind, n, _ in self.layout if kind == 'climb')
+
+        #physical constants, declared once for every segment and aircraft
+        constants = SharedConstants()
+
+        with fleet(Nfleet):
+            with Vectorize(N):
+                enginestate = FlightState(constants, atmosphere = atmosphere)
+        self.enginestate = enginestate
+
+        ac = Aircraft(Nclimb, N - Nclimb, enginestate, eng, Nfleet, surrogate, reduction, cooling, BLI,
+                      constants = constants)
+        self.ac = ac
+
+        #the segments fly at slices of the engine's state, shared with no linking
+        #constraints
+        self.phase, self.slices, segments = {}, {}, []
+        start = 0
+        with fleet(Nfleet):
+            for kind, n, name in self.layout:
+                self.slices[name] = slice(start, start + n)
+                with Vectorize(n):
+                    self.phase[name] = SEGMENTS[kind](ac, StateSlice(enginestate, self.slices[name]))
+                segments.append(self.phase[name])
+                start += n
+
+            W_ftotal = Variable('W_{f_{total}}', 'N', 'Total Fuel Weight')
+            W_total = Variable('W_{total}', 'N', 'Total Aircraft Weight')
+            W_dry = Variable('W_{dry}', 'N', 'Aircraft Dry Weight')
+            fuel = [Variable('W_{f_{%s}}' % name, 'N', 'Fuel Weight Burned in %s' % name.capitalize())
+                    for _, _, name in self.layout]
+        names = ['W_{f_{total}}', 'W_{total}', 'W_{dry}'] + ['W_{f_{%s}}' % name for _, _, name in self.layout]
+        self.weights = dict(zip(names, [W_ftotal, W_total, W_dry] + fuel))
+
+        constraints = [
+            #weight constraints
+            TCS([ac['W_{e}'] + ac['W_{payload}'] + ac['numeng'] * ac['W_{engine}'] + ac['W_{wing}'] <= W_dry]),
+            TCS([W_dry + W_ftotal <= W_total]),
+
+            segments[0]['W_{start}'][0] == W_total,
+            TCS([W_dry <= segments[-1]['W_{end}'][-1]]),
+
+            TCS([W_ftotal >= sum(fuel)]),
+            ]
+
+        M2 = .8
+        M25 = .6
+        M0 = .8
+
+        engine = ac.engine
+        faces = surrogate is None and reduction is None
+        if faces:
+            #the surrogate fits already hold the engine face conditions, the
+            #reduced engine sets them at its representative points
+            constraints.extend([
+                engine.engineP['hold_{2}'] == 1+.5*(1.398-1)*M2**2,
+                engine.engineP['hold_{2.5}'] == 1+.5*(1.354-1)*M25**2,
+                engine.engineP['c1'] == 1+.5*(.401)*M0**2,
+                ])
+
+        for i, (kind, n, name) in enumerate(self.layout):
+            segment, idx = self.phase[name], self.slices[name]
+            if i:
+                #weights across the phase boundary
+                constraints.append(segments[i - 1]['W_{end}'][-1] == segment['W_{start}'][0])
+            if n > 1:
+                constraints.append(segment['W_{start}'][1:] == segment['W_{end}'][:-1])
+
+            constraints.extend([
+                TCS([segment['W_{start}'] >= segment['W_{end}'] + segment['W_{burn}']]),
+                TCS([fuel[i] >= sum(segment['W_{burn}'])]),
+
+                #compute fuel burn from TSFC
+                segment['W_{burn}'] == ac['numeng'] * engine['TSFC'][idx] * segment['thr'] * engine['F'][idx],
+                ])
+
+            if kind == 'cruise':
+                constraints.extend([
+                    #steady level flight constraint on D
+                    segment['D'] == ac['numeng'] * engine['F_{spec}'][idx],
+
+                    #breguet range eqn
+                    TCS([segment['z_{bre}'] >= (engine['TSFC'][idx] * segment['thr'] *
+                                                segment['D']) / segment['W_{avg}']]),
+                    ])
+            else:
+                constraints.extend([
+                    #constraint on drag and thrust
+                    ac['numeng'] * engine['F_{spec}'][idx] >= segment['D'] + segment['W_{avg}'] * segment['\\theta'],
+
+                    #climb rate constraints
+                    TCS([segment['excessP'] + segment.state['V'] * segment['D'] <=
+                         segment.state['V'] * ac['numeng'] * engine['F_{spec}'][idx]]),
+                    ])
+
+            if faces:
+                constraints.extend([
+                    engine.engineP['M_2'][idx] == segment['M'],
+                    engine.engineP['M_{2.5}'][idx] == M25,
+                    ])
+
+        return constraints, ac, segments, enginestate
+
+def _hashable(value):
+    """
+    returns value with its lists and dicts made tuples, for a cache key
+    """
+    if isinstance(value, dict):
+        value = sorted(value.items())
+    if isinstance(value, (list, tuple)):
+        return tuple(_hashable(v) for v in value)
+    return value
+
+def compiled(mission, args = (), substitutions = None, **options):
+    """
+    returns the CompiledEngine of mission(*args, **options) minimizing its
+    COST, built and compiled on the first call for its mission class,
+    arguments and options, with substitutions, the names substituted then
+    are the constants of every later solve, which changes their values only
+    ________
+    INPUTS
+    mission = PhasedMission or a mission built on it
+    args, options = arguments of mission, the layout and the engine options
+    substitutions = {name: value} the mission is built with
+
+    OUTPUTS
+    compiled model, see CompiledEngine.solve
+    """
+    key = (mission.__module__, mission.__name__, _hashable(args), _hashable(options))
+
+    def build():
+        """
+        builds the mission and its model
+        """
+        built = mission(*args, **options)
+        return built.ac.engine, Model(built[mission.COST], built, substitutions or {})
+
+    return CACHE.get(key, build)
+
+def test():
+    """
+    checks the phase layouts and builds the missions of each layout, then
+    solves the Mission(2, 2) of the test twice from the cache, the second at
+    a longer range by substitution only
+    """
+    from engine_flight_profile_integration import Mission, mission_substitutions
+    assert layout([('climb', 2), ('climb', 2), ('cruise-climb', 3)]) == (
+        ('climb', 2, 'climb1'), ('climb', 2, 'climb2'), ('cruise-climb', 3, 'cruise'))
+    try:
+        layout([('descent', 2)])
+        assert False, "an unknown phase was laid out"
+    except ValueError:
+        pass
+
+    mission = PhasedMission([('climb', 1), ('cruise-climb', 2), ('cruise', 2)])
+    assert mission.slices['cruise2'] == slice(3, 5)
+    assert mission.ac.engine['TSFC'].shape == (5,)
+    assert mission.phase['cruise1']['W_{start}'].shape == (2,)
+
+    substitutions = mission_substitutions()
+    sol = compiled(Mission, (2, 2), substitutions).solve()
+    #the fuel burn of the Mission(2, 2) test before it was built on phases
+    assert abs(mag(sol('W_{f_{total}}'))/49893.2 - 1) < 1e-4
+    hits = CACHE.hits
+    longer = compiled(Mission, (2, 2), substitutions).solve({'ReqRng': 2200})
+    assert CACHE.hits == hits + 1
+    assert mag(longer('W_{f_{total}}')) > mag(sol('W_{f_{total}}'))
+
+def benchmark(ranges = (1500., 1750., 2000., 2250.)):
+    """
+    compares building and solving Mission(2, 2) at every required range of
+    ranges against building it once and re-solving it from the cache
+    """
+    from engine_flight_profile_integration import Mission, mission_substitutions
+    substitutions = mission_substitutions()
+    tic = time()
+    rebuilt = []
+    for rng in ranges:
+        mission = Mission(2, 2)
+        m = Model(mission['W_{f_{total}}'], mission, dict(substitutions, ReqRng = rng))
+        rebuilt.append(mag(m.localsolve(verbosity = 0)('W_{f_{total}}')))
+    rebuild = time() - tic
+
+    tic = time()
+    cached = [mag(compiled(Mission, (2, 2), substitutions).solve({'ReqRng': rng})('W_{f_{total}}'))
+              for rng in ranges]
+    print("%i ranges: rebuilt %.3g s, cached %.3g s, largest fuel burn difference %.2g%%"
+          % (len(ranges), rebuild, time() - tic, 100*np.max(np.abs(np.array(cached)/rebuilt - 1))))
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,236 @@
+"""Presolve of engine and mission models, eliminates the variables monomial equalities define and repeated constraints"""
+import numpy as np
+from time import time
+from collections import defaultdict
+from pint.util import UnitsContainer
+from gpkit import Model, SignomialsEnabled, units
+from gpkit.nomials import parse_subs, Monomial, MonomialEquality, SingleSignomialEquality
+from gpkit.small_scripts import mag
+from gpkit.solution_array import SolutionArray
+from cycle_estimate import estimate
+import engine_validation
+
+#largest power a substitution may raise a variable to
+MAXPOWER = 20.
+
+def sizes(model):
+    """
+    returns the (free variables, constraints) of model, the sizes the
+    solver sees before the GPs substitute the constants
+    """
+    constants, _, _ = parse_subs(model.varkeys, model.substitutions)
+    return len(model.varkeys) - len(constants), len(list(model.flat(constraintsets = False)))
+
+def _clean(nomial, digits = 9):
+    """
+    returns nomial rounded where chained substitutions leave round off, in
+    the exponents of its variables, which would otherwise keep cancelled
+    variables in it, and of its units, which would no longer convert
+    """
+    exps = [dict((vk, e) for vk, e in exp.items() if round(e, digits)) for exp in nomial.exps]
+    cs = nomial.cs
+    if hasattr(cs, 'units'):
+        cs = units.Quantity(cs.magnitude, UnitsContainer(dict(
+            (name, round(e, digits)) for name, e in cs.units._units.items() if round(e, digits))))
+    return type(nomial)(exps, cs, require_positive = False)
+
+def _key(nomial):
+    """
+    hashable representation of a nomial, equal for equal nomials whatever
+    units their coefficients are written in
+    """
+    cs = nomial.cs
+    if hasattr(cs, 'units'):
+        cs = cs.to_base_units()
+    return (frozenset((frozenset(exp.items()), '%.10g' % c) for exp, c in zip(nomial.exps, mag(cs))),
+            str(getattr(cs, 'units', None)))
+
+def substitute(constraint, subs):
+    """
+    returns a copy of constraint with the monomials of subs substituted for
+    its variables
+    """
+    left, right = [_clean(side.sub(subs, require_positive = False)) for side in [constraint.left, constraint.right]]
+    with SignomialsEnabled():
+        if isinstance(constraint, SingleSignomialEquality):
+            return SingleSignomialEquality(left, right)
+        return type(constraint)(left, constraint.oper, right)
+
+def package(model, result):
+    """
+    packages the raw solver result of model's program the way Model.solve does
+    """
+    solution = SolutionArray()
+    solution.append(result)
+    solution.program = model.program
+    solution.to_united_array(unitless_keys = ['sensitivities'], united = True)
+    if model.cost.units:
+        solution['cost'] = solution['cost']*model.cost.units
+    model.solution = solution
+    return solution
+
+class Presolved(object):
+    """
+    Model reduced before the solver by substituting out the free variables
+    that monomial equalities define, e.g. P_{t_8} == P_{t_7} or h_{t} == Cp*T_t,
+    and dropping the constraints left trivial or repeated, solutions of the
+    reduced model are mapped back to every variable of the original
+    ________
+    INPUTS
+    model = Model to reduce, it is left unchanged
+
+    OUTPUTS
+    self.model = the reduced Model, solved by solve and localsolve
+    self.eliminated = {VarKey: Monomial of the remaining variables} of the
+    eliminated variables
+    self.dropped = number of trivial and repeated constraints dropped
+    self.sizes = {'original': (free variables, constraints), 'reduced': ...}
+    """
+    def __init__(self, model):
+        self.original = model
+        constants, sweep, linkedsweep = parse_subs(model.varkeys, model.substitutions)
+        if sweep or linkedsweep:
+            raise ValueError("sweeps are not supported by a presolved model,"
+                             " presolve each point with its own substitutions")
+        self.constants = constants
+        flat = list(model.flat(constraintsets = False))
+
+        #largest power each variable is raised to, substituting a definition
+        #raises its variables to the power of the one it replaces, fits like
+        #the wing drag one would overflow with their constants raised that far
+        power = defaultdict(float)
+        for side in [model.cost] + [side for c in flat for side in [c.left, c.right]]:
+            for exp in side.exps:
+                for vk, e in exp.items():
+                    power[vk] = max(power[vk], abs(e))
+
+        #the variables are eliminated in the order their equalities appear, a
+        #variable defined in terms of an eliminated one takes its definition
+        self.eliminated = {}
+        rest = []
+        for c in flat:
+            if not isinstance(c, MonomialEquality):
+                rest.append(c)
+                continue
+            ratio = _clean((c.left/c.right).sub(self.eliminated))
+            #a variable is solved for where it has a unit exponent, the one the
+            #left hand side defines first, and only substituted when it restates
+            #a single other free variable, longer definitions merge constraints
+            #into worse scaled ones the solver fails on from a cold start
+            free = [vk for vk in ratio.exp if vk not in constants and abs(round(ratio.exp[vk], 9)) == 1]
+            free.sort(key = lambda vk: vk not in c.left.exp)
+            for x in free:
+                definition = _clean((ratio/Monomial(x)**ratio.exp[x])**(-1./ratio.exp[x]))
+                others = [vk for vk in definition.exp if vk not in constants]
+                if len(others) <= 1 and power[x]*max([abs(e) for e in definition.exp.values()] or [0]) <= MAXPOWER:
+                    break
+            else:
+                rest.append(c)
+                continue
+            for vk, e in definition.exp.items():
+                power[vk] = max(power[vk], power[x]*abs(e))
+            for vk, value in self.eliminated.items():
+                if x in value.exp:
+                    self.eliminated[vk] = _clean(value.sub({x: definition}))
+            self.eliminated[x] = definition
+
+        #constraints the substitutions leave trivial, like P_{t_6} <= P_{t_5}
+        #once P_{t_6} is P_{t_5}, or repeated, like the hold_{2} of every
+        #segment, are dropped
+        constraints, seen = [], set()
+        self.dropped = 0
+        for c in rest:
+            c = substitute(c, self.eliminated)
+            key = (type(c), c.oper, _key(c.left), _key(c.right))
+            if key in seen or _key(c.left) == _key(c.right):
+                self.dropped += 1
+                continue
+            seen.add(key)
+            constraints.append(c)
+
+        self.model = Model(model.cost.sub(self.eliminated), constraints)
+        self.model.substitutions.update(dict((vk, value) for vk, value in constants.items()
+                                             if vk in self.model.varkeys))
+        self.sizes = {'original': (len(model.varkeys) - len(constants), len(flat)),
+                      'reduced': sizes(self.model)}
+
+    def _x0(self, x0):
+        """
+        returns the entries of x0 on variables of the reduced model
+        """
+        if x0 is None:
+            return None
+        self.model.varkeys.update_keymap()
+        return dict((key, value) for key, value in x0.items()
+                    if getattr(key, 'key', key) in self.model.varkeys.keymap)
+
+    def restore(self, result):
+        """
+        adds the values of the eliminated variables to the raw solver result
+        of the reduced model and packages it the way Model.solve does, so it
+        reads like a solution of the original
+        """
+        values = result['variables']
+        #constants only the eliminated constraints held are not in the result
+        for vk, value in self.constants.items():
+            if vk not in values:
+                values[vk] = mag(value.to(getattr(vk.units, 'units', 'dimensionless'))) if hasattr(value, 'to') else value
+        for vk, definition in self.eliminated.items():
+            value = mag(definition.c)*np.prod([values[v]**e for v, e in definition.exp.items()])
+            if hasattr(definition.c, 'units'):
+                value = mag((value*definition.c.units).to(getattr(vk.units, 'units', 'dimensionless')))
+            values[vk] = value
+            result['freevariables'][vk] = value
+        return package(self.model, result)
+
+    def solve(self, verbosity = 0, **kwargs):
+        """
+        solves the reduced model as a GP and restores the eliminated variables
+        """
+        self.model.program = self.model.gp(verbosity = verbosity)
+        return self.restore(self.model.program.solve(verbosity = verbosity, **kwargs))
+
+    def localsolve(self, verbosity = 0, x0 = None, **kwargs):
+        """
+        solves the reduced model as an SP from x0, given on the variables of
+        the original, and restores the eliminated variables
+        """
+        self.model.program = self.model.sp(verbosity = verbosity)
+        return self.restore(self.model.program.localsolve(verbosity = verbosity, x0 = self._x0(x0), **kwargs))
+
+def test():
+    """
+    presolves the CFM56 validation model and checks its solution against the
+    full model's
+    """
+    engine, m = engine_validation.validation_model(0)
+    x0 = estimate(engine, m, 2).x0(m)
+    sol = m.localsolve(verbosity = 0, x0 = x0)
+    reduced = Presolved(m)
+    assert reduced.sizes['reduced'][0] < reduced.sizes['original'][0]
+    assert reduced.sizes['reduced'][1] < reduced.sizes['original'][1]
+    rsol = reduced.localsolve(x0 = x0)
+    for name in ['TSFC', 'F', 'm_{total}', 'P_{t_8}', 'h_{t_0}']:
+        assert np.all(np.abs(mag(rsol(engine[name]))/mag(sol(engine[name])) - 1) < 1e-3), name
+    assert abs(mag(rsol(engine['W_{engine}']))/mag(sol(engine['W_{engine}'])) - 1) < 1e-3
+
+def report():
+    """
+    prints the sizes of the validation models of every engine and of the
+    mission model before and after the presolve
+    """
+    from engine_flight_profile_integration import Mission, mission_substitutions
+    models = []
+    for eng in range(4):
+        models.append(('validation engine %i' % eng, engine_validation.validation_model(eng)[1]))
+    mission = Mission(2, 2)
+    models.append(('Mission(2, 2)', Model(mission['W_{f_{total}}'], mission, mission_substitutions())))
+    for name, m in models:
+        tic = time()
+        reduced = Presolved(m)
+        print("%s: %i variables, %i constraints -> %i variables, %i constraints, %i eliminated, %i dropped in %.3g s"
+              % ((name,) + reduced.sizes['original'] + reduced.sizes['reduced']
+                 + (len(reduced.eliminated), reduced.dropped, time() - tic)))
+
+if __name__ == "__main__":
+    report()
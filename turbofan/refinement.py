@@ -0,0 +1,158 @@
+"""Coarse to fine segment refinement of missions, each resolution solved from the last one's solution interpolated onto its segments"""
+import numpy as np
+from time import time
+from collections import defaultdict
+from gpkit import Model
+from gpkit.small_scripts import mag
+from relaxation import _point
+from scaling import counting_cvxopt, _run
+
+#resolutions (Nclimb, Ncruise) solved in turn by default
+RESOLUTIONS = [(2, 2), (4, 4), (8, 8)]
+
+def _name(vk):
+    """
+    returns the name of the vector variable of the element vk, shared by the
+    missions of every resolution
+    """
+    return vk.str_without(['idx', 'modelnums'])
+
+def positions(n):
+    """
+    returns the positions of the centers of n segments in a phase, 0 to 1
+    """
+    return (np.arange(n) + .5)/n
+
+def interpolate(values, coarse, fine):
+    """
+    returns values of the segments of the layout coarse at those of fine,
+    log linearly in the positions of the segments within each phase, both
+    layouts have the same phases
+    """
+    values = np.asarray(values, dtype = float)
+    result = []
+    start = 0
+    for (_, n, _), (_, nfine, _) in zip(coarse, fine):
+        result.extend(np.exp(np.interp(positions(nfine), positions(n), np.log(values[start:start + n]))))
+        start += n
+    return np.array(result)
+
+def warm_start(sol, coarse, fine):
+    """
+    returns {name: value} of the free variables of the solution sol of the
+    mission coarse interpolated onto the segments of the mission fine, see
+    relaxation._point, the variables of one phase or of every segment are
+    interpolated and the rest carried over
+    """
+    phases = {}
+    for _, _, phase in coarse.layout:
+        coarse.phase[phase].varkeys.update_keymap()
+        for vk in coarse.phase[phase].varkeys:
+            phases[_name(vk)] = phase
+
+    elements = defaultdict(dict)
+    x0 = {}
+    for vk, value in sol['freevariables'].items():
+        if vk.idx and len(vk.idx) == 1:
+            elements[_name(vk)][vk.idx[0]] = mag(value)
+        elif not vk.idx:
+            x0[vk.str_without(['modelnums'])] = mag(value)
+
+    for name, values in elements.items():
+        values = np.array([values[i] for i in sorted(values)])
+        if name in phases:
+            i = [p for _, _, p in coarse.layout].index(phases[name])
+            x0[name] = interpolate(values, [coarse.layout[i]], [fine.layout[i]])
+        elif len(values) == sum(n for _, n, _ in coarse.layout):
+            x0[name] = interpolate(values, coarse.layout, fine.layout)
+    return x0
+
+def refine(substitutions = None, resolutions = RESOLUTIONS, tol = 1e-3, mission = None, verbosity = 0, **kwargs):
+    """
+    solves mission(Nclimb, Ncruise) at each resolution in turn, the first
+    from a cold start and each next one from the last solution interpolated
+    onto its segments, until the fuel burn changes by less than tol
+    ________
+    INPUTS
+    substitutions = of every resolution, the mission substitutions by default
+    resolutions = [(Nclimb, Ncruise)], coarse to fine
+    tol = relative change of the fuel burn between resolutions to stop at
+    mission = PhasedMission taking (Nclimb, Ncruise), the integration
+    Mission by default
+    kwargs = passed to localsolve
+
+    OUTPUTS
+    (solution, mission, history), history = [(Nclimb, Ncruise, fuel burn
+    [N], seconds)] of every resolution solved
+    """
+    from engine_flight_profile_integration import Mission, mission_substitutions
+    mission = mission or Mission
+    if substitutions is None:
+        substitutions = mission_substitutions()
+    history = []
+    built, x0 = None, None
+    for Nclimb, Ncruise in resolutions:
+        tic = time()
+        new = mission(Nclimb, Ncruise)
+        m = Model(new[new.COST], new, substitutions)
+        if built is not None:
+            x0 = _point(m, warm_start(sol, built, new))
+        sol = m.localsolve(verbosity = verbosity, x0 = x0, **kwargs)
+        built = new
+        history.append((Nclimb, Ncruise, mag(sol(new[new.COST])), time() - tic))
+        if len(history) > 1 and abs(history[-1][2]/history[-2][2] - 1) < tol:
+            break
+    return sol, built, history
+
+def test():
+    """
+    interpolates made up segment values, then refines Mission(2, 2) to
+    Mission(3, 2) and checks the warm start against the coarse solution
+    """
+    coarse = (('climb', 2, 'climb'), ('cruise', 2, 'cruise'))
+    fine = (('climb', 4, 'climb'), ('cruise', 1, 'cruise'))
+    values = interpolate([1., 4., 10., 10.], coarse, fine)
+    #the end segments keep the values of the coarse ones next to them
+    assert np.allclose(values, [1., 4.**.25, 4.**.75, 4., 10.])
+    assert np.allclose(interpolate([2., 8.], coarse[:1], fine[:1]), 2*values[:4])
+
+    sol, mission, history = refine(resolutions = [(2, 2), (3, 2)], tol = 0)
+    assert [h[:2] for h in history] == [(2, 2), (3, 2)]
+    assert mission.ac.engine['TSFC'].shape == (5,)
+    #a finer climb burns about the same fuel
+    assert abs(history[1][2]/history[0][2] - 1) < .02
+    #the warm start climbs through the coarse altitudes
+    h = mag(sol(mission.phase['climb']['hft']))
+    assert np.all(np.diff(h) > 0)
+
+def benchmark(resolutions = ((2, 2), (4, 4))):
+    """
+    compares GP solves, interior point iterations and seconds of solving the
+    finest of resolutions cold and refining to it from the coarsest
+    """
+    from engine_flight_profile_integration import Mission, mission_substitutions
+    substitutions = mission_substitutions()
+    Nclimb, Ncruise = resolutions[-1]
+
+    def cold():
+        """
+        builds and solves the finest mission from a cold start
+        """
+        mission = Mission(Nclimb, Ncruise)
+        return Model(mission['W_{f_{total}}'], mission, substitutions).localsolve(verbosity = 0,
+                                                                                  solver = counting_cvxopt)
+
+    def refined():
+        """
+        refines to the finest mission, the GPs of every resolution counted
+        """
+        return refine(substitutions, resolutions, tol = 0, solver = counting_cvxopt)[0]
+
+    for label, solve in [('cold', cold), ('refined', refined)]:
+        sol, gps, iterations, seconds = _run(solve)
+        print("%-8s Mission%s: %s" % (label, resolutions[-1], 'failed' if sol is None else
+                                     "%i GPs, %i iterations, %.3g s, fuel burn %.6g N"
+                                     % (gps, iterations, seconds, mag(sol('W_{f_{total}}')))))
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,201 @@
+"""Two phase solves of signomial engine and mission models, a GP relaxation followed by the SP polish"""
+import numpy as np
+from time import time
+from gpkit import Model, Variable
+from gpkit.nomials import parse_subs, SignomialInequality, SingleSignomialEquality
+from gpkit.small_scripts import mag
+from presolve import _clean
+from scaling import counting_cvxopt, _run, _value
+from cycle_estimate import estimate
+import engine_validation
+
+def _point(model, x0):
+    """
+    returns x0, given by VarKey or name, as {VarKey: magnitude in its units}
+    on the element variables of model
+    """
+    point = {}
+    if not x0:
+        return point
+    model.varkeys.update_keymap()
+    for key, value in x0.items():
+        for vk in model.varkeys.keymap.get(getattr(key, 'key', key), []):
+            if vk.shape and not vk.idx:
+                continue
+            point[vk] = _value(vk, value[vk.idx] if vk.idx and np.ndim(value) else value)
+    return point
+
+def relax(constraint, constants, x0, slack):
+    """
+    returns the GP compatible constraints that stand in for a signomial
+    constraint in the relaxed program, and how they were made
+    ________
+    INPUTS
+    constraint = SignomialInequality or SingleSignomialEquality
+    constants = {VarKey: value} substituted before the constraint is split
+    x0 = {VarKey: value} the monomial approximations are made at, variables
+    missing from it are taken as 1, the way gpkit's SP starts
+    slack = Variable >= 1 every approximated side is loosened by
+
+    OUTPUTS
+    ([constraints], kind), kind is
+    'posynomial' = the constants left a posynomial inequality, kept as it is
+    'one sided' = an equality with a single term on one side, like fp1 = f + 1
+    or the enthalpy of mixing, posynomial <= monomial is kept exactly and the
+    other half uses the posynomial's monomial approximation at x0, dropping
+    either half outright lets the cycle make energy, h_{t_{4.1}} above the
+    mixed enthalpy runs the engine on no fuel
+    'approximated' = the negative side of an inequality, or both sides of an
+    equality with several terms on each side, like the shaft power balances,
+    replaced by their monomial approximations at x0, as in the first GP of
+    an SP from x0
+    """
+    posy, negy = _clean(constraint.unsubbed[0].sub(constants, require_positive = False)).posy_negy()
+    if posy is 0 or negy is 0:
+        raise ValueError("%s is trivial once its constants are substituted" % constraint)
+    x0 = dict(x0)
+    x0.update(dict((vk, 1.) for side in [posy, negy] for vk in side.varlocs if vk not in x0))
+    if isinstance(constraint, SingleSignomialEquality):
+        if len(posy.cs) == 1:
+            posy, negy = negy, posy
+        if len(negy.cs) == 1:
+            return [posy <= negy, negy <= slack*posy.mono_lower_bound(x0)], 'one sided'
+        mpos, mneg = posy.mono_lower_bound(x0), negy.mono_lower_bound(x0)
+        return [mpos <= slack*mneg, mneg <= slack*mpos], 'approximated'
+    if len(negy.cs) == 1:
+        return [posy <= negy], 'posynomial'
+    return [posy <= slack*negy.mono_lower_bound(x0)], 'approximated'
+
+class Relaxed(object):
+    """
+    Two phase solve of a signomial program, phase one solves a GP in which
+    every signomial constraint is replaced by the constraints of relax, their
+    approximated sides loosened by one slack the cost is multiplied by
+    slack**penalty, so the GP is feasible from any x0, and approximates again
+    at its solution until the slack is close to 1, phase two polishes the
+    solution with the SP of the original model
+    ________
+    INPUTS
+    model = Model to solve, it is left unchanged
+    x0 = {VarKey or name: value} the approximations are made at and the SP
+    starts from when phase one fails, the cycle estimate for engines
+    penalty = exponent of the slack in the relaxed cost
+
+    OUTPUTS
+    self.model = the relaxed GP Model
+    self.kinds = {kind: number of constraints} of the kinds relax returns
+    self.phase_one = last solution of the relaxed GP, None when phase one or
+    the polish from it failed
+    self.slack = the slack Variable, 1 in phase_one when the approximations
+    are consistent
+    """
+    def __init__(self, model, x0 = None, penalty = 100.):
+        self.original = model
+        self.x0 = x0
+        self.penalty = penalty
+        constants, sweep, linkedsweep = parse_subs(model.varkeys, model.substitutions)
+        if sweep or linkedsweep:
+            raise ValueError("sweeps are not supported by a relaxed model,"
+                             " relax each point with its own substitutions")
+        self.constants = constants
+        self.slack = Variable('s_{relax}', '-', 'Slack of the Approximated Signomial Constraints')
+        self.phase_one = None
+        self.approximate(_point(model, x0))
+
+    def approximate(self, point):
+        """
+        builds the relaxed GP with its approximations made at point, {VarKey:
+        magnitude} on the element variables of the original
+        """
+        self.kinds = {'posynomial': 0, 'one sided': 0, 'approximated': 0}
+        constraints = [self.slack >= 1]
+        for c in self.original.flat(constraintsets = False):
+            if isinstance(c, SignomialInequality):
+                relaxed, kind = relax(c, self.constants, point, self.slack)
+                self.kinds[kind] += 1
+                constraints.extend(relaxed)
+            else:
+                constraints.append(c)
+        self.model = Model(self.original.cost*self.slack**self.penalty, constraints)
+        self.model.substitutions.update(dict((vk, value) for vk, value in self.constants.items()
+                                             if vk in self.model.varkeys))
+
+    def solve(self, verbosity = 0, rounds = 5, tol = 1e-2, **kwargs):
+        """
+        phase one alone, solves the relaxed GP, and while its slack is above
+        1 + tol relaxes again at the solution, approximations made far from
+        the solution, like those of a cold start, disagree until then
+        """
+        for _ in range(rounds):
+            self.phase_one = self.model.solve(verbosity = verbosity, **kwargs)
+            if mag(self.phase_one(self.slack)) <= 1 + tol:
+                break
+            self.approximate(_point(self.original, self.phase_one['freevariables']))
+        return self.phase_one
+
+    def localsolve(self, verbosity = 0, rounds = 5, tol = 1e-2, **kwargs):
+        """
+        solves the relaxed GP and then the original SP from its solution, or
+        from x0 when either fails, returns the solution of the original
+        """
+        try:
+            start = _point(self.original, self.solve(verbosity, rounds, tol, **kwargs)['freevariables'])
+            return self.original.localsolve(verbosity = verbosity, x0 = start, **kwargs)
+        except (RuntimeWarning, ValueError):
+            self.phase_one = None
+        return self.original.localsolve(verbosity = verbosity, x0 = self.x0, **kwargs)
+
+def test():
+    """
+    solves the CFM56 validation model in two phases and checks it against the
+    SP from the cycle estimate
+    """
+    engine, m = engine_validation.validation_model(0)
+    x0 = estimate(engine, m, 2).x0(m)
+    sol = m.localsolve(verbosity = 0, x0 = x0)
+    relaxed = Relaxed(m, x0)
+    #the f + 1, alpha + 1, T_{4.1} and mixing equalities of both segments
+    assert relaxed.kinds['one sided'] == 8 and relaxed.kinds['approximated']
+    rsol = relaxed.localsolve()
+    assert relaxed.phase_one is not None
+    #the cost is flat near the optimum, the polish ends at a neighbouring
+    #point of the same cost
+    assert abs(mag(rsol['cost'])/mag(sol['cost']) - 1) < 1e-4
+    for name in ['TSFC', 'F', 'P_{t_8}', 'h_{t_0}']:
+        assert np.all(np.abs(mag(rsol(engine[name]))/mag(sol(engine[name])) - 1) < 1e-3), name
+    for name in ['m_{fan}', 'W_{engine}']:
+        assert np.all(np.abs(mag(rsol(engine[name]))/mag(sol(engine[name])) - 1) < 1e-2), name
+
+def benchmark(ranges = (1500., 2000., 2500.)):
+    """
+    compares GP solves, interior point iterations and failures of the SP
+    and the two phase solve, of the validation engines from their cycle
+    estimates and of a required range sweep of the mission from a cold start
+    """
+    from engine_flight_profile_integration import Mission, mission_substitutions
+    rows = []
+    for eng in range(4):
+        engine, m = engine_validation.validation_model(eng)
+        x0 = estimate(engine, m, 3 if eng == 1 else 2).x0(m)
+        rows.append(('validation engine %i' % eng,
+                     _run(lambda: m.localsolve(verbosity = 0, x0 = x0, solver = counting_cvxopt)),
+                     _run(lambda: Relaxed(m, x0).localsolve(solver = counting_cvxopt))))
+
+    for rng in ranges:
+        mission = Mission(2, 2)
+        substitutions = mission_substitutions()
+        substitutions['ReqRng'] = rng
+        m = Model(mission['W_{f_{total}}'], mission, substitutions)
+        rows.append(('ReqRng %i nmi' % rng,
+                     _run(lambda: m.localsolve(verbosity = 0, solver = counting_cvxopt)),
+                     _run(lambda: Relaxed(m).localsolve(solver = counting_cvxopt))))
+
+    print("%-22s %28s %28s" % ('', 'SP GPs/iterations/s', 'two phase GPs/iterations/s'))
+    for name, sp, two in rows:
+        print("%-22s %28s %28s" % ((name,) + tuple('failed' if r[0] is None else '%i / %i / %.3g' % r[1:]
+                                                   for r in [sp, two])))
+    for i, label in enumerate(['SP', 'two phase']):
+        print("%s failures: %i of %i" % (label, sum(row[1 + i][0] is None for row in rows), len(rows)))
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,256 @@
+"""Representative point reduction of the engine of a mission, one Engine point per cluster of similar flight segments"""
+import numpy as np
+from time import time
+from gpkit import Model, Variable, Vectorize
+from gpkit.small_scripts import mag
+from engine_validation import Engine
+from simple_ac_imports import FlightState
+from relaxation import _point
+
+#interpolation variables of the TSFC of a segment, in the order of the columns of the flight conditions
+CONDITIONS = ['M', 'h', 'F']
+
+def _canonical(labels):
+    """
+    returns labels numbered 0, 1, ... in the order the clusters first appear,
+    so equal partitions have equal labels
+    """
+    _, first, inverse = np.unique(labels, return_index = True, return_inverse = True)
+    rank = np.empty(len(first), dtype = int)
+    rank[np.argsort(first)] = np.arange(len(first))
+    return rank[inverse]
+
+def cluster(points, k, decimals = 9, maxiter = 100):
+    """
+    returns the labels of at most k clusters of the rows of points, positive
+    flight conditions (n, len(CONDITIONS)), identical rows are merged first
+    and the distinct ones clustered by a k-means in the logarithms of the
+    conditions scaled to unit spread, weighted by how often each repeats,
+    started from the most repeated row and the rows farthest from the centers
+    """
+    x = np.round(np.log(np.asarray(points, dtype = float)), decimals)
+    unique, inverse, counts = np.unique(x, axis = 0, return_inverse = True, return_counts = True)
+    if len(unique) <= k:
+        return _canonical(inverse)
+    scale = np.std(unique, axis = 0)
+    z = unique/np.where(scale > 0, scale, 1.)
+
+    centers = [z[np.argmax(counts)]]
+    while len(centers) < k:
+        d = np.min([np.sum((z - c)**2, axis = 1) for c in centers], axis = 0)
+        centers.append(z[np.argmax(d)])
+    centers = np.array(centers)
+
+    labels = None
+    for _ in range(maxiter):
+        new = np.argmin(np.sum((z[:, None, :] - centers[None, :, :])**2, axis = 2), axis = 1)
+        if labels is not None and np.array_equal(new, labels):
+            break
+        labels = new
+        for j in range(k):
+            members = labels == j
+            if members.any():
+                centers[j] = np.average(z[members], axis = 0, weights = counts[members])
+    return _canonical(labels[inverse])
+
+def blocks(Nclimb, Ncruise, k):
+    """
+    returns labels splitting the climb and the cruise segments into k
+    contiguous blocks in proportion to their numbers, the starting point of
+    the clustering before any flight conditions are known
+    """
+    kclimb = min(Nclimb, max(1 if Nclimb else 0, int(round(k*Nclimb/float(Nclimb + Ncruise)))))
+    kcruise = max(1, k - kclimb) if Ncruise else 0
+    climb = np.arange(Nclimb)*kclimb//max(Nclimb, 1)
+    cruise = kclimb + np.arange(Ncruise)*min(kcruise, Ncruise)//max(Ncruise, 1)
+    return np.concatenate([climb, cruise]).astype(int)
+
+def fit_exponents(samples):
+    """
+    returns {condition: exponent} of the monomial TSFC of the representative
+    points samples (n, len(CONDITIONS) + 1) best fits in the least squares
+    sense, the smallest exponents among equally good fits, zero for a
+    single point
+    """
+    if len(samples) < 2:
+        return dict((name, 0.) for name in CONDITIONS)
+    x = np.log(samples)
+    x -= x.mean(axis = 0)
+    exponents = np.linalg.lstsq(x[:, :-1], x[:, -1], rcond = None)[0]
+    return dict(zip(CONDITIONS, exponents.tolist()))
+
+class Reduction(object):
+    """
+    Assignment of the flight segments of a mission to representative engine
+    operating points
+    ________
+    INPUTS
+    labels = representative point of each segment
+    exponents = {condition: exponent} of the TSFC interpolation in the
+    conditions of CONDITIONS, 0 for the TSFC of the representative
+    """
+    def __init__(self, labels, exponents = None):
+        self.labels = _canonical(labels)
+        self.k = int(self.labels.max()) + 1
+        self.exponents = dict((name, 0.) for name in CONDITIONS)
+        self.exponents.update(exponents or {})
+
+class ReducedEngine(Model):
+    """
+    Stand in for Engine in Aircraft, an Engine over the representative
+    points of a Reduction only, each at the geometric mean Mach number and
+    altitude of its segments and the largest of their thrusts, so it is sized
+    for all of them, the TSFC of every segment is its representative's
+    interpolated to the segment's own conditions by the monomial of the
+    reduction's exponents
+    ________
+    INPUTS
+    N = number of flight segments
+    state = FlightState of the flight segments
+    eng = engine to build, as in Engine
+    reduction = Reduction of the N segments
+    """
+    def setup(self, N, state, eng, reduction):
+        self.state = state
+        self.reduction = reduction
+        with Vectorize(reduction.k):
+            self.repstate = FlightState()
+        self.engine = Engine(0, True, reduction.k, self.repstate, eng)
+
+        with Vectorize(N):
+            F = Variable('F', 'N', 'Total Thrust')
+            Fspec = Variable('F_{spec}', 'N', 'Specified Total Thrust')
+            TSFC = Variable('TSFC', '1/hr', 'Thrust Specific Fuel Consumption')
+        #the mission asks its engine for these by name, the representative
+        #engine has variables of the same names
+        self.segments = {'F': F, 'F_{spec}': Fspec, 'TSFC': TSFC}
+
+        engineP = self.engine.engineP
+        M2 = .8
+        M25 = .6
+        M0 = .8
+
+        constraints = [
+            F == Fspec,
+
+            #engine face conditions, set by the mission for a full engine
+            engineP['M_2'] == self.repstate['M'],
+            engineP['M_{2.5}'] == M25,
+            engineP['hold_{2}'] == 1+.5*(1.398-1)*M2**2,
+            engineP['hold_{2.5}'] == 1+.5*(1.354-1)*M25**2,
+            engineP['c1'] == 1+.5*(.401)*M0**2,
+            ]
+
+        M, h = state['M'], state['h']
+        Mrep, hrep = self.repstate['M'], self.repstate['h']
+        Frep, TSFCrep = self.engine['F_{spec}'], engineP.v['TSFC']
+        e = reduction.exponents
+        for j in range(reduction.k):
+            members = np.flatnonzero(reduction.labels == j)
+            constraints.extend([
+                Mrep[j] == np.prod([M[i] for i in members])**(1./len(members)),
+                hrep[j] == np.prod([h[i] for i in members])**(1./len(members)),
+                ])
+            for i in members:
+                constraints.extend([
+                    Frep[j] >= F[i],
+                    TSFC[i] == TSFCrep[j]*(M[i]/Mrep[j])**e['M']*(h[i]/hrep[j])**e['h']*(F[i]/Frep[j])**e['F'],
+                    ])
+
+        return self.repstate, self.engine, constraints
+
+    def __getitem__(self, key):
+        """
+        the segment variables shadow the representative engine's of the same name
+        """
+        if isinstance(key, basestring) and key in self.segments:
+            return self.segments[key]
+        return Model.__getitem__(self, key)
+
+    def conditions(self, sol):
+        """
+        returns the flight conditions of the segments in sol, (N, len(CONDITIONS))
+        """
+        return np.column_stack([mag(sol(v)) for v in [self.state['M'], self.state['h'], self.segments['F']]])
+
+    def representatives(self, sol):
+        """
+        returns the conditions and TSFC of the representative points in sol,
+        (k, len(CONDITIONS) + 1)
+        """
+        return np.column_stack([mag(sol(v)) for v in [self.repstate['M'], self.repstate['h'],
+                                                       self.engine['F_{spec}'], self.engine.engineP.v['TSFC']]])
+
+def solve_reduced(Nclimb, Ncruise, k, substitutions = None, rounds = 4, tol = .05, verbosity = 0, **kwargs):
+    """
+    solves Mission(Nclimb, Ncruise) with its engine reduced to k points, the
+    segments start in contiguous blocks and are clustered again at the flight
+    conditions of every solution, with the TSFC exponents fitted to every
+    representative point solved so far, until neither the clusters change nor
+    an exponent moves by more than tol, each solve starts from the last
+    ________
+    OUTPUTS
+    (solution, mission, reduction, solves)
+    """
+    from engine_flight_profile_integration import Mission, mission_substitutions
+    if substitutions is None:
+        substitutions = mission_substitutions()
+    reduction = Reduction(blocks(Nclimb, Ncruise, k))
+    samples, previous = [], None
+    for solves in range(1, rounds + 1):
+        mission = Mission(Nclimb, Ncruise, reduction = reduction)
+        m = Model(mission['W_{f_{total}}'], mission, substitutions)
+        sol = m.localsolve(verbosity = verbosity, x0 = _point(m, previous), **kwargs)
+        engine = mission.ac.engine
+        samples.append(engine.representatives(sol))
+        new = Reduction(cluster(engine.conditions(sol), k), fit_exponents(np.vstack(samples)))
+        if (np.array_equal(new.labels, reduction.labels)
+                and max(abs(new.exponents[c] - reduction.exponents[c]) for c in CONDITIONS) <= tol):
+            break
+        reduction = new
+        previous = dict((vk.str_without(['modelnums']), value) for vk, value in sol['freevariables'].items())
+    return sol, mission, reduction, solves
+
+def test():
+    """
+    clusters made up flight conditions, then solves a Mission(2, 2) with the
+    engine of its two climb and two cruise segments reduced to two points
+    """
+    points = np.array([[.8, 10000., 2e4]]*3 + [[.5, 3000., 5e4], [.52, 3100., 5.1e4], [.8, 10500., 2.1e4]])
+    assert list(cluster(points, 2)) == [0, 0, 0, 1, 1, 0]
+    #the repeated conditions are one point however many clusters are allowed
+    assert list(cluster(points, 10)) == [0, 0, 0, 1, 2, 3]
+    assert list(blocks(2, 4, 3)) == [0, 0, 1, 1, 2, 2]
+
+    sol, mission, reduction, solves = solve_reduced(2, 2, 2, rounds = 2)
+    assert reduction.k == 2
+    assert mission.ac.engine.engine.engineP.v['TSFC'].shape == (2,)
+    tsfc = mag(sol(mission.ac.engine.segments['TSFC']))
+    assert np.all(tsfc > .2) and np.all(tsfc < .8)
+
+def benchmark(Nclimb = 2, Ncruise = 4, k = 2):
+    """
+    compares the sizes, build and solve times and fuel burns of
+    Mission(Nclimb, Ncruise) with the full engine and with the engine
+    reduced to k representative points
+    """
+    from engine_flight_profile_integration import Mission, mission_substitutions
+    substitutions = mission_substitutions()
+    tic = time()
+    mission = Mission(Nclimb, Ncruise)
+    m = Model(mission['W_{f_{total}}'], mission, substitutions)
+    build = time() - tic
+    sol = m.localsolve(verbosity = 0)
+    print("full engine: %i variables, %i constraints, built in %.3g s, solved in %.3g s, fuel burn %.6g N"
+          % (len(m.varkeys), len(list(m.flat(constraintsets = False))), build, time() - tic - build,
+             mag(sol('W_{f_{total}}'))))
+
+    tic = time()
+    sol, mission, reduction, solves = solve_reduced(Nclimb, Ncruise, k, substitutions)
+    m = Model(mission['W_{f_{total}}'], mission, substitutions)
+    print("%i point engine: %i variables, %i constraints, %i solves in %.3g s, fuel burn %.6g N, labels %s"
+          % (reduction.k, len(m.varkeys), len(list(m.flat(constraintsets = False))), solves, time() - tic,
+             mag(sol('W_{f_{total}}')), reduction.labels))
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,145 @@
+"""Rubber engine scaling, resizes a solved engine to other thrusts at the same cycle"""
+import numpy as np
+from time import time
+from gpkit.small_scripts import mag
+from cycle_estimate import estimate, conditions, flight_conditions
+from offdesign import EngineDesign, design_values, engine_weight, offdesign
+import engine_validation
+
+#sizing variables proportional to the engine's mass flow, the design corrected
+#mass flows of the maps and turbines scale like the physical ones
+AREAS = ['A_2', 'A_{2.5}', 'A_5', 'A_7']
+FLOWS = ['m_{htD}', 'm_{ltD}', 'm_{lc_D}', 'm_{hc_D}', '\\bar{m}_{fan_{D}}', 'm_{coreD}']
+
+#sizing variables proportional to the square root of the mass flow
+LENGTHS = ['d_{f}', 'd_{LPC}']
+
+#segment quantities proportional to the mass flow and the ones the cycle holds fixed
+EXTENSIVE = ['F', 'm_{total}', 'm_{fan}', 'm_{core}', 'm_{f}', 'm_{lc}', 'm_{hc}']
+INVARIANT = ['TSFC', '\\alpha', '\\pi_f', '\\pi_{lc}', '\\pi_{hc}', 'T_{t_{4.1}}']
+
+#region the scaling is trusted in, the scale factor bounds the size effects the
+#fixed component efficiencies leave out and the fan diameter [m] spans roughly
+#the validation engines, CFM56 to GE90, that the weight correlation is used on
+LIMITS = {'scale': (.5, 2.), 'd_{f}': (1., 3.5)}
+
+class RubberEngine(object):
+    """
+    Solved reference engine resized analytically to other thrusts, the
+    pressure ratios, by pass ratio and turbine inlet temperature of every
+    segment are held so areas and mass flows scale with thrust, diameters with
+    its square root and TSFC does not change
+    ________
+    INPUTS
+    engine = Engine solved at its reference thrust
+    sol = solution of engine
+    limits = {name: (lower, upper)} of the region the scaling is trusted in,
+    LIMITS by default
+    """
+    def __init__(self, engine, sol, limits = None):
+        self.calibration = engine.calibration
+        self.values = design_values(engine, sol)
+        self.segments = dict((name, np.atleast_1d(mag(sol(engine[name])))) for name in EXTENSIVE + INVARIANT)
+        #the total mass flow constraint is only tight on the segment that sets
+        #the weight, take the actual total flow everywhere
+        self.segments['m_{total}'] = self.segments['m_{fan}'] + self.segments['m_{core}']
+        self.limits = limits or LIMITS
+
+    def factor(self, F, segment = None):
+        """
+        returns the scale factor that gives thrust F [N] at segment, by default
+        the segment of largest reference thrust
+        """
+        Fref = self.segments['F']
+        if segment is None:
+            segment = np.argmax(Fref)
+        return np.asarray(F, dtype = float)/Fref[segment]
+
+    def scale(self, F, segment = None):
+        """
+        resizes the engine to thrust F [N] at segment for every entry of F
+        ________
+        OUTPUTS
+        {name: array} of the sizing variables in the shape of F and of the
+        segment quantities with one more axis, the segments, along with
+        'scale', 'valid' (True inside the limits) and 'limits', {name: array}
+        True where that limit holds
+        """
+        s = self.factor(F, segment)
+        result = {'scale': s}
+        for name in AREAS + FLOWS:
+            result[name] = s*self.values[name]
+        for name in LENGTHS:
+            result[name] = s**.5*self.values[name]
+        for name in EXTENSIVE:
+            result[name] = s[..., None]*self.segments[name]
+        for name in INVARIANT:
+            result[name] = np.ones(s.shape + (1,))*self.segments[name]
+
+        #the weight correlation is linear in the mass flow at a fixed cycle,
+        #the engine is as heavy as its heaviest segment requires
+        result['W_{engine}'] = np.max(engine_weight(result), axis = -1)
+
+        result['limits'] = dict((name, (result[name] >= lower) & (result[name] <= upper))
+                                for name, (lower, upper) in self.limits.items())
+        result['valid'] = np.all(result['limits'].values(), axis = 0)
+        return result
+
+    def design(self, F, segment = None):
+        """
+        returns the EngineDesign of the engine resized to thrust F [N] at segment,
+        for off design runs of the scaled engine
+        """
+        s = float(self.factor(F, segment))
+        values = dict(self.values)
+        for name in AREAS + FLOWS:
+            values[name] = s*values[name]
+        return EngineDesign(self.calibration, values)
+
+def test():
+    """
+    resizes the CFM56 validation engine and checks the scaled design against
+    the off design solver at the scaled thrusts
+    """
+    engine, m = engine_validation.validation_model(0)
+    sol = m.localsolve(verbosity = 0, x0 = estimate(engine, m, 2).x0(m))
+    rubber = RubberEngine(engine, sol)
+    Fref = np.max(rubber.segments['F'])
+
+    #the reference is reproduced, including its weight through the correlation
+    ref = rubber.scale(Fref)
+    for name in AREAS + LENGTHS + ['W_{engine}']:
+        assert abs(ref[name]/rubber.values[name] - 1) < 1e-3, name
+    assert ref['valid']
+
+    #a scaled engine flies its segments at the same TSFC with scaled flows
+    scaled = rubber.scale(1.3*Fref)
+    values = conditions(m, 2)
+    fc = flight_conditions(values, 2)
+    fixed = dict((name, fc[name]) for name in ['c1', 'M_2', 'M_{2.5}', 'hold_{2}', 'hold_{2.5}'])
+    res = offdesign(rubber.design(1.3*Fref), fc['M'], fc['T_{atm}'], fc['P_{atm}'],
+                    Fspec = scaled['F'], fixed = fixed, mode = 'face')
+    assert np.all(res['converged'])
+    for name in ['TSFC', 'm_{core}', 'm_{total}', '\\alpha']:
+        assert np.all(np.abs(res[name]/scaled[name] - 1) < 1e-3), name
+    assert abs(np.max(engine_weight(res))/scaled['W_{engine}'] - 1) < 1e-3
+
+    #points outside the limits are reported
+    sweep = rubber.scale(Fref*np.array([.3, 1., 2.5]))
+    assert list(sweep['valid']) == [False, True, False]
+    assert not sweep['limits']['scale'][0]
+
+def benchmark(npoints = 10**5):
+    """
+    times a thrust sweep of the CFM56 validation engine by scaling
+    """
+    engine, m = engine_validation.validation_model(0)
+    sol = m.localsolve(verbosity = 0, x0 = estimate(engine, m, 2).x0(m))
+    rubber = RubberEngine(engine, sol)
+    F = np.max(rubber.segments['F'])*np.linspace(.5, 2., npoints)
+    tic = time()
+    result = rubber.scale(F)
+    print("%i scaled engines in %.3g s, %i inside the limits" % (npoints, time() - tic, np.sum(result['valid'])))
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,204 @@
+"""Opt in scaling of engine programs, solves in variables normalized by reference magnitudes"""
+import re
+import sys
+import numpy as np
+from time import time
+from StringIO import StringIO
+from cvxopt import spmatrix, matrix, log
+from cvxopt.solvers import gp
+from gpkit import Model
+from gpkit.nomials import parse_subs, Monomial
+from gpkit.small_scripts import mag
+from gpkit.varkey import VarKey
+from presolve import substitute, package
+from cycle_estimate import estimate
+import engine_validation
+
+#interior point iterations of every GP cvxopt solved through counting_cvxopt
+ITERATIONS = []
+
+def counting_cvxopt(c, A, p_idxs, k, **kwargs):
+    """
+    cvxopt solver for GeometricProgram.solve that records its interior point
+    iterations in ITERATIONS, same as gpkit's cvxopt interface otherwise,
+    cvxopt does not return its iteration count so it is read off the
+    progress lines it prints
+    """
+    kwargs.setdefault('kktsolver', 'ldl')
+    kwargs['options'] = dict(kwargs.get('options', {}), show_progress = True)
+    stdout, sys.stdout = sys.stdout, StringIO()
+    try:
+        solution = gp(k, spmatrix(A.data, A.row, A.col, tc = 'd'), log(matrix(c)), **kwargs)
+    finally:
+        progress, sys.stdout = sys.stdout.getvalue(), stdout
+    ITERATIONS.append(len(re.findall(r'^ *\d+: ', progress, re.M)))
+    return dict(status = solution['status'], primal = solution['x'], la = solution['znl'])
+
+def _value(vk, value):
+    """
+    magnitude of value in the units of vk
+    """
+    if hasattr(value, 'to'):
+        return mag(value.to(getattr(vk.units, 'units', 'dimensionless')))
+    return float(value)
+
+class Scaled(object):
+    """
+    Model solved in unitless variables of order one, every free variable x
+    with a reference magnitude s is replaced by s*x_s, which moves the
+    magnitudes of the variables into the coefficients of the program, the
+    solutions are scaled back to the original variables, the constraints are
+    the same posynomials so the sensitivities carry over unchanged
+    ________
+    INPUTS
+    model = Model to scale, it is left unchanged
+    reference = {VarKey or name: value} of the reference magnitudes, x0 or
+    the variables of an earlier solution, free variables without one keep
+    their own units
+
+    OUTPUTS
+    self.model = the scaled Model, solved by solve and localsolve
+    self.scales = {VarKey: (scaled VarKey, reference magnitude)}
+    """
+    def __init__(self, model, reference):
+        self.original = model
+        constants, sweep, linkedsweep = parse_subs(model.varkeys, model.substitutions)
+        if sweep or linkedsweep:
+            raise ValueError("sweeps are not supported by a scaled model,"
+                             " scale each point with its own substitutions")
+        model.varkeys.update_keymap()
+        self.scales, subs = {}, {}
+        for key, value in reference.items():
+            for vk in model.varkeys.keymap.get(getattr(key, 'key', key), []):
+                if vk in constants or vk.shape and not vk.idx:
+                    continue
+                s = _value(vk, value[vk.idx] if vk.idx and np.ndim(value) else value)
+                if s > 0 and np.isfinite(s):
+                    x = VarKey(name = '%s_s' % vk, label = vk.label)
+                    self.scales[vk] = (x, s)
+                    subs[vk] = Monomial({x: 1}, s*(vk.units or 1))
+
+        self.model = Model(model.cost.sub(subs),
+                           [substitute(c, subs) for c in model.flat(constraintsets = False)])
+        self.model.substitutions.update(dict((vk, value) for vk, value in constants.items()
+                                             if vk in self.model.varkeys))
+
+    def _x0(self, x0):
+        """
+        returns x0, given on the variables of the original, on the variables
+        of the scaled model
+        """
+        if x0 is None:
+            return None
+        self.original.varkeys.update_keymap()
+        scaled = {}
+        for key, value in x0.items():
+            for vk in self.original.varkeys.keymap.get(getattr(key, 'key', key), []):
+                if vk.shape and not vk.idx:
+                    continue
+                v = _value(vk, value[vk.idx] if vk.idx and np.ndim(value) else value)
+                if vk in self.scales:
+                    x, s = self.scales[vk]
+                    scaled[x] = v/s
+                elif vk in self.model.varkeys:
+                    scaled[vk] = v
+        return scaled
+
+    def restore(self, result):
+        """
+        scales the raw solver result of the scaled model back to the variables
+        of the original and packages it the way Model.solve does
+        """
+        for name in ['variables', 'freevariables']:
+            values = result[name]
+            for vk, (x, s) in self.scales.items():
+                if x in values:
+                    values[vk] = s*values[x]
+                    del values[x]
+        return package(self.model, result)
+
+    def solve(self, verbosity = 0, **kwargs):
+        """
+        solves the scaled model as a GP and scales the result back
+        """
+        self.model.program = self.model.gp(verbosity = verbosity)
+        return self.restore(self.model.program.solve(verbosity = verbosity, **kwargs))
+
+    def localsolve(self, verbosity = 0, x0 = None, **kwargs):
+        """
+        solves the scaled model as an SP from x0, given on the variables of
+        the original, and scales the result back
+        """
+        self.model.program = self.model.sp(verbosity = verbosity)
+        return self.restore(self.model.program.localsolve(verbosity = verbosity, x0 = self._x0(x0), **kwargs))
+
+def _run(solve):
+    """
+    runs solve() with counting_cvxopt, returns (solution or None on a
+    failure, GP solves, interior point iterations, seconds)
+    """
+    del ITERATIONS[:]
+    tic = time()
+    try:
+        sol = solve()
+    except (RuntimeWarning, ValueError):
+        sol = None
+    return sol, len(ITERATIONS), sum(ITERATIONS), time() - tic
+
+def test():
+    """
+    solves the CFM56 validation model scaled by its cycle estimate and checks
+    it against the unscaled solve
+    """
+    engine, m = engine_validation.validation_model(0)
+    x0 = estimate(engine, m, 2).x0(m)
+    sol = m.localsolve(verbosity = 0, x0 = x0)
+    scaled = Scaled(m, x0)
+    assert scaled.scales
+    ssol = scaled.localsolve(x0 = x0)
+    for name in ['TSFC', 'F', 'm_{total}', 'P_{t_8}', 'h_{t_0}']:
+        assert np.all(np.abs(mag(ssol(engine[name]))/mag(sol(engine[name])) - 1) < 1e-3), name
+    assert abs(mag(ssol(engine['W_{engine}']))/mag(sol(engine['W_{engine}'])) - 1) < 1e-3
+    #the constants' sensitivities carry over
+    s0, s1 = sol['sensitivities']['constants'], ssol['sensitivities']['constants']
+    assert np.all(np.abs(s1['\\pi_{f_D}'] - s0['\\pi_{f_D}']) < 1e-2)
+
+def benchmark(ranges = (1500., 2000., 2500.)):
+    """
+    compares GP solves, interior point iterations and failures of the
+    validation engines and a required range sweep of the mission, unscaled
+    and scaled, the engines by their cycle estimates and every sweep point
+    by the solution of the one before it
+    """
+    from engine_flight_profile_integration import Mission, mission_substitutions
+    rows = []
+    for eng in range(4):
+        engine, m = engine_validation.validation_model(eng)
+        x0 = estimate(engine, m, 3 if eng == 1 else 2).x0(m)
+        rows.append(('validation engine %i' % eng,
+                     _run(lambda: m.localsolve(verbosity = 0, x0 = x0, solver = counting_cvxopt)),
+                     _run(lambda: Scaled(m, x0).localsolve(x0 = x0, solver = counting_cvxopt))))
+
+    previous = None
+    for rng in ranges:
+        mission = Mission(2, 2)
+        substitutions = mission_substitutions()
+        substitutions['ReqRng'] = rng
+        m = Model(mission['W_{f_{total}}'], mission, substitutions)
+        plain = _run(lambda: m.localsolve(verbosity = 0, x0 = previous, solver = counting_cvxopt))
+        scaled = (_run(lambda: Scaled(m, previous).localsolve(x0 = previous, solver = counting_cvxopt))
+                  if previous else plain)
+        rows.append(('ReqRng %i nmi' % rng, plain, scaled))
+        sol = plain[0] or scaled[0]
+        if sol:
+            previous = dict((vk.str_without(['modelnums']), sol['freevariables'][vk]) for vk in sol['freevariables'])
+
+    print("%-22s %28s %28s" % ('', 'unscaled GPs/iterations/s', 'scaled GPs/iterations/s'))
+    for name, plain, scaled in rows:
+        print("%-22s %28s %28s" % ((name,) + tuple('failed' if r[0] is None else '%i / %i / %.3g' % r[1:]
+                                                   for r in [plain, scaled])))
+    for i, label in enumerate(['unscaled', 'scaled']):
+        print("%s failures: %i of %i" % (label, sum(row[1 + i][0] is None for row in rows), len(rows)))
+
+if __name__ == "__main__":
+    benchmark()
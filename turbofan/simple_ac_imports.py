@@ -1,7 +1,7 @@
 """
 simple aircraft classes to import
 """
-from gpkit import Model, Variable, units, SignomialsEnabled
+from gpkit import Model, Variable, units, SignomialsEnabled, VECTORIZATION
 from gpkit.constraints.sigeq import SignomialEquality as SignomialEquality
 from gpkit.tools import te_exp_minus1
 from gpkit.constraints.tight import Tight as TCS
@@ -11,14 +11,25 @@ from engine_validation import Engine
 
 class Aircraft(Model):
     "Aircraft class"
-    def  setup(self, Nclimb, Ncruise, enginestate, eng, Nfleet=0, **kwargs):
+    def  setup(self, Nclimb, Ncruise, enginestate, eng, Nfleet=0, surrogate=None, reduction=None, cooling=True, BLI=False, constants=None, **kwargs):
         #create submodels
         self.fuse = Fuselage()
         self.wing = Wing()
-        if Nfleet != 0:
-            self.engine = Engine(0, True, Nclimb+Ncruise, enginestate, eng, Nfleet)
+        if surrogate is not None:
+            #fitted engine in place of the engine cycle, imported here since
+            #engine_surrogate imports the mission models built on this module
+            from engine_surrogate import SurrogateEngine
+            self.engine = SurrogateEngine(Nclimb+Ncruise, enginestate, surrogate, Nfleet)
+        elif reduction is not None:
+            #engine over the representative points of the segments only
+            from representative import ReducedEngine
+            if Nfleet != 0:
+                raise ValueError("the representative point reduction does not support fleet missions")
+            self.engine = ReducedEngine(Nclimb+Ncruise, enginestate, eng, reduction)
+        elif Nfleet != 0:
+            self.engine = Engine(0, cooling, Nclimb+Ncruise, enginestate, eng, Nfleet, BLI=BLI, shared=constants)
         else:
-           self.engine = Engine(0, True, Nclimb+Ncruise, enginestate, eng)            
+           self.engine = Engine(0, cooling, Nclimb+Ncruise, enginestate, eng, BLI=BLI, shared=constants)            
 
         #variable definitions
         numeng = Variable('numeng', '-', 'Number of Engines')
@@ -205,52 +216,80 @@ class CruiseClimbP(Model):
         return constraints, self.aircraftP
 
 
-class CruiseSegment(Model):
+class SharedState(object):
     """
-    Combines a flight state and aircrat to form a cruise flight segment
+    Looks up the variables of a segment's state through the segment when
+    the state is a StateSlice shared with the rest of the mission, so
+    climb['h'] reads the segment's slice whether the segment owns its state
+    or not, the constraints of a segment hold the whole shared vector
     """
-    def setup(self, aircraft, **kwargs):
-        self.state = FlightState()
+    def __getitem__(self, key):
+        if isinstance(self.state, StateSlice) and isinstance(key, basestring):
+            try:
+                return self.state[key]
+            except KeyError:
+                pass
+        return Model.__getitem__(self, key)
+
+class CruiseSegment(SharedState, Model):
+    """
+    Combines a flight state and aircrat to form a cruise flight segment,
+    state = StateSlice of the mission's FlightState to fly at, a new
+    FlightState by default
+    """
+    def setup(self, aircraft, state = None, **kwargs):
+        self.state = FlightState() if state is None else state
         self.cruiseP = aircraft.cruise_dynamic(self.state)
 
-        return self.state, self.cruiseP
+        if state is None:
+            return self.state, self.cruiseP
+        return self.cruiseP
 
-class CruiseClimbSegment(Model):
+class CruiseClimbSegment(SharedState, Model):
     """
-    Combines a flight state and aircrat to form a cruise flight segment
+    Combines a flight state and aircrat to form a cruise flight segment,
+    state = StateSlice of the mission's FlightState to fly at, a new
+    FlightState by default
     """
-    def setup(self, aircraft, **kwargs):
-        self.state = FlightState()
+    def setup(self, aircraft, state = None, **kwargs):
+        self.state = FlightState() if state is None else state
         self.cruiseP = aircraft.cruise_climb_dynamic(self.state)
 
-        return self.state, self.cruiseP
+        if state is None:
+            return self.state, self.cruiseP
+        return self.cruiseP
     
-class ClimbSegment(Model):
+class ClimbSegment(SharedState, Model):
     """
-    Combines a flight state and aircrat to form a cruise flight segment
+    Combines a flight state and aircrat to form a cruise flight segment,
+    state = StateSlice of the mission's FlightState to fly at, a new
+    FlightState by default
     """
-    def setup(self, aircraft, **kwargs):
-        self.state = FlightState()
+    def setup(self, aircraft, state = None, **kwargs):
+        self.state = FlightState() if state is None else state
         self.climbP = aircraft.climb_dynamic(self.state)
 
-        return self.state, self.climbP
+        if state is None:
+            return self.state, self.climbP
+        return self.climbP
 
 class FlightState(Model):
     """
     creates atm model for each flight segment, has variables
-    such as veloicty and altitude
+    such as veloicty and altitude, constants = SharedConstants to use in
+    place of its own vectorized copies of them, atmosphere = mode of the
+    Atmosphere
     """
-    def setup(self,**kwargs):
+    def setup(self, constants = None, atmosphere = 'sp', **kwargs):
         #make an atmosphere model
         self.alt = Altitude()
-        self.atm = Atmosphere(self.alt)
+        self.atm = Atmosphere(self.alt, constants = constants, mode = atmosphere)
         
         #declare variables
         V = Variable('V', 'kts', 'Aircraft Flight Speed')
         a = Variable('a', 'm/s', 'Speed of Sound')
         
-        R = Variable('R', 287, 'J/kg/K', 'Air Specific Heat')
-        gamma = Variable('\\gamma', 1.4, '-', 'Air Specific Heat Ratio')
+        R, gamma = constants_of(['R', '\\gamma'], constants)
         M = Variable('M', '-', 'Mach Number')
 
         #make new constraints
@@ -267,6 +306,69 @@ class FlightState(Model):
         #build the model
         return self.alt, self.atm, constraints
 
+#scalar physical constants of the flight state and engine models, (name,
+#value, units, label), each model declares its own unless it is handed the
+#SharedConstants of its mission
+CONSTANTS = [
+    ('p_{sl}', 101325, 'Pa', 'Pressure at sea level'),
+    ('T_{sl}', 288.15, 'K', 'Temperature at sea level'),
+    ('L_{atm}', .0065, 'K/m', 'Temperature lapse rate'),
+    ('M_{atm}', .0289644, 'kg/mol', 'Molar mass of dry air'),
+    ('R_{atm}', 8.31447, 'J/mol/K', 'air specific heating value'),
+    ('T_s', 110.4, 'K', 'Sutherland Temperature'),
+    ('C_1', 1.458E-6, 'kg/(m*s*K^0.5)', 'Sutherland coefficient'),
+    ('R', 287, 'J/kg/K', 'Air Specific Heat'),
+    ('\\gamma', 1.4, '-', 'Air Specific Heat Ratio'),
+    ('g', 9.81, 'm/(s^2)', 'Gravitational Acceleration'),
+    ]
+
+def constants_of(names, constants = None):
+    """
+    returns the Variables of the CONSTANTS names, from constants when given,
+    otherwise newly declared in the current vectorization
+    """
+    if constants is not None:
+        return [constants[name] for name in names]
+    table = dict((c[0], c) for c in CONSTANTS)
+    return [Variable(*table[name]) for name in names]
+
+class SharedConstants(object):
+    """
+    The CONSTANTS declared once as scalars for a whole mission, every
+    vectorized FlightState and Atmosphere and the engine reference the same
+    variables, so each is one fixed variable substituted in one place however
+    many segments and aircraft the mission has, made outside any Vectorize
+    """
+    def __init__(self):
+        if VECTORIZATION:
+            raise ValueError("shared constants are scalars, declare them outside of Vectorize")
+        names = [c[0] for c in CONSTANTS]
+        self.variables = dict(zip(names, constants_of(names)))
+
+    def __getitem__(self, name):
+        return self.variables[name]
+
+class StateSlice(object):
+    """
+    The segments idx of a FlightState vectorized over every segment of a
+    mission, looked up by variable name like the state itself, the flight
+    segments and the engine share the one state through these, with no
+    linking constraints between copies of it
+    ________
+    INPUTS
+    state = the vectorized FlightState, or its atm or alt submodel
+    idx = slice of the segments, on the first axis of the state
+    """
+    def __init__(self, state, idx):
+        self.state = state
+        self.idx = idx
+        if isinstance(state, FlightState):
+            self.alt = StateSlice(state.alt, idx)
+            self.atm = StateSlice(state.atm, idx)
+
+    def __getitem__(self, key):
+        return self.state[key][self.idx]
+
 class Altitude(Model):
     """
     holds the altitdue variable
@@ -285,14 +387,18 @@ class Altitude(Model):
         return constraints
 
 class Atmosphere(Model):
-    def setup(self, alt, **kwargs):
-        p_sl = Variable("p_{sl}", 101325, "Pa", "Pressure at sea level")
-        T_sl = Variable("T_{sl}", 288.15, "K", "Temperature at sea level")
-        L_atm = Variable("L_{atm}", .0065, "K/m", "Temperature lapse rate")
-        M_atm = Variable("M_{atm}", .0289644, "kg/mol",
-                         "Molar mass of dry air")
+    """
+    atmosphere of a flight state, mode picks how its quantities are found
+    'sp' = the signomial relations of the standard atmosphere
+    'isa' = none, they are substituted, see isa.substitutions, for fixed
+    altitudes
+    AtmosphereFit = the monomial fits of isa.fit, for free altitudes
+    or a list of these, one per element of a vectorized state
+    """
+    def setup(self, alt, constants = None, mode = 'sp', **kwargs):
+        p_sl, T_sl, L_atm, M_atm, R_atm, T_s, C_1 = constants_of(
+            ['p_{sl}', 'T_{sl}', 'L_{atm}', 'M_{atm}', 'R_{atm}', 'T_s', 'C_1'], constants)
         p_atm = Variable("P_{atm}", "Pa", "air pressure")
-        R_atm = Variable("R_{atm}", 8.31447, "J/mol/K", "air specific heating value")
         TH = 5.257386998354459 #(g*M_atm/R_atm/L_atm).value
         rho = Variable('\\rho', 'kg/m^3', 'Density of air')
         T_atm = Variable("T_{atm}", "K", "air temperature")
@@ -306,29 +412,38 @@ class Atmosphere(Model):
         """
         mu  = Variable('\\mu', 'kg/(m*s)', 'Dynamic viscosity')
 
-        T_s = Variable('T_s', 110.4, "K", "Sutherland Temperature")
-        C_1 = Variable('C_1', 1.458E-6, "kg/(m*s*K^0.5)",
-                       'Sutherland coefficient')
-
-        with SignomialsEnabled():
+        def relations(mode, h, p_atm, T_atm, rho, mu):
+            """
+            the constraints of one mode on the variables it is given
+            """
+            if mode == 'isa':
+                return []
             constraints = [
                 # Pressure-altitude relation
                 (p_atm/p_sl)**(1/5.257) == T_atm/T_sl,
 
                 # Ideal gas law
                 rho == p_atm/(R_atm/M_atm*T_atm),
-
-                #temperature equation
-                SignomialEquality(T_sl, T_atm + L_atm*alt['h']),
-
-                #constraint on mu
-                SignomialEquality((T_atm + T_s) * mu, C_1 * T_atm**1.5),
                 ]
-
-        #like to use a local subs here in the future
-        subs = None
-
-        return constraints
+            if mode != 'sp':
+                return constraints + mode.constraints(h, T_atm, mu)
+            with SignomialsEnabled():
+                constraints.extend([
+                    #temperature equation
+                    SignomialEquality(T_sl, T_atm + L_atm*h),
+
+                    #constraint on mu
+                    SignomialEquality((T_atm + T_s) * mu, C_1 * T_atm**1.5),
+                    ])
+            return constraints
+
+        if not isinstance(mode, list):
+            return relations(mode, alt['h'], p_atm, T_atm, rho, mu)
+        if constants is None:
+            raise ValueError("an atmosphere of several modes takes SharedConstants")
+        #the relations of each element of the state
+        return [relations(mode_i, alt['h'][i], p_atm[i], T_atm[i], rho[i], mu[i])
+                for i, mode_i in enumerate(mode)]
 
 class Wing(Model):
     """
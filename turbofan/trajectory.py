@@ -0,0 +1,209 @@
+"""Streaming evaluation of recorded flight trajectories against an engine of fixed design"""
+import resource
+import numpy as np
+from time import time
+from itertools import islice
+from collections import deque
+from multiprocessing import Pool, cpu_count
+from gpkit.small_scripts import mag
+from cycle_estimate import estimate
+from offdesign import atmosphere, offdesign, engine_design
+import engine_validation
+
+#columns of a trajectory file, the flight number, time [s], Mach number,
+#altitude [m] and thrust of one engine [N]
+COLUMNS = ['flight', 't', 'M', 'h', 'F']
+DTYPE = np.dtype([('flight', np.int64), ('t', float), ('M', float), ('h', float), ('F', float)])
+
+#kg of fuel burned per hour by 1 N of thrust at a TSFC of 1/hr
+KG_PER_N = 1/9.81
+
+def read_chunks(path, chunk = 100000):
+    """
+    yields the rows of a trajectory file, chunk at a time, as record arrays of
+    DTYPE, a .npy file of DTYPE records is memory mapped and a csv file,
+    with a header line of COLUMNS, is parsed chunk lines at a time
+    """
+    if path.endswith('.npy'):
+        rows = np.load(path, mmap_mode = 'r')
+        for start in range(0, len(rows), chunk):
+            yield np.array(rows[start:start + chunk])
+        return
+    with open(path) as f:
+        header = f.readline().strip().split(',')
+        if header != COLUMNS:
+            raise ValueError("%s has columns %s, not %s" % (path, header, COLUMNS))
+        while True:
+            lines = list(islice(f, chunk))
+            if not lines:
+                return
+            yield np.loadtxt(lines, delimiter = ',', dtype = DTYPE, ndmin = 1)
+
+def write_csv(path, chunks):
+    """
+    writes the record arrays of chunks to the csv file path, the layout
+    read_chunks reads
+    """
+    with open(path, 'w') as f:
+        f.write(','.join(COLUMNS) + '\n')
+        for rows in chunks:
+            np.savetxt(f, rows, delimiter = ',', fmt = ['%d', '%.9g', '%.9g', '%.9g', '%.9g'])
+
+def _score_chunk(args):
+    """
+    solves the operating points of one chunk of rows and integrates their fuel
+    burn, module level so the worker processes can unpickle it
+    ________
+    OUTPUTS
+    ({flight: fuel [kg]} between the rows of the chunk, first row, last row,
+    rows that did not converge), the rows are (flight, t, fuel flow [kg/s])
+    so the flights running across chunks are joined in order
+    """
+    design, rows = args
+    Tatm, Patm = atmosphere(rows['h'])
+    res = offdesign(design, rows['M'], Tatm, Patm, Fspec = rows['F'], outputs = ['TSFC', 'converged'])
+    flow = np.where(res['converged'], res['TSFC']*rows['F']*KG_PER_N/3600., np.nan)
+
+    #trapezoids between consecutive rows of the same flight, the ones next to
+    #rows that did not converge are left out
+    same = rows['flight'][1:] == rows['flight'][:-1]
+    fuel = .5*(flow[1:] + flow[:-1])*np.diff(rows['t'])
+    keep = same & np.isfinite(fuel)
+    flights, inverse = np.unique(rows['flight'][1:][keep], return_inverse = True)
+    totals = np.bincount(inverse, weights = fuel[keep], minlength = len(flights))
+    ends = [(rows['flight'][i], rows['t'][i], flow[i]) for i in [0, -1]]
+    return dict(zip(flights.tolist(), totals.tolist())), ends[0], ends[-1], int(np.sum(~res['converged']))
+
+def score(path, design, chunk = 100000, processes = None, queued = 2):
+    """
+    integrates the fuel burn of every flight of the trajectory file path
+    flown by one engine of design, the chunks of rows are solved by a pool
+    of worker processes and no more than queued chunks per process are read
+    ahead of the ones being summed, so a file is never loaded whole
+    ________
+    INPUTS
+    path = trajectory file, .npy or csv, see read_chunks
+    design = EngineDesign to evaluate
+    chunk = rows solved together
+    processes = number of worker processes, all cores by default, 1 to solve
+    in this process
+
+    OUTPUTS
+    ({flight: fuel burn [kg]}, {'rows', 'unconverged', 'seconds',
+    'rows/s', 'peak RSS [MB]'}), the peak resident set size is the largest
+    of this process and of its workers
+    """
+    tic = time()
+    processes = processes or cpu_count()
+    pool = Pool(processes) if processes != 1 else None
+    fuel, stats = {}, {'rows': 0, 'unconverged': 0}
+    last = None
+
+    def add(result):
+        """
+        sums the result of one chunk, joining its first row to the last row
+        of the chunk before it
+        """
+        totals, first, end, unconverged = result
+        if last is not None and last[0] == first[0] and np.isfinite(last[2] + first[2]):
+            totals[first[0]] = totals.get(first[0], 0.) + .5*(last[2] + first[2])*(first[1] - last[1])
+        for flight, value in totals.items():
+            fuel[flight] = fuel.get(flight, 0.) + value
+        stats['unconverged'] += unconverged
+        return end
+
+    try:
+        pending = deque()
+        for rows in read_chunks(path, chunk):
+            stats['rows'] += len(rows)
+            if pool is None:
+                last = add(_score_chunk((design, rows)))
+                continue
+            pending.append(pool.apply_async(_score_chunk, [(design, rows)]))
+            if len(pending) >= queued*processes:
+                last = add(pending.popleft().get())
+        while pending:
+            last = add(pending.popleft().get())
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    stats['seconds'] = time() - tic
+    stats['rows/s'] = stats['rows']/stats['seconds']
+    #ru_maxrss is in kB on Linux
+    stats['peak RSS [MB]'] = max(resource.getrusage(who).ru_maxrss
+                                 for who in [resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN])/1024.
+    return fuel, stats
+
+def synthetic_flights(nflights, rows, Fref, seed = 0):
+    """
+    yields nflights made up trajectories of rows records each, a climb from
+    6 to 10.5 km and a cruise, with some noise, inside the envelope the
+    off design solver converges on for a design of cruise thrust Fref
+    """
+    rand = np.random.RandomState(seed)
+    x = np.linspace(0, 1, rows)
+    climb = np.minimum(x/.3, 1)
+    for flight in range(nflights):
+        flown = np.empty(rows, dtype = DTYPE)
+        flown['flight'] = flight
+        flown['t'] = x*rand.uniform(3, 5)*3600
+        flown['M'] = .65 + .13*climb + rand.normal(0, .005, rows)
+        flown['h'] = 6000 + 4500*climb + rand.normal(0, 20, rows)
+        flown['F'] = Fref*(1.05 - .25*climb)*(1 + rand.normal(0, .01, rows))
+        yield flown
+
+def _design():
+    """
+    returns the frozen design of the CFM56 validation engine and its smallest
+    segment thrust [N]
+    """
+    engine, m = engine_validation.validation_model(0)
+    sol = m.localsolve(verbosity = 0, x0 = estimate(engine, m, 2).x0(m))
+    return engine_design(engine, sol), np.min(mag(sol(engine.engineP.thrustP['F'])))
+
+def test():
+    """
+    scores made up flights of the CFM56 validation engine from csv and .npy
+    files in chunks that split the flights, against the fuel burn of each
+    flight solved whole
+    """
+    import os
+    import tempfile
+    design, Fref = _design()
+    flights = list(synthetic_flights(3, 500, Fref))
+    folder = tempfile.mkdtemp()
+    csv, npy = os.path.join(folder, 'flights.csv'), os.path.join(folder, 'flights.npy')
+    write_csv(csv, flights)
+    np.save(npy, np.concatenate(flights))
+    assert np.array_equal(np.concatenate(list(read_chunks(csv, 700)))['flight'], np.load(npy)['flight'])
+
+    whole = [_score_chunk((design, rows))[0] for rows in flights]
+    for path, processes in [(csv, 2), (npy, 1)]:
+        fuel, stats = score(path, design, chunk = 700, processes = processes)
+        assert stats['rows'] == 1500 and stats['unconverged'] == 0
+        for flight, totals in enumerate(whole):
+            assert abs(fuel[flight]/totals[flight] - 1) < 1e-6, (path, flight)
+
+def benchmark(nflights = 200, rows = 5000, chunk = 100000, processes = None):
+    """
+    scores nflights made up flights of rows records each of the CFM56
+    validation engine, written to a .npy file, and prints the throughput and
+    peak memory
+    """
+    import os
+    import tempfile
+    design, Fref = _design()
+    path = os.path.join(tempfile.mkdtemp(), 'flights.npy')
+    flown = np.lib.format.open_memmap(path, mode = 'w+', dtype = DTYPE, shape = (nflights*rows,))
+    for i, flight in enumerate(synthetic_flights(nflights, rows, Fref)):
+        flown[i*rows:(i + 1)*rows] = flight
+    del flown
+    fuel, stats = score(path, design, chunk, processes)
+    print("%i rows of %i flights in %.3g s, %.3g rows/s, %i did not converge, peak RSS %.4g MB, "
+          "mean fuel burn %.5g kg" % (stats['rows'], len(fuel), stats['seconds'], stats['rows/s'],
+                                      stats['unconverged'], stats['peak RSS [MB]'], np.mean(list(fuel.values()))))
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,309 @@
+"""Structural variant studies, every engine or mission structure built once and the numeric sweeps of all of them solved across processes"""
+import numpy as np
+from time import time
+from itertools import product
+from multiprocessing import Pool, cpu_count
+from gpkit import Model, Vectorize, units
+from gpkit.small_scripts import mag
+from cycle_estimate import conditions, estimate
+from engine_cache import EngineCache, signature
+from relaxation import _point
+import engine_validation
+
+#structural options of a variant, each changes the constraints of the model,
+#Nclimb = Ncruise = 0 is the validation engine of eng on its test conditions,
+#otherwise the Mission(Nclimb, Ncruise) with its engine
+OPTIONS = ['eng', 'res7', 'cooling', 'BLI', 'Nclimb', 'Ncruise']
+DEFAULTS = {'eng': 0, 'res7': 0, 'cooling': True, 'BLI': False, 'Nclimb': 0, 'Ncruise': 0}
+
+#engine variables tabled for every flight segment, scalars are repeated
+OUTPUTS = ['TSFC', 'F', 'T_{t_{4.1}}', 'W_{engine}']
+
+#turbine inlet temperature [K] of res7 = 1 engine variants that do not sweep
+#or substitute one, the cycle estimate's
+TT4SPEC = 1400.
+
+#compiled variant models of this process, the workers each keep their own
+CACHE = EngineCache()
+
+def unsupported(variant):
+    """
+    returns why the structure of variant cannot be built, None when it can
+    """
+    if variant['res7'] not in (0, 1):
+        return "res7 is 0 or 1"
+    if variant['Nclimb'] or variant['Ncruise']:
+        if variant['eng'] != 0:
+            return "the mission substitutions are the CFM56's, eng 0"
+        if variant['res7'] != 0:
+            return "the mission asks its engine for F_{spec}, res7 0"
+        if not variant['Nclimb'] or not variant['Ncruise']:
+            return "a mission has both climb and cruise segments"
+    return None
+
+def enumerate_variants(**options):
+    """
+    returns the variants, {option: value} over OPTIONS, of every combination
+    of the values listed for each option, the options not given are left at
+    DEFAULTS and the combinations that cannot be built are left out, e.g.
+    enumerate_variants(cooling = [True, False], BLI = [False, True])
+    """
+    for name in options:
+        if name not in DEFAULTS:
+            raise ValueError("%s is not a structural option, one of %s" % (name, OPTIONS))
+    values = [options.get(name, [DEFAULTS[name]]) for name in OPTIONS]
+    variants = [dict(zip(OPTIONS, combination)) for combination in product(*values)]
+    return [variant for variant in variants if unsupported(variant) is None]
+
+def segments(variant):
+    """
+    returns the number of flight segments of variant
+    """
+    if variant['Nclimb']:
+        return variant['Nclimb'] + variant['Ncruise']
+    return 3 if variant['eng'] == 1 else 2
+
+def key(variant):
+    """
+    returns the cache key of the structure of variant
+    """
+    return (signature(variant['res7'], variant['cooling'], segments(variant), variant['eng'], BLI = variant['BLI'])
+            + ('variant', variant['Nclimb'], variant['Ncruise']))
+
+def engine_variant(variant):
+    """
+    builds the validation engine of variant['eng'] with the structure of
+    variant, at the flight conditions and on design values of its test
+    mission, which are substituted since the mission only fits the res7 = 0,
+    cooled engine, a res7 = 1 engine is sized by the test thrusts as lower
+    bounds instead, at T_{t_{4spec}}
+    ________
+    OUTPUTS
+    (engine, model, x0), x0 is the cycle estimate
+    """
+    eng, N = variant['eng'], segments(variant)
+    _, validation = engine_validation.validation_model(eng)
+    values = conditions(validation, N)
+
+    with engine_validation.BUILD_LOCK:
+        with Vectorize(N):
+            state = engine_validation.TestState()
+        engine = engine_validation.Engine(variant['res7'], variant['cooling'], N, state, eng, BLI = variant['BLI'])
+        TSFC = engine.engineP.thrustP['TSFC']
+        #the objective of validation_model, its heaviest segment is the
+        #climb of the two segment engines and the cruise of the TASOPT one
+        weights = [1.]*N
+        weights[-1 if eng == 1 else 0] = 10.
+        constraints = [engine]
+        if variant['res7'] == 1:
+            constraints.append(engine.engineP.thrustP['F'] >= values['F_{spec}']*units('N'))
+        m = Model(sum(w*TSFC[i] for i, w in enumerate(weights)) * (engine['W_{engine}'] * units('1/hr/N'))**.00001,
+                  constraints)
+
+    subs = {}
+    m.varkeys.update_keymap()
+    for name, value in values.items():
+        for vk in m.varkeys.keymap.get(name, []):
+            #vector names of the test state are also scalar constants of
+            #other submodels, which keep their own values
+            if vk.shape and not vk.idx or not vk.idx and np.ndim(value):
+                continue
+            value_i = value[vk.idx[0]] if vk.idx and np.ndim(value) else value
+            if np.isfinite(value_i):
+                subs[vk] = value_i
+    if variant['res7'] == 1:
+        subs['T_{t_{4spec}}'] = TT4SPEC*np.ones(N)
+    m.substitutions.update(subs)
+    return engine, m, estimate(engine, m, N).x0(m)
+
+def mission_variant(variant):
+    """
+    builds the Mission(Nclimb, Ncruise) of variant with the mission
+    substitutions, minimizing its fuel burn
+    ________
+    OUTPUTS
+    (engine, model, x0), no estimate is made for a mission
+    """
+    from engine_flight_profile_integration import Mission, mission_substitutions
+    mission = Mission(variant['Nclimb'], variant['Ncruise'], cooling = variant['cooling'], BLI = variant['BLI'])
+    m = Model(mission['W_{f_{total}}'], mission, mission_substitutions())
+    return mission.ac.engine, m, None
+
+def build(variant):
+    """
+    builds the model of variant, see engine_variant and mission_variant
+    """
+    reason = unsupported(variant)
+    if reason is not None:
+        raise ValueError("variant %s cannot be built, %s" % (variant, reason))
+    if variant['Nclimb']:
+        return mission_variant(variant)
+    return engine_variant(variant)
+
+def points(sweep = None, substitutions = None):
+    """
+    returns the substitutions of every point of the cartesian product of
+    sweep = {name: values}, on top of substitutions, the swept names sorted
+    """
+    names = sorted(sweep or {})
+    return names, [dict(substitutions or {}, **dict(zip(names, values)))
+                   for values in product(*[sweep[name] for name in names])]
+
+def dtype(names, outputs):
+    """
+    returns the record type of a result table sweeping names
+    """
+    return np.dtype([(name, int) for name in OPTIONS] + [(name, float) for name in names]
+                    + [('point', int), ('segment', int), ('converged', bool), ('cost', float)]
+                    + [(name, float) for name in outputs])
+
+def _solve_variant(args):
+    """
+    solves every point of the sweep of one variant, building its structure
+    only if this process has not yet, module level so the worker processes
+    can unpickle it
+    ________
+    OUTPUTS
+    (record array of dtype, one row per point and segment, build time [s],
+    solve time [s])
+    """
+    variant, names, subs, outputs = args
+    tic = time()
+    built = []
+
+    def make():
+        """
+        builds the variant and keeps its x0 for the first solve
+        """
+        engine, m, x0 = build(variant)
+        built.append(_point(m, x0))
+        return engine, m
+
+    compiled = CACHE.get(key(variant), make)
+    if built:
+        compiled.x0 = built[0] or None
+    buildtime = time() - tic
+
+    N = segments(variant)
+    rows = np.zeros(len(subs)*N, dtype = dtype(names, outputs))
+    for name in OPTIONS:
+        rows[name] = variant[name]
+    rows['segment'] = np.tile(np.arange(N), len(subs))
+    rows['point'] = np.repeat(np.arange(len(subs)), N)
+    for i, point in enumerate(subs):
+        block = rows[i*N:(i + 1)*N]
+        for name in names:
+            block[name] = point[name]
+        try:
+            sol = compiled.solve(point)
+        except (RuntimeWarning, ValueError):
+            for name in ['cost'] + list(outputs):
+                block[name] = np.nan
+            continue
+        block['converged'] = True
+        block['cost'] = mag(sol['cost'])
+        for name in outputs:
+            block[name] = mag(sol['variables'][compiled.engine[name]])*np.ones(N)
+    return rows, buildtime, time() - tic - buildtime
+
+def study(variants, sweep = None, substitutions = None, outputs = OUTPUTS, processes = None):
+    """
+    solves the numeric sweep of every structural variant, each variant is
+    built once by one worker process and its points re-solved by
+    substitution from the last converged one, the variants are spread over
+    the processes
+    ________
+    INPUTS
+    variants = list of {option: value}, see enumerate_variants
+    sweep = {name: values} swept in a cartesian product at every variant
+    substitutions = {name: value} substituted at every point
+    outputs = engine variables to table
+    processes = number of worker processes, all cores by default, 1 to solve
+    in this process
+
+    OUTPUTS
+    (table, stats), table is a record array of one row per variant, point
+    and flight segment, keyed by the fields of OPTIONS, the swept names,
+    'point' and 'segment', stats = {'build [s]', 'solve [s]', 'seconds'}
+    summed over the workers but for the wall clock 'seconds'
+    """
+    tic = time()
+    variants = [dict(DEFAULTS, **variant) for variant in variants]
+    names, subs = points(sweep, substitutions)
+    tasks = [(variant, names, subs, list(outputs)) for variant in variants]
+    processes = min(processes or cpu_count(), len(tasks))
+    if processes == 1:
+        results = [_solve_variant(task) for task in tasks]
+    else:
+        pool = Pool(processes)
+        try:
+            results = pool.map(_solve_variant, tasks, chunksize = 1)
+        finally:
+            pool.close()
+            pool.join()
+    table = np.concatenate([rows for rows, _, _ in results])
+    stats = {'build [s]': sum(r[1] for r in results), 'solve [s]': sum(r[2] for r in results),
+             'seconds': time() - tic}
+    return table, stats
+
+def select(table, **options):
+    """
+    returns the rows of table of the variant matching options
+    """
+    mask = np.ones(len(table), dtype = bool)
+    for name, value in options.items():
+        mask &= table[name] == value
+    return table[mask]
+
+def test():
+    """
+    enumerates variants, then studies the CFM56 engine with and without the
+    cooling flow model over two fan pressure ratios in two processes and
+    checks the cooled engine against the validation solve
+    """
+    variants = enumerate_variants(cooling = [True, False], res7 = [0, 1], Nclimb = [0, 2], Ncruise = [0, 2])
+    #the missions of res7 = 1 and those lacking a climb or cruise are left out
+    assert len(variants) == 6
+    try:
+        build(dict(DEFAULTS, Nclimb = 2, Ncruise = 2, res7 = 1))
+        assert False, "a res7 = 1 mission was built"
+    except ValueError:
+        pass
+
+    table, stats = study(enumerate_variants(cooling = [True, False]), {'\\pi_{f_D}': [1.6, 1.685]}, processes = 2)
+    assert len(table) == 2*2*2 and table['converged'].all()
+    cooled = select(table, cooling = True)
+    engine, m = engine_validation.validation_model(0)
+    sol = m.localsolve(verbosity = 0, x0 = estimate(engine, m, 2).x0(m))
+    tsfc = cooled[cooled['\\pi_{f_D}'] == 1.685]['TSFC']
+    assert np.allclose(tsfc, mag(sol(engine['TSFC'])), rtol = 1e-3)
+    #the engine without cooling runs the burner exit at the turbine inlet
+    #temperature, its segments differ from the cooled engine's
+    assert not np.allclose(select(table, cooling = False)['TSFC'], cooled['TSFC'], rtol = 1e-4)
+
+def benchmark(values = (1.6, 1.65, 1.685, 1.72), processes = None):
+    """
+    compares rebuilding every structural variant of the CFM56 engine, cooling
+    flow model, BLI and res7, at every fan pressure ratio of values against
+    the study, which builds each variant once
+    """
+    variants = enumerate_variants(cooling = [True, False], BLI = [False, True], res7 = [0, 1])
+    tic = time()
+    failures = 0
+    for variant in variants:
+        for value in values:
+            engine, m, x0 = build(variant)
+            m.substitutions.update({'\\pi_{f_D}': value})
+            try:
+                m.localsolve(verbosity = 0, x0 = x0)
+            except (RuntimeWarning, ValueError):
+                failures += 1
+    rebuild = time() - tic
+
+    table, stats = study(variants, {'\\pi_{f_D}': values}, processes = processes)
+    print("%i variants x %i points: rebuilt %.3g s, %i failed; study %.3g s (build %.3g s, solve %.3g s), "
+          "%i failed" % (len(variants), len(values), rebuild, failures, stats['seconds'], stats['build [s]'],
+                         stats['solve [s]'], np.sum(~table['converged'] & (table['segment'] == 0))))
+
+if __name__ == "__main__":
+    benchmark()